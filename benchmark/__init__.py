@@ -0,0 +1 @@
+""" Performance benchmarks for rdftools, run with 'python -m benchmark'. """
@@ -0,0 +1,101 @@
+import argparse
+import datetime
+import json
+import os.path
+import platform
+import sys
+import tempfile
+
+import rdftools
+from benchmark import cases
+from benchmark.datasets import SCALES
+
+SUMMARY_COLUMNS = ['scale', 'operation', 'target', 'best', 'median']
+COMPARE_COLUMNS = ['scale', 'operation', 'target', 'before', 'after',
+                   'change']
+
+
+def configure_argparse():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmark',
+        description='Time rdftools operations on synthetic datasets.')
+    parser.add_argument('--scales', metavar='SCALE', nargs='+',
+                        choices=SCALES, default=['10k'])
+    parser.add_argument('--formats', metavar='FORMAT', nargs='+',
+                        choices=rdftools.FORMATS, default=rdftools.FORMATS)
+    parser.add_argument('--operations', metavar='OPERATION', nargs='+',
+                        choices=cases.OPERATIONS, default=cases.OPERATIONS)
+    parser.add_argument('--repeat', metavar='N', type=int, default=3)
+    parser.add_argument('--data-dir', metavar='DIR', action='store',
+                        default=os.path.join(tempfile.gettempdir(),
+                                             'rdftools-benchmark'))
+    parser.add_argument('-o', '--output', metavar='FILE', action='store')
+    parser.add_argument('--compare', metavar='FILE', action='store')
+    return parser
+
+
+def environment():
+    import rdflib
+    return {
+        'rdftools': rdftools.__VERSION__,
+        'rdflib': rdflib.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'started': datetime.datetime.now().isoformat(timespec='seconds')
+    }
+
+
+def run(scales, formats, operations, repeat, directory, sizes=SCALES):
+    rdftools.configure_translation()
+    rdftools.configure_logging('benchmark', 0)
+    report = environment()
+    report['results'] = []
+    for scale in scales:
+        report['results'].extend(cases.run(directory, scale, sizes[scale],
+                                           formats, operations, repeat))
+    return report
+
+
+def key(result):
+    return (result['scale'], result['operation'], result['target'])
+
+
+def compare(before, after):
+    """ Rows comparing the best times of the cases in both reports. """
+    earlier = dict((key(result), result) for result in before['results']
+                   if 'best' in result)
+    for result in after['results']:
+        old = earlier.get(key(result))
+        if old is not None and 'best' in result:
+            yield dict(zip(COMPARE_COLUMNS, key(result) + (
+                '%.4f' % old['best'], '%.4f' % result['best'],
+                '%+.1f%%' % (100 * (result['best'] / old['best'] - 1)))))
+
+
+def summary(report):
+    for result in report['results']:
+        if 'error' in result:
+            yield dict(zip(SUMMARY_COLUMNS, key(result) +
+                           ('error', result['error'])))
+        else:
+            yield dict(zip(SUMMARY_COLUMNS, key(result) + (
+                '%.4f' % result['best'], '%.4f' % result['median'])))
+
+
+def main(argv=None):
+    cmd = configure_argparse().parse_args(argv)
+    report = run(cmd.scales, cmd.formats, cmd.operations, cmd.repeat,
+                 cmd.data_dir)
+    if cmd.output is not None:
+        with open(cmd.output, 'w') as file:
+            json.dump(report, file, indent=1)
+    if cmd.compare is not None:
+        with open(cmd.compare, 'r') as file:
+            before = json.load(file)
+        rdftools.report(COMPARE_COLUMNS, compare(before, report))
+    else:
+        rdftools.report(SUMMARY_COLUMNS, summary(report))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
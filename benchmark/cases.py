@@ -0,0 +1,162 @@
+import contextlib
+import os
+import os.path
+import statistics
+from collections import namedtuple
+from io import StringIO
+from timeit import default_timer as timer
+
+import rdftools
+
+QUERIES = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data',
+                       'queries.sparql')
+
+SELECT_MODES = {
+    'subjects': '-s',
+    'predicates': '-p',
+    'objects': '-o',
+    'types': '-t'
+}
+
+OPERATIONS = ['write', 'read', 'select', 'query', 'report']
+
+REPORT_ROWS = 10000
+REPORT_QUERY = 'SELECT ?s ?p ?o WHERE { ?s ?p ?o } LIMIT %d' % REPORT_ROWS
+
+# Formats only written by rdflib, read back with the parser of another.
+READ_FORMATS = {
+    'pretty-xml': 'xml'
+}
+
+SimpleFile = namedtuple('SimpleFile', ['name'])
+
+
+def measure(function, repeat):
+    """ Run a function repeat times, returning the seconds each run took
+        and the result of the last. """
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = timer()
+        result = function()
+        times.append(timer() - start)
+    return (times, result)
+
+
+def result(scale, operation, target, times=None, size=None, error=None):
+    entry = {'scale': scale, 'operation': operation, 'target': target}
+    if error is not None:
+        entry['error'] = ' '.join(str(error).split())
+    else:
+        entry.update({'statements': size, 'times': times,
+                      'best': min(times),
+                      'median': statistics.median(times)})
+    return entry
+
+
+def new_graph(format):
+    from rdflib import Dataset, Graph
+    from rdftools.stream import QUAD_FORMATS
+    return Dataset() if format in QUAD_FORMATS else Graph()
+
+
+def format_graph(graph, format):
+    """ The graph to write in a format; quad formats need a store with
+        named graphs, so they see the graph as one of them. """
+    from rdflib import Dataset
+    from rdftools.stream import QUAD_FORMATS
+    if format in QUAD_FORMATS:
+        return Dataset(store=graph.store)
+    return graph
+
+
+def format_file(directory, size, format):
+    suffix = rdftools.SNAPSHOT_SUFFIX if format == rdftools.SNAPSHOT_FORMAT \
+        else '.' + format
+    return os.path.join(directory, 'written-%d%s' % (size, suffix))
+
+
+def write_read(graph, directory, size, scale, formats, operations, repeat):
+    """ Write the graph in each format, then read each file written. """
+    results = []
+    for format in formats:
+        output = SimpleFile(format_file(directory, size, format))
+        try:
+            source = format_graph(graph, format)
+            (times, _) = measure(
+                lambda: rdftools.write(source, output, format), repeat)
+            if 'write' in operations:
+                results.append(result(scale, 'write', format, times,
+                                      len(graph)))
+            if 'read' in operations:
+                reader = READ_FORMATS.get(format, format)
+                (times, read) = measure(
+                    lambda: rdftools.read_into(output, reader,
+                                               new_graph(reader)), repeat)
+                results.append(result(scale, 'read', format, times,
+                                      len(read)))
+        except Exception as ex:
+            results.append(result(scale, 'write/read', format, error=ex))
+        finally:
+            if os.path.exists(output.name):
+                os.remove(output.name)
+    return results
+
+
+def select_modes(name, size, scale, repeat):
+    """ Run rdf-select, from parsing to printing, for each kind of term. """
+    from rdftools.scripts import select
+    results = []
+    with open(os.devnull, 'w') as devnull:
+        for (mode, option) in SELECT_MODES.items():
+            def run():
+                with contextlib.redirect_stdout(devnull):
+                    select.main(argv=['-i', name, option])
+            (times, _) = measure(run, repeat)
+            results.append(result(scale, 'select', mode, times, size))
+    return results
+
+
+def queries(graph, scale, repeat):
+    """ Run each of the repository's sample queries, reading every row. """
+    from rdftools.sparql import query, read_queries
+    with open(QUERIES, 'r') as file:
+        sparqls = list(read_queries(file))
+    results = []
+    for (index, sparql) in enumerate(sparqls):
+        (times, rows) = measure(
+            lambda: list(rdftools.result_rows(query(graph, sparql))), repeat)
+        results.append(result(scale, 'query', 'queries-%d' % (index + 1),
+                              times, len(graph)))
+    return results
+
+
+def report(graph, scale, repeat):
+    """ Render rows of a query result as the query tools print them. """
+    from rdftools.sparql import query
+    results = query(graph, REPORT_QUERY)
+    rows = list(rdftools.result_rows(results))
+    (times, _) = measure(
+        lambda: rdftools.report(results.vars, rows, stream=StringIO()),
+        repeat)
+    return [result(scale, 'report', '%d-rows' % len(rows), times,
+                   len(rows))]
+
+
+def run(directory, scale, size, formats, operations, repeat):
+    """ All the chosen benchmarks on one dataset size. """
+    from benchmark.datasets import dataset
+    name = dataset(directory, size)
+    with open(name) as input:
+        graph = rdftools.read_all([input], 'nt')
+    results = []
+    if 'write' in operations or 'read' in operations:
+        results.extend(write_read(graph, directory, size, scale, formats,
+                                  operations, repeat))
+    if 'select' in operations:
+        results.extend(select_modes(name, size, scale, repeat))
+    if 'query' in operations:
+        results.extend(queries(graph, scale, repeat))
+    if 'report' in operations:
+        results.extend(report(graph, scale, repeat))
+    return results
@@ -0,0 +1,85 @@
+import os
+import os.path
+import random
+
+# The namespaces of data/sample-data.nt and data/queries.sparql, so the
+# repository's own queries select from the synthetic data.
+PEOPLE = 'http://example.org/social/people/1.0/'
+PROFILE = 'http://example.org/social/profile/1.0/'
+RELATIONSHIP = 'http://example.org/social/relationship/1.0/'
+TOPICS = 'http://example.org/social/topics/1.0/'
+RDF_TYPE = '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>'
+RDFS_LABEL = '<http://www.w3.org/2000/01/rdf-schema#label>'
+XSD_INTEGER = '<http://www.w3.org/2001/XMLSchema#integer>'
+
+SCALES = {
+    '10k': 10000,
+    '100k': 100000,
+    '1m': 1000000,
+    '10m': 10000000
+}
+
+TOPIC_COUNT = 200
+FAMILY_SIZE = 5
+SEED = 42
+
+
+def iri(namespace, name):
+    return '<%s%s>' % (namespace, name)
+
+
+def person_triples(rng, index, people):
+    """ The statements about one person, in the shape of the sample data:
+        type, label, age, family, a parent, and a few topics liked. """
+    person = iri(PEOPLE, 'P%d' % index)
+    family = iri(PEOPLE, 'OurFamily' if index < FAMILY_SIZE
+                 else 'Family%d' % (index // FAMILY_SIZE))
+    yield (person, RDF_TYPE, iri(PROFILE, 'Person'))
+    yield (person, RDFS_LABEL, '"Person %d"@en' % index)
+    yield (person, iri(RELATIONSHIP, 'age'),
+           '"%d"^^%s' % (rng.randint(1, 99), XSD_INTEGER))
+    yield (person, iri(RELATIONSHIP, 'member'), family)
+    if index % FAMILY_SIZE == 0:
+        yield (family, RDF_TYPE, iri(PROFILE, 'Family'))
+    if index > 0:
+        parent = iri(PEOPLE, 'P%d' % rng.randrange(people))
+        yield (parent, iri(RELATIONSHIP, 'child'), person)
+        yield (person, iri(RELATIONSHIP, 'parent'), parent)
+    for _ in range(rng.randint(1, 3)):
+        yield (person, iri(RELATIONSHIP, 'likes'),
+               iri(TOPICS, 'T%d' % rng.randrange(TOPIC_COUNT)))
+
+
+def triples(size, seed=SEED):
+    """ Yield size statements, as N-Triples terms, the same for a seed. """
+    rng = random.Random(seed)
+    count = 0
+    for topic in range(TOPIC_COUNT):
+        if count == size:
+            return
+        yield (iri(TOPICS, 'T%d' % topic), RDF_TYPE, iri(TOPICS, 'Topic'))
+        count += 1
+    # About eight statements per person.
+    people = max(size // 8, 1)
+    index = 0
+    while True:
+        for triple in person_triples(rng, index, people):
+            if count == size:
+                return
+            yield triple
+            count += 1
+        index += 1
+
+
+def dataset(directory, size):
+    """ The name of an N-Triples file of size statements in directory,
+        generated the first time and re-used after. """
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.join(directory, 'social-%d.nt' % size)
+    if not os.path.exists(name):
+        temporary = name + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            for triple in triples(size):
+                file.write('%s %s %s .\n' % triple)
+        os.replace(temporary, name)
+    return name
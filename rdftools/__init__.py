@@ -1,32 +1,42 @@
 import argparse
+import functools
 import i18n
 import logging
-import os
-import rdflib
 import sys
-from termcolor import colored
 from timeit import default_timer as timer
 
 __VERSION__ = '0.2.0'
 
 __LOG__ = None
 
-FORMATS = ['hext', 'json-ld', 'n3', 'nquads', 'nt', 'trig', 'trix', 'turtle', 'xml', 'pretty-xml']
+FORMATS = ['hext', 'json-ld', 'n3', 'nquads', 'nt', 'trig', 'trix', 'turtle', 'xml', 'pretty-xml', 'snapshot']
 FORMAT_DEFAULT = 'turtle'
 
+# rdftools' own binary format, see rdftools.snapshot.
+SNAPSHOT_FORMAT = 'snapshot'
+SNAPSHOT_SUFFIX = '.rdfsnap'
+
+RESULT_FORMATS = ['csv', 'tsv', 'json', 'xml']
+
 HEADER_SEP = '='
 COLUMN_SEP = '|'
 EMPTY_LINE = ''
+NEW_LINE = '\n'
 COLUMN_SPEC = '{:%d}'
 
 USE_COLOR = False
 
+CACHE = None
+
+TRANSLATIONS = None
+
 
-def startup(description_key, add_args, read_files=True, argv=None):
-    global __LOG__, USE_COLOR
+def startup(description_key, add_args, read_files=True, argv=None,
+            prog=None):
+    global __LOG__, USE_COLOR, CACHE
     configure_translation()
     description = i18n.t(description_key)
-    parser = configure_argparse(description, read_files)
+    parser = configure_argparse(description, read_files, prog)
     if callable(add_args):
         parser = add_args(parser)
     if argv is None:
@@ -36,27 +46,91 @@ def startup(description_key, add_args, read_files=True, argv=None):
     USE_COLOR = command.use_color
     process = parser.prog
     __LOG__ = configure_logging(process, command.verbose)
+    from rdftools import metrics, progress
+    metrics.configure(process, command.stats, command.profile,
+                      command.trace_memory)
+    progress.ENABLED = command.progress
+    if getattr(command, 'input', None):
+        command.input = download_inputs(parser, command)
+    if getattr(command, 'cache', None) is not None:
+        from rdftools.cache import GraphCache
+        CACHE = GraphCache(command.cache, command.cache_size * 1024 * 1024)
+    else:
+        CACHE = None
     __LOG__.info(i18n.t('rdftools.started', tool=process, name=description))
     __LOG__.info(argv)
     return (__LOG__, command)
 
 
+def reported(main):
+    """ Decorate a tool's main so the stats and profiles asked for are
+        written as it ends, however it ends. """
+    @functools.wraps(main)
+    def wrapper(*args, **kwargs):
+        try:
+            return main(*args, **kwargs)
+        finally:
+            from rdftools import metrics
+            metrics.finish()
+    return wrapper
+
+
+def input_file(name):
+    """ The argparse type of -i, an open file or a URL to download. """
+    from rdftools.fetch import Download, is_url
+    if is_url(name):
+        return Download(None, name)
+    elif name.startswith('file:'):
+        from urllib.parse import urlsplit
+        from urllib.request import url2pathname
+        name = url2pathname(urlsplit(name).path)
+    return argparse.FileType('r')(name)
+
+
+def download_inputs(parser, command):
+    from rdftools.fetch import download_all
+    try:
+        return download_all(command.input, command.http_cache)
+    except Exception as ex:
+        parser.error(str(ex))
+
+
 def configure_translation(force_locale=None):
-    i18n.load_path.append(os.path.join(os.path.dirname(__file__), 'messages'))
+    global TRANSLATIONS
+    from rdftools.catalog import MESSAGES, load_catalog
+    i18n.load_path.append(MESSAGES)
+    if TRANSLATIONS is None:
+        # The compiled catalog saves parsing the YAML message files; if it
+        # is out of date these are still loaded as messages are needed.
+        TRANSLATIONS = load_catalog() or {}
+    for (locale, messages) in TRANSLATIONS.items():
+        for (key, value) in messages.items():
+            i18n.add_translation(key, value, locale=locale)
     if force_locale is not None:
         i18n.set('locale', force_locale)
     i18n.set('fallback', 'en')
 
 
-def configure_argparse(description, read_files=True):
-    parser = argparse.ArgumentParser(description=description)
+def configure_argparse(description, read_files=True, prog=None):
+    from rdftools.metrics import STATS_FORMATS
+    parser = argparse.ArgumentParser(prog=prog, description=description)
     parser.add_argument('-v', '--verbose', default=0, action='count')
     parser.add_argument('-b', '--base', action='store')
     if read_files:
         parser.add_argument('-i', '--input', metavar='FILE',
-                            type=argparse.FileType('r'), nargs='*')
+                            type=input_file, nargs='*')
         parser.add_argument('-r', '--read', action='store', choices=FORMATS)
+        parser.add_argument('-j', '--jobs', metavar='N', type=int, default=1)
+        parser.add_argument('--cache', metavar='DIR', action='store')
+        parser.add_argument('--cache-size', metavar='MB', type=int,
+                            default=1024)
+        parser.add_argument('--http-cache', metavar='DIR', action='store')
     parser.add_argument('-c', '--use-color', action='store_true')
+    parser.add_argument('--stats', metavar='FORMAT', action='store',
+                        choices=STATS_FORMATS)
+    parser.add_argument('--profile', metavar='FILE', action='store')
+    parser.add_argument('--trace-memory', metavar='FILE', action='store')
+    parser.add_argument('--progress', action='store_true')
     return parser
 
 
@@ -78,65 +152,202 @@ def configure_logging(name, level):
     return logger
 
 
-def read_into(input, format, graph, base=None):
-    start = end = 0
+def plugin_format(format):
+    """ Register the rdflib plugins for one of rdftools' own formats before
+        it is used, in case rdftools is not installed to provide them. """
+    if format == SNAPSHOT_FORMAT:
+        from rdftools import snapshot  # noqa: F401
+    return format
+
+
+def guess_format(file, format):
     if format is None:
-        if input is None:
-            format = FORMAT_DEFAULT
+        if file is None:
+            return FORMAT_DEFAULT
+        from rdftools.compression import strip_suffix
+        name = strip_suffix(file.name)
+        if name.endswith(SNAPSHOT_SUFFIX):
+            format = SNAPSHOT_FORMAT
         else:
-            format = rdflib.util.guess_format(input.name)
+            from rdflib.util import guess_format
+            format = guess_format(name)
+    return plugin_format(format)
+
+
+def read_into(input, format, graph, base=None):
+    from rdftools import metrics
+    start = end = 0
+    format = guess_format(input, format)
+    # Relative URIs in a download are relative to its URL.
+    base = base or getattr(input, 'url', None)
+    before = len(graph)
     if input is None:
         __LOG__.info(i18n.t('rdftools.read_stdin', format=format))
         start = timer()
-        graph.parse(source=sys.stdin.buffer, format=format, publicID=base)
+        from rdftools.compression import input_stream
+        with metrics.phase('parse'):
+            graph.parse(source=input_stream(sys.stdin.buffer),
+                        format=format, publicID=base)
         end = timer()
     else:
         __LOG__.info(i18n.t('rdftools.read_file',
                      name=input.name, format=format))
         start = timer()
-        graph.parse(source=input.name, format=format, publicID=base)
+        if CACHE is None:
+            with metrics.phase('parse'):
+                parse_source(graph, input.name, format, base)
+        else:
+            read_cached(input.name, format, graph, base)
         end = timer()
+    size = len(graph)
+    metrics.input(getattr(input, 'name', None), format, size - before,
+                  end - start)
     __LOG__.info(i18n.t('rdftools.read_complete',
-                 len=len(graph), time=end - start))
+                 len=size, time=end - start))
+    return graph
+
+
+def parse_source(graph, name, format, base=None):
+    """ Parse a file into the graph, decompressing it as it is read if it
+        is compressed. """
+    from rdftools import progress
+    from rdftools.compression import input_codec
+    if input_codec(name) is None and not progress.enabled():
+        graph.parse(source=name, format=format, publicID=base)
+    else:
+        import pathlib
+        if base is None:
+            # As rdflib would for the file itself.
+            base = pathlib.Path(name).absolute().as_uri()
+        with progress.open_input(name) as source:
+            graph.parse(source=source, format=format, publicID=base)
+    return graph
+
+
+def read_cached(name, format, graph, base=None):
+    from rdftools import metrics
+    cached = CACHE.get(name, format, base)
+    if cached is None:
+        with metrics.phase('parse'):
+            cached = parse_file((name, format, base))[:2]
+        CACHE.put(name, format, base, *cached)
+    return merge_into(graph, *cached)
+
+
+def merge_into(graph, triples, namespaces):
+    from rdftools import metrics
+    with metrics.phase('merge'):
+        graph.addN((s, p, o, graph) for (s, p, o) in triples)
+        for (prefix, namespace) in namespaces:
+            graph.bind(prefix, namespace, override=False)
     return graph
 
 
 def read(input, format, base=None):
-    graph = rdflib.Graph()
+    from rdflib import Graph
+    graph = Graph()
     return read_into(input, format, graph, base)
 
 
-def read_all(inputs, format, base=None):
-    graph = rdflib.Graph()
-    for input in inputs:
+def read_all(inputs, format, base=None, jobs=1):
+    from rdflib import Graph
+    graph = Graph()
+    if jobs != 1 and inputs is not None and len(inputs) > 1:
+        return read_parallel(inputs, format, graph, base, jobs)
+    for input in inputs or [None]:
         graph = read_into(input, format, graph, base)
     return graph
 
 
-def write(graph, output, format, base=None):
-    __LOG__.debug(i18n.t('rdftools.write', graph=graph, len=len(graph)))
+def parse_file(task):
+    (name, format, base) = task
+    from rdflib import Graph
+    graph = Graph()
+    start = timer()
+    parse_source(graph, name, plugin_format(format), base)
+    end = timer()
+    return (list(graph), list(graph.namespaces()), end - start)
+
+
+def read_parallel(inputs, format, graph, base=None, jobs=0):
+    from multiprocessing import Pool
+    from rdftools import metrics, progress
+    tasks = [(input.name, guess_format(input, format),
+              base or getattr(input, 'url', None))
+             for input in inputs]
+    cached = set()
+    if CACHE is not None:
+        cached = set(task for task in tasks if CACHE.contains(*task))
+    start = timer()
+    with Pool(processes=jobs if jobs > 0 else None,
+              initializer=progress.disable) as pool:
+        results = pool.imap(parse_file,
+                            [task for task in tasks if task not in cached])
+        for task in tasks:
+            (name, format, base) = task
+            __LOG__.info(i18n.t('rdftools.read_file',
+                         name=name, format=format))
+            if task in cached:
+                read_start = timer()
+                (triples, namespaces) = CACHE.get(*task) or \
+                    parse_file(task)[:2]
+                time = timer() - read_start
+            else:
+                # Waiting on the workers, for inputs not yet parsed.
+                with metrics.phase('parse'):
+                    (triples, namespaces, time) = next(results)
+                if CACHE is not None:
+                    CACHE.put(name, format, base, triples, namespaces)
+            merge_into(graph, triples, namespaces)
+            metrics.input(name, format, len(triples), time)
+            __LOG__.info(i18n.t('rdftools.read_complete',
+                         len=len(triples), time=time))
+    end = timer()
+    __LOG__.info(i18n.t('rdftools.read_complete',
+                 len=len(graph), time=end - start))
+    return graph
+
+
+def write(graph, output, format, base=None, threads=1):
+    from rdftools import metrics
+    size = len(graph)
+    __LOG__.debug(i18n.t('rdftools.write', graph=graph, len=size))
     start = end = 0
-    if format is None:
-        if output is None:
-            format = FORMAT_DEFAULT
-        else:
-            format = rdflib.util.guess_format(output.name)
+    format = guess_format(output, format)
     if output is None:
         __LOG__.info(i18n.t('rdftools.write_stdout', format=format))
         start = timer()
-        data = graph.serialize(format=format, base=base)
+        with metrics.phase('serialize'):
+            if format == SNAPSHOT_FORMAT:
+                from rdftools.snapshot import serialize
+                data = serialize(graph)
+            else:
+                data = graph.serialize(format=format, base=base)
         end = timer()
-        try:
-            # This fails on Travis ONLY for Python 3.4
-            sys.stdout.buffer.write(data)
-        except AttributeError:
-            sys.stdout.write(data.decode('utf-8'))
+        if isinstance(data, str):
+            # rdflib >= 6 returns a string, not bytes, without an encoding.
+            sys.stdout.write(data)
+        else:
+            try:
+                # This fails on Travis ONLY for Python 3.4
+                sys.stdout.buffer.write(data)
+            except AttributeError:
+                sys.stdout.write(data.decode('utf-8'))
     else:
         __LOG__.info(i18n.t('rdftools.write_file',
                      name=output.name, format=format))
+        from rdftools.compression import open_output, suffix_codec
         start = timer()
-        graph.serialize(destination=output.name, format=format, base=base)
+        with metrics.phase('serialize'):
+            if suffix_codec(output.name) is None:
+                graph.serialize(destination=output.name, format=format,
+                                base=base)
+            else:
+                with open_output(output.name, threads) as stream:
+                    graph.serialize(destination=stream, format=format,
+                                    base=base, encoding='utf-8')
         end = timer()
+    metrics.output(getattr(output, 'name', None), format, size, end - start)
     __LOG__.debug(i18n.t('rdftools.write_complete', time=(end - start)))
 
 
@@ -145,39 +356,87 @@ def get_terminal_width(default=80):
     return shutil.get_terminal_size((default, 20))[0]
 
 
+def colored(str, attrs):
+    if not USE_COLOR:
+        return str
+    from termcolor import colored
+    return colored(str, attrs=attrs)
+
+
 def header(str):
-    return colored(str, attrs=['reverse']) if USE_COLOR else str
+    return colored(str, attrs=['reverse'])
 
 
 def line(str):
-    return colored(str, attrs=['dark']) if USE_COLOR else str
+    return colored(str, attrs=['dark'])
 
 
 def comment(str):
-    return colored(str, attrs=['dark']) if USE_COLOR else str
+    return colored(str, attrs=['dark'])
 
 
-def report(columns, rows, timer=0):
-    # TODO: Should also take this as a parameter? so "rdf query -c 80 -q ..."
-    width = get_terminal_width()
-    col_width = int((width - len(columns)) / len(columns))
-    col_string = COLUMN_SPEC % col_width
-    for column in columns:
-        print(header(col_string.format(column)), end=line(COLUMN_SEP))
-    print(EMPTY_LINE)
+def elapsed(started):
+    return timer() - started
 
-    for column in columns:
-        print(line(HEADER_SEP * col_width), end=line(COLUMN_SEP))
-    print(EMPTY_LINE)
 
-    for row in rows:
-        for col in columns:
-            print(col_string.format(row[col]), end=line(COLUMN_SEP))
-        print(EMPTY_LINE)
+def result_rows(results):
+    # Iterating a Result keeps every row in results.bindings; while the rows
+    # are still a generator read them directly so each can be dropped.
+    rows = getattr(results, '_genbindings', None)
+    if rows is None:
+        return iter(results)
+    from rdflib.query import ResultRow
+    results._genbindings = None
+    return (ResultRow(row, results.vars) for row in rows if row)
+
+
+def report_value(value):
+    return EMPTY_LINE if value is None else str(value)
+
 
+def report(columns, rows, timer=0, limit=None, page_size=None, started=None,
+           stream=None):
+    # TODO: Should also take this as a parameter? so "rdf query -c 80 -q ..."
+    from rdftools import metrics
+    if stream is None:
+        stream = sys.stdout
+    with metrics.phase('render'):
+        count = report_rows(columns, rows, stream, limit, page_size)
+    metrics.count('rows', count)
+
+    if started is not None:
+        timer = elapsed(started)
     if timer != 0:
-        print(comment(i18n.t('rdftools.report_timed',
-                      len=len(rows), time=timer)))
+        stream.write(comment(i18n.t('rdftools.report_timed',
+                             len=count, time=timer)) + NEW_LINE)
     else:
-        print(comment(i18n.t('rdftools.report_timed',
-                      len=len(rows))))
+        stream.write(comment(i18n.t('rdftools.report_complete',
+                             len=count)) + NEW_LINE)
+    stream.flush()
+    return count
+
+
+def report_rows(columns, rows, stream, limit=None, page_size=None):
+    columns = list(columns)
+    width = get_terminal_width()
+    col_width = int((width - len(columns)) / len(columns))
+    col_string = COLUMN_SPEC % col_width
+    separator = line(COLUMN_SEP)
+    heading = EMPTY_LINE.join(
+        [header(col_string.format(str(column))) + separator
+         for column in columns] + [NEW_LINE] +
+        [line(HEADER_SEP * col_width) + separator
+         for column in columns] + [NEW_LINE])
+
+    stream.write(heading)
+    count = 0
+    for row in rows:
+        if limit is not None and count >= limit:
+            break
+        if page_size and count > 0 and count % page_size == 0:
+            stream.write(NEW_LINE + heading)
+        stream.write(EMPTY_LINE.join(
+            [col_string.format(report_value(row[column])) + separator
+             for column in columns] + [NEW_LINE]))
+        count += 1
+    return count
@@ -0,0 +1,115 @@
+import hashlib
+import i18n
+import json
+import os
+import os.path
+import tempfile
+
+import rdftools
+
+INDEX_FILE = 'index.json'
+ENTRY_SUFFIX = '.graph'
+HASH_BLOCK = 1024 * 1024
+SIZE_DEFAULT = 1024
+
+
+class GraphCache(object):
+    """ A directory of parsed inputs, each stored as a snapshot of its
+        triples and namespace bindings, see rdftools.snapshot, which unlike
+        a pickle runs no code when read. Entries are keyed by the content
+        hash of the source file, its format and base URI, and the version
+        of rdflib that parsed it; the index maps
+        a file path and mtime to its last known hash so that unchanged
+        files are not re-hashed. The least recently used entries are
+        removed once the directory grows beyond max_size bytes. """
+
+    def __init__(self, directory, max_size=SIZE_DEFAULT * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+        self.index_name = os.path.join(directory, INDEX_FILE)
+        try:
+            with open(self.index_name, 'r') as file:
+                self.index = json.load(file)
+        except (IOError, ValueError):
+            self.index = {}
+
+    def digest(self, name):
+        path = os.path.abspath(name)
+        stat = os.stat(path)
+        known = self.index.get(path)
+        if known is not None and known['mtime'] == stat.st_mtime and \
+                known['size'] == stat.st_size:
+            return known['digest']
+        hash = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(HASH_BLOCK), b''):
+                hash.update(block)
+        self.index[path] = {'mtime': stat.st_mtime, 'size': stat.st_size,
+                            'digest': hash.hexdigest()}
+        self._save_index()
+        return hash.hexdigest()
+
+    def entry_name(self, name, format, base=None):
+        import rdflib
+        key = '%s|%s|%s|%s' % (self.digest(name), format, base or '',
+                               rdflib.__version__)
+        return os.path.join(
+            self.directory,
+            hashlib.sha256(key.encode('utf-8')).hexdigest() + ENTRY_SUFFIX)
+
+    def contains(self, name, format, base=None):
+        return os.path.exists(self.entry_name(name, format, base))
+
+    def get(self, name, format, base=None):
+        from rdftools.snapshot import read_quads
+        entry = self.entry_name(name, format, base)
+        try:
+            with open(entry, 'rb') as file:
+                (namespaces, quads) = read_quads(file.read())
+                triples = [(s, p, o) for (s, p, o, _) in quads]
+        except (IOError, ValueError, IndexError, RuntimeError):
+            # A damaged entry, RuntimeError for one cut short.
+            rdftools.__LOG__.info(i18n.t('rdftools.cache_miss', name=name))
+            return None
+        # Touch the entry, eviction uses mtime as the last-used time.
+        os.utime(entry, None)
+        rdftools.__LOG__.info(i18n.t('rdftools.cache_hit', name=name))
+        return (triples, namespaces)
+
+    def put(self, name, format, base, triples, namespaces):
+        from rdflib import BNode, Literal, URIRef
+        from rdftools.snapshot import dump_quads
+        if not all(isinstance(term, (BNode, Literal, URIRef))
+                   for triple in triples for term in triple):
+            # An N3 formula has no snapshot form, it is not kept.
+            return
+        entry = self.entry_name(name, format, base)
+        data = dump_quads(((s, p, o, None) for (s, p, o) in triples),
+                          namespaces)
+        self._write_atomic(entry, lambda file: file.write(data))
+        self.evict()
+
+    def evict(self):
+        entries = [os.path.join(self.directory, name)
+                   for name in os.listdir(self.directory)
+                   if name.endswith(ENTRY_SUFFIX)]
+        entries = sorted([(os.path.getmtime(entry), os.path.getsize(entry),
+                           entry) for entry in entries])
+        total = sum(size for (_, size, _) in entries)
+        for (_, size, entry) in entries:
+            if total <= self.max_size:
+                break
+            rdftools.__LOG__.info(i18n.t('rdftools.cache_evict', name=entry))
+            os.remove(entry)
+            total -= size
+
+    def _save_index(self):
+        self._write_atomic(self.index_name, lambda file: file.write(
+            json.dumps(self.index).encode('utf-8')))
+
+    def _write_atomic(self, name, writer):
+        (handle, temp_name) = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(handle, 'wb') as file:
+            writer(file)
+        os.replace(temp_name, name)
@@ -0,0 +1,61 @@
+import json
+import os
+import os.path
+
+MESSAGES = os.path.join(os.path.dirname(__file__), 'messages')
+CATALOG = os.path.join(MESSAGES, 'catalog.json')
+SOURCE_SUFFIX = '.yml'
+
+PLURALS = ['zero', 'one', 'few', 'many', 'other']
+
+
+def source_files(directory=MESSAGES):
+    return [os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if name.endswith(SOURCE_SUFFIX)]
+
+
+def flatten(messages, prefix, catalog):
+    """ Add each message to the catalog under its dotted key, the same keys
+        python-i18n gives them; plural forms stay together as one value. """
+    for (key, value) in messages.items():
+        if isinstance(value, dict) and \
+                len(set(PLURALS).intersection(value)) < 2:
+            flatten(value, prefix + key + '.', catalog)
+        else:
+            catalog[prefix + key] = value
+
+
+def compile_catalog(directory=MESSAGES, target=CATALOG):
+    """ Read every '<namespace>.<locale>.yml' message file and write all of
+        them, by locale, into one JSON catalog that loads without YAML. """
+    import yaml
+    catalog = {}
+    for name in source_files(directory):
+        (namespace, locale) = os.path.basename(name).split('.')[:2]
+        with open(name, 'r', encoding='utf-8') as file:
+            messages = yaml.safe_load(file) or {}
+        flatten(messages.get(locale, {}), namespace + '.',
+                catalog.setdefault(locale, {}))
+    with open(target, 'w', encoding='utf-8') as file:
+        json.dump(catalog, file, indent=1, sort_keys=True, ensure_ascii=False)
+        file.write('\n')
+    return catalog
+
+
+def load_catalog(directory=MESSAGES, target=CATALOG):
+    """ Return the compiled catalog, or None if it is missing or older than
+        any of the message files it was compiled from. """
+    try:
+        compiled = os.path.getmtime(target)
+    except OSError:
+        return None
+    if any(os.path.getmtime(name) > compiled
+           for name in source_files(directory)):
+        return None
+    with open(target, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+if __name__ == '__main__':
+    compile_catalog()
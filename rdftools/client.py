@@ -0,0 +1,93 @@
+import http.client
+import i18n
+import socket
+from io import BytesIO
+from urllib.parse import urlencode, urlsplit
+
+from rdftools.server import GRAPH_TYPES, QUERY_TYPE, RESULT_TYPES, TRUE
+
+
+class ServerError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(i18n.t('rdftools.server_error', status=status,
+                                message=message))
+        self.status = status
+
+
+class UnixConnection(http.client.HTTPConnection):
+    """ HTTP over a Unix domain socket, for servers started with --socket. """
+
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def connect(server, timeout=None):
+    """ Return a connection to the server URL, either 'unix:///path' or
+        'http://host:port', and the path prefix for its endpoints. """
+    url = urlsplit(server)
+    if url.scheme == 'unix':
+        return (UnixConnection(url.path, timeout), '')
+    elif url.scheme == 'https':
+        connection = http.client.HTTPSConnection(url.netloc, timeout=timeout)
+    else:
+        connection = http.client.HTTPConnection(url.netloc, timeout=timeout)
+    return (connection, url.path.rstrip('/'))
+
+
+def request(server, path, params=None, body=None, headers={}):
+    """ Send a request, a POST if it has a body, and return the response
+        content type and body. """
+    (connection, prefix) = connect(server)
+    target = prefix + path
+    if params:
+        target += '?' + urlencode(params)
+    try:
+        connection.request('GET' if body is None else 'POST', target,
+                           body=body, headers=headers)
+        response = connection.getresponse()
+        data = response.read()
+    finally:
+        connection.close()
+    if response.status >= 400:
+        raise ServerError(response.status,
+                          data.decode('utf-8', 'replace').strip())
+    return (response.headers.get_content_type(), data)
+
+
+def remote_query(server, sparql, timeout=None):
+    """ Run a query on the server, returning an rdflib Result as a local
+        query would. """
+    from rdflib import Graph
+    from rdflib.query import Result
+    params = {'timeout': timeout} if timeout is not None else None
+    (type, data) = request(server, '/sparql', params,
+                           body=sparql.encode('utf-8'),
+                           headers={'Content-Type': QUERY_TYPE,
+                                    'Accept': RESULT_TYPES['json']})
+    if type == RESULT_TYPES['json']:
+        return Result.parse(BytesIO(data), format='json')
+    formats = dict((type, format) for (format, type) in GRAPH_TYPES.items())
+    results = Result('CONSTRUCT')
+    results.graph = Graph().parse(data=data, format=formats.get(type))
+    return results
+
+
+def remote_select(server, select, count=False, total=False):
+    params = {'terms': select}
+    if count:
+        params['count'] = TRUE
+    if total:
+        params['total'] = TRUE
+    return request(server, '/select', params)[1].decode('utf-8')
+
+
+def remote_convert(server, format):
+    return request(server, '/convert', {'format': format})[1]
@@ -0,0 +1,178 @@
+import bz2
+import collections
+import gzip
+import i18n
+import io
+import lzma
+from concurrent.futures import ThreadPoolExecutor
+
+GZIP = 'gzip'
+BZIP2 = 'bz2'
+XZ = 'xz'
+ZSTD = 'zstd'
+
+SUFFIXES = {
+    '.gz': GZIP,
+    '.bz2': BZIP2,
+    '.xz': XZ,
+    '.zst': ZSTD
+}
+
+MAGIC = {
+    GZIP: b'\x1f\x8b',
+    BZIP2: b'BZh',
+    XZ: b'\xfd7zXZ\x00',
+    ZSTD: b'\x28\xb5\x2f\xfd'
+}
+MAGIC_SIZE = 6
+
+# Whole streams, that concatenated are read as one, for ParallelWriter.
+COMPRESSORS = {
+    GZIP: gzip.compress,
+    BZIP2: bz2.compress,
+    XZ: lzma.compress
+}
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def suffix_codec(name):
+    for (suffix, codec) in SUFFIXES.items():
+        if name.endswith(suffix):
+            return codec
+    return None
+
+
+def strip_suffix(name):
+    """ The file name without any compression suffix, to guess its format
+        from, so 'dump.nt.gz' is read as N-Triples. """
+    codec = suffix_codec(name)
+    if codec is None:
+        return name
+    return name[:name.rindex('.')]
+
+
+def magic_codec(data):
+    for (codec, magic) in MAGIC.items():
+        if data.startswith(magic):
+            return codec
+    return None
+
+
+def input_codec(name):
+    """ The codec a file is compressed with, from its first bytes, which
+        are trusted over its name. """
+    with open(name, 'rb') as file:
+        return magic_codec(file.read(MAGIC_SIZE))
+
+
+def zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise IOError(i18n.t('rdftools.zstd_missing'))
+    return zstandard
+
+
+def open_input(name):
+    """ Open a file for reading bytes, decompressing as it is read if it
+        is compressed. """
+    codec = input_codec(name)
+    if codec == GZIP:
+        return gzip.open(name, 'rb')
+    elif codec == BZIP2:
+        return bz2.open(name, 'rb')
+    elif codec == XZ:
+        return lzma.open(name, 'rb')
+    elif codec == ZSTD:
+        return zstandard().open(name, 'rb')
+    return open(name, 'rb')
+
+
+def input_stream(stream):
+    """ Wrap a buffered byte stream, such as stdin, to decompress it if its
+        first bytes show it is compressed; the stream is not closed. """
+    codec = magic_codec(stream.peek(MAGIC_SIZE)[:MAGIC_SIZE])
+    if codec == GZIP:
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    elif codec == BZIP2:
+        return bz2.BZ2File(stream, 'rb')
+    elif codec == XZ:
+        return lzma.LZMAFile(stream, 'rb')
+    elif codec == ZSTD:
+        return io.BufferedReader(
+            zstandard().ZstdDecompressor().stream_reader(
+                stream, read_across_frames=True, closefd=False))
+    return stream
+
+
+def open_output(name, threads=1):
+    """ Open a file for writing bytes, compressed as they are written if
+        the name has a compression suffix, on several threads if asked;
+        more than one only where the codec allows. """
+    codec = suffix_codec(name)
+    if codec == ZSTD:
+        compressor = zstandard().ZstdCompressor(
+            threads=threads if threads > 1 else 0)
+        return compressor.stream_writer(open(name, 'wb'))
+    elif codec is not None and threads > 1:
+        return ParallelWriter(open(name, 'wb'), COMPRESSORS[codec], threads)
+    elif codec == GZIP:
+        return gzip.open(name, 'wb')
+    elif codec == BZIP2:
+        return bz2.open(name, 'wb')
+    elif codec == XZ:
+        return lzma.open(name, 'wb')
+    return open(name, 'wb')
+
+
+def open_text_output(name, threads=1):
+    if suffix_codec(name) is None:
+        return open(name, 'w', encoding='utf-8')
+    return io.TextIOWrapper(open_output(name, threads), encoding='utf-8')
+
+
+class ParallelWriter(io.BufferedIOBase):
+    """ Compresses what is written in chunks, each on a pool thread into a
+        complete stream of its own, and writes the streams in order; gzip,
+        bz2 and xz readers all read such concatenated streams as one. A few
+        chunks per thread are in flight at most, bounding the memory used.
+        """
+
+    def __init__(self, file, compress, threads, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+        self.limit = threads * 2
+        self.pending = collections.deque()
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer.extend(data)
+        while len(self.buffer) >= self.chunk_size:
+            self.submit(bytes(self.buffer[:self.chunk_size]))
+            del self.buffer[:self.chunk_size]
+        return len(data)
+
+    def submit(self, chunk):
+        self.pending.append(self.pool.submit(self.compress, chunk))
+        while len(self.pending) > self.limit:
+            self.file.write(self.pending.popleft().result())
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self.buffer:
+                self.submit(bytes(self.buffer))
+                self.buffer = bytearray()
+            while self.pending:
+                self.file.write(self.pending.popleft().result())
+        finally:
+            self.pool.shutdown()
+            self.file.close()
+            super().close()
@@ -0,0 +1,98 @@
+from rdftools.sort import ExternalSort
+from rdftools.stream import QuadWriter, read_statements
+
+ADDED = 'A'
+REMOVED = 'D'
+
+# RDF Patch transaction start and commit rows.
+PATCH_BEGIN = 'TX .\n'
+PATCH_COMMIT = 'TC .\n'
+
+
+class CanonicalSink(object):
+    """ Passes statements without blank nodes straight to the writer, and
+        holds those with them, per graph, until close relabels their blank
+        nodes canonically, so that the same structure gets the same labels
+        in either file. Only statements with blank nodes are kept in memory,
+        and blank nodes shared between graphs are relabeled separately. """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.graphs = {}
+        self.count = 0
+
+    def quad(self, subject, predicate, object, context):
+        from rdflib import BNode, Graph
+        self.count += 1
+        if any(isinstance(term, BNode)
+               for term in (subject, predicate, object)):
+            graph = self.graphs.get(context)
+            if graph is None:
+                graph = self.graphs[context] = Graph()
+            graph.add((subject, predicate, object))
+        else:
+            self.writer.quad(subject, predicate, object, context)
+
+    def close(self):
+        from rdflib.compare import to_canonical_graph
+        for (context, graph) in self.graphs.items():
+            for (s, p, o) in to_canonical_graph(graph):
+                self.writer.quad(s, p, o, context)
+        self.graphs = {}
+
+
+def sorted_statements(input, format, base=None, buffer_size=None,
+                      bnode_aware=False, directory=None):
+    """ Return the input's statements as sorted, unique, N-Quads lines, in
+        an ExternalSort that spills to disk past the buffer size. """
+    sorter = ExternalSort(unique=True, directory=directory)
+    if buffer_size is not None:
+        sorter.buffer_size = buffer_size
+    writer = QuadWriter(sorter, 'nquads')
+    if bnode_aware:
+        sink = CanonicalSink(writer)
+        read_statements(input, format, sink, base)
+        sink.close()
+    else:
+        read_statements(input, format, writer, base)
+    return sorter
+
+
+def diff(old, new):
+    """ Merge two sorted, unique, sequences of lines, yielding (ADDED, line)
+        for each only in new and (REMOVED, line) for each only in old. """
+    (old, new) = (iter(old), iter(new))
+    (left, right) = (next(old, None), next(new, None))
+    while left is not None or right is not None:
+        if right is None or (left is not None and left < right):
+            yield (REMOVED, left)
+            left = next(old, None)
+        elif left is None or right < left:
+            yield (ADDED, right)
+            right = next(new, None)
+        else:
+            (left, right) = (next(old, None), next(new, None))
+
+
+def write_patch(changes, stream):
+    """ Write changes as one RDF Patch transaction; returns the numbers of
+        statements added and removed. """
+    counts = {ADDED: 0, REMOVED: 0}
+    stream.write(PATCH_BEGIN)
+    for (change, line) in changes:
+        stream.write('%s %s' % (change, line))
+        counts[change] += 1
+    stream.write(PATCH_COMMIT)
+    return (counts[ADDED], counts[REMOVED])
+
+
+def write_changes(changes, added, removed):
+    """ Write the statements added and those removed to separate streams,
+        either of which may be None to skip them. """
+    counts = {ADDED: 0, REMOVED: 0}
+    streams = {ADDED: added, REMOVED: removed}
+    for (change, line) in changes:
+        if streams[change] is not None:
+            streams[change].write(line)
+        counts[change] += 1
+    return (counts[ADDED], counts[REMOVED])
@@ -0,0 +1,126 @@
+import asyncio
+import functools
+import i18n
+import queue
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from rdflib.query import Result
+from time import monotonic
+
+import rdftools
+from rdftools.sparql import query
+
+# The rows a query may be ahead of whoever reads them.
+QUEUE_SIZE = 1024
+
+# Seconds a worker waits on a full queue before checking it is cancelled.
+POLL_INTERVAL = 0.1
+
+# Put in the queue after the last row.
+END = object()
+
+
+class QueryTimeout(Exception):
+
+    def __init__(self, timeout):
+        super().__init__(i18n.t('rdftools.query_timeout', time=timeout))
+        self.timeout = timeout
+
+
+def evaluate(results, rows, limit=None, cancelled=None):
+    """ Put the rows of a SELECT query, up to any limit, into the bounded
+        queue rows as they are produced, then END, or the exception that
+        stopped the query; stops at its next row once cancelled. """
+    try:
+        for (count, row) in enumerate(rdftools.result_rows(results)):
+            if limit is not None and count >= limit:
+                break
+            if not offer(rows, dict(zip(results.vars, row)), cancelled):
+                return
+        offer(rows, END, cancelled)
+    except Exception as ex:
+        offer(rows, ex, cancelled)
+
+
+def offer(rows, item, cancelled=None):
+    """ Put an item into the queue, waiting while it is full unless the
+        query is cancelled; returns False if it was. """
+    while cancelled is None or not cancelled.is_set():
+        try:
+            rows.put(item, timeout=POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def read_rows(rows, cancelled, timeout=None, deadline=None):
+    """ Yield the rows evaluate puts in the queue; raises QueryTimeout once
+        the deadline has passed, and cancels the query however reading
+        ends. """
+    try:
+        while True:
+            wait = None
+            if deadline is not None:
+                wait = deadline - monotonic()
+                if wait <= 0:
+                    raise QueryTimeout(timeout)
+            try:
+                row = rows.get(timeout=wait)
+            except queue.Empty:
+                raise QueryTimeout(timeout)
+            if row is END:
+                return
+            elif isinstance(row, Exception):
+                raise row
+            yield row
+    finally:
+        cancelled.set()
+
+
+class QueryExecutor(object):
+    """ Runs queries from an asyncio event loop in a pool of worker threads,
+        so that several may be in flight against one read-only graph, each
+        with its own timeout. The rows of a SELECT query are passed from its
+        worker through a bounded queue as they are produced, so reading them
+        starts with the first and the worker waits on a slow reader; a
+        query that times out, is interrupted, or is no longer read, stops at
+        its next row. Work rdflib does before producing the first row, such
+        as sorting, runs on in its worker but is discarded. """
+
+    def __init__(self, workers=None):
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    async def query(self, graph, sparql, bindings=None, base=None,
+                    limit=None, timeout=None):
+        cancelled = threading.Event()
+        deadline = None if timeout is None else monotonic() + timeout
+        work = asyncio.get_running_loop().run_in_executor(
+            self.pool, functools.partial(query, graph, sparql, bindings,
+                                         base))
+        try:
+            results = await asyncio.wait_for(work, timeout)
+        except asyncio.TimeoutError:
+            raise QueryTimeout(timeout)
+        if results.type != 'SELECT':
+            return results
+        rows = queue.Queue(QUEUE_SIZE)
+        self.pool.submit(evaluate, results, rows, limit, cancelled)
+        streamed = Result('SELECT')
+        streamed.vars = results.vars
+        # A generator, so the rows are read as they are iterated.
+        streamed.bindings = read_rows(rows, cancelled, timeout, deadline)
+        # Results that are dropped unread cancel the query too.
+        weakref.finalize(streamed, cancelled.set)
+        return streamed
+
+    def run(self, graph, sparql, bindings=None, base=None, limit=None,
+            timeout=None):
+        """ Run one query from code without an event loop; on the main
+            thread Ctrl-C cancels it and raises KeyboardInterrupt. """
+        return asyncio.run(self.query(graph, sparql, bindings, base, limit,
+                                      timeout))
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
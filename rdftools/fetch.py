@@ -0,0 +1,207 @@
+import hashlib
+import http.client
+import i18n
+import json
+import os
+import os.path
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+import rdftools
+from rdftools.compression import SUFFIXES, strip_suffix
+
+SCHEMES = ['http', 'https']
+
+INDEX_FILE = 'index.json'
+
+ACCEPT = ', '.join([
+    'text/turtle', 'application/n-triples', 'application/n-quads',
+    'application/trig', 'text/n3', 'application/rdf+xml;q=0.9',
+    'application/ld+json;q=0.9', '*/*;q=0.1'])
+
+# The file suffix that lets the format be guessed, for downloads whose URL
+# has none, from the content type.
+TYPE_SUFFIXES = {
+    'text/turtle': '.ttl',
+    'application/n-triples': '.nt',
+    'application/n-quads': '.nq',
+    'application/trig': '.trig',
+    'text/n3': '.n3',
+    'application/rdf+xml': '.rdf',
+    'application/ld+json': '.jsonld',
+    'application/trix': '.trix'
+}
+
+REDIRECTS = [301, 302, 303, 307, 308]
+MAX_REDIRECTS = 5
+MAX_FETCHES = 8
+TIMEOUT = 60
+BLOCK_SIZE = 1024 * 1024
+
+# An input read from a URL: the cached copy's local name, and the URL to
+# resolve relative URIs against.
+Download = namedtuple('Download', ['name', 'url'])
+
+
+def is_url(name):
+    return urlsplit(name).scheme in SCHEMES
+
+
+def default_directory():
+    root = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'rdftools', 'http')
+
+
+def url_suffix(url, type):
+    """ The suffixes of the URL's last path segment if they name an RDF
+        format, with any compression suffix, else one for the content
+        type. """
+    (name, suffix) = os.path.splitext(urlsplit(url).path.rsplit('/', 1)[-1])
+    if suffix in SUFFIXES:
+        (name, inner) = os.path.splitext(name)
+        suffix = inner + suffix
+    from rdflib.util import guess_format
+    if suffix and guess_format('file' + strip_suffix(suffix)):
+        return suffix
+    return TYPE_SUFFIXES.get(type, '')
+
+
+class Connections(threading.local):
+    """ Each thread's open connections, by scheme and host. """
+
+    def __init__(self):
+        self.open = {}
+
+
+class HTTPCache(object):
+    """ A directory of downloaded files with, in an index, the ETag and
+        Last-Modified each was served with. A URL already downloaded is
+        requested conditionally, and only downloaded again if the server
+        says it has changed. Connections are kept open, one per host in
+        each thread, for further requests. """
+
+    def __init__(self, directory=None, timeout=TIMEOUT):
+        self.directory = directory or default_directory()
+        self.timeout = timeout
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_name = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(self.index_name, 'r') as file:
+                self.index = json.load(file)
+        except (IOError, ValueError):
+            self.index = {}
+        self.lock = threading.Lock()
+        self.connections = Connections()
+
+    def connection(self, scheme, host):
+        connection = self.connections.open.get((scheme, host))
+        if connection is None:
+            if scheme == 'https':
+                connection = http.client.HTTPSConnection(
+                    host, timeout=self.timeout)
+            else:
+                connection = http.client.HTTPConnection(
+                    host, timeout=self.timeout)
+            self.connections.open[(scheme, host)] = connection
+        return connection
+
+    def request(self, url, headers):
+        parts = urlsplit(url)
+        target = (parts.path or '/') + \
+            ('?' + parts.query if parts.query else '')
+        for retry in [False, True]:
+            connection = self.connection(parts.scheme, parts.netloc)
+            try:
+                connection.request('GET', target, headers=headers)
+                return connection.getresponse()
+            except (http.client.HTTPException, ConnectionError):
+                # A kept-alive connection may since have been closed.
+                connection.close()
+                del self.connections.open[(parts.scheme, parts.netloc)]
+                if retry:
+                    raise
+
+    def path(self, entry):
+        return os.path.join(self.directory, entry['file'])
+
+    def fetch(self, url):
+        """ Return the name of a local copy of the URL's content. """
+        LOG = rdftools.__LOG__
+        headers = {'Accept': ACCEPT}
+        with self.lock:
+            entry = self.index.get(url)
+        if entry is not None and os.path.exists(self.path(entry)):
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        location = url
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self.request(location, headers)
+            if response.status not in REDIRECTS or \
+                    response.getheader('Location') is None:
+                break
+            response.read()
+            location = urljoin(location, response.getheader('Location'))
+        if response.status == 304:
+            response.read()
+            LOG.info(i18n.t('rdftools.fetch_unchanged', url=url))
+            return self.path(entry)
+        elif response.status != 200:
+            response.read()
+            raise IOError(i18n.t('rdftools.fetch_error', url=url,
+                                 status=response.status,
+                                 reason=response.reason))
+        LOG.info(i18n.t('rdftools.fetch_started', url=url))
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest() + \
+            url_suffix(location, response.headers.get_content_type())
+        (handle, temporary) = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                for block in iter(lambda: response.read(BLOCK_SIZE), b''):
+                    file.write(block)
+            os.replace(temporary, os.path.join(self.directory, name))
+        except BaseException:
+            os.remove(temporary)
+            raise
+        with self.lock:
+            if entry is not None and entry['file'] != name and \
+                    os.path.exists(self.path(entry)):
+                os.remove(self.path(entry))
+            entry = self.index[url] = {
+                'file': name,
+                'etag': response.getheader('ETag'),
+                'last_modified': response.getheader('Last-Modified')}
+            self._save_index()
+        return self.path(entry)
+
+    def fetch_all(self, urls):
+        """ Fetch several URLs at once, returning their local names in the
+            same order. """
+        if len(urls) == 1:
+            return [self.fetch(urls[0])]
+        with ThreadPoolExecutor(min(len(urls), MAX_FETCHES)) as pool:
+            return list(pool.map(self.fetch, urls))
+
+    def _save_index(self):
+        (handle, temporary) = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(handle, 'w') as file:
+            json.dump(self.index, file)
+        os.replace(temporary, self.index_name)
+
+
+def download_all(inputs, directory=None):
+    """ Replace the Download inputs given only a URL with their local copy,
+        fetched through the cache in directory. """
+    urls = [input.url for input in inputs
+            if isinstance(input, Download) and input.name is None]
+    if not urls:
+        return inputs
+    names = dict(zip(urls, HTTPCache(directory).fetch_all(urls)))
+    return [Download(names[input.url], input.url)
+            if isinstance(input, Download) and input.name is None
+            else input for input in inputs]
@@ -0,0 +1,190 @@
+import contextlib
+import i18n
+import json
+import sys
+import threading
+from timeit import default_timer as timer
+
+STATS_FORMATS = ['json', 'text']
+
+# Frames kept for each allocation traced by --trace-memory.
+TRACE_FRAMES = 25
+
+STDIN = '-'
+
+RECORDER = None
+STATS = None
+PROFILE = None
+PROFILER = None
+TRACE_MEMORY = None
+
+
+class Metrics(object):
+    """ What one run of a tool spent its time on: the seconds in each phase
+        (parse, merge, query, serialize, render, stream), and the statements
+        in, and seconds taken by, each input read and output written.
+        Recording is always on, it costs one timer call per phase. Phases
+        are totalled across threads, so may add up to more than the time
+        the tool ran. """
+
+    def __init__(self, tool=None):
+        self.tool = tool
+        self.started = timer()
+        self.phases = {}
+        self.inputs = []
+        self.outputs = []
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = timer()
+        try:
+            yield
+        finally:
+            self.add_time(name, timer() - start)
+
+    def add_time(self, name, seconds):
+        with self.lock:
+            self.phases[name] = self.phases.get(name, 0) + seconds
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def input(self, name, format, statements, seconds):
+        with self.lock:
+            self.inputs.append(transfer(name, format, statements, seconds))
+
+    def output(self, name, format, statements, seconds):
+        with self.lock:
+            self.outputs.append(transfer(name, format, statements, seconds))
+
+    def stats(self):
+        stats = {
+            'tool': self.tool,
+            'elapsed': timer() - self.started,
+            'phases': dict(self.phases),
+            'inputs': list(self.inputs),
+            'outputs': list(self.outputs),
+            'counts': dict(self.counts),
+            'peak_rss': peak_rss(),
+            'peak_rss_children': peak_rss(children=True)
+        }
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            stats['peak_traced'] = tracemalloc.get_traced_memory()[1]
+        return stats
+
+
+def transfer(name, format, statements, seconds):
+    return {'name': name or STDIN, 'format': format,
+            'statements': statements, 'seconds': seconds,
+            'rate': statements / seconds if seconds else None}
+
+
+def peak_rss(children=False):
+    """ The most memory, in bytes, this process (or with children, its
+        largest finished child process) has had resident; None where the
+        platform does not say. """
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children
+                               else resource.RUSAGE_SELF)
+    # Kilobytes on Linux, bytes on macOS.
+    return usage.ru_maxrss if sys.platform == 'darwin' \
+        else usage.ru_maxrss * 1024
+
+
+def recorder():
+    global RECORDER
+    if RECORDER is None:
+        RECORDER = Metrics()
+    return RECORDER
+
+
+def reset(tool=None):
+    global RECORDER
+    RECORDER = Metrics(tool)
+    return RECORDER
+
+
+def phase(name):
+    return recorder().phase(name)
+
+
+def count(name, value=1):
+    recorder().count(name, value)
+
+
+def input(name, format, statements, seconds):
+    recorder().input(name, format, statements, seconds)
+
+
+def output(name, format, statements, seconds):
+    recorder().output(name, format, statements, seconds)
+
+
+def stats():
+    return recorder().stats()
+
+
+def configure(tool, stats=None, profile=None, trace_memory=None):
+    """ Start recording a run of the tool, and, asked for, profiling it
+        with cProfile or tracing its allocations with tracemalloc. """
+    global STATS, PROFILE, PROFILER, TRACE_MEMORY
+    reset(tool)
+    (STATS, PROFILE, TRACE_MEMORY) = (stats, profile, trace_memory)
+    if profile is not None:
+        import cProfile
+        PROFILER = cProfile.Profile()
+        PROFILER.enable()
+    if trace_memory is not None:
+        import tracemalloc
+        tracemalloc.start(TRACE_FRAMES)
+
+
+def finish(stream=None):
+    """ Once a tool is done, write the profile and allocation snapshot, and
+        then the stats, if they were asked for. """
+    global STATS, PROFILE, PROFILER, TRACE_MEMORY
+    if PROFILER is not None:
+        PROFILER.disable()
+        PROFILER.dump_stats(PROFILE)
+    # Taken while allocations are still traced, for their peak.
+    current = stats() if STATS is not None else None
+    if TRACE_MEMORY is not None:
+        import tracemalloc
+        tracemalloc.take_snapshot().dump(TRACE_MEMORY)
+        tracemalloc.stop()
+    if current is not None:
+        stream = sys.stderr if stream is None else stream
+        stream.write(format_stats(current, STATS))
+        stream.flush()
+    (STATS, PROFILE, PROFILER, TRACE_MEMORY) = (None, None, None, None)
+
+
+def format_stats(stats, format):
+    if format == 'json':
+        return json.dumps(stats, sort_keys=True) + '\n'
+    lines = [i18n.t('rdftools.stats_elapsed', tool=stats['tool'] or '',
+                    time=stats['elapsed'])]
+    for (name, seconds) in sorted(stats['phases'].items()):
+        lines.append(i18n.t('rdftools.stats_phase', name=name, time=seconds))
+    for (kind, entries) in [('input', stats['inputs']),
+                            ('output', stats['outputs'])]:
+        for entry in entries:
+            lines.append(i18n.t('rdftools.stats_%s' % kind,
+                                name=entry['name'], format=entry['format'],
+                                len=entry['statements'],
+                                time=entry['seconds'],
+                                rate=int(entry['rate'] or 0)))
+    for (name, value) in sorted(stats['counts'].items()):
+        lines.append(i18n.t('rdftools.stats_count', name=name, len=value))
+    for key in ['peak_rss', 'peak_rss_children', 'peak_traced']:
+        if stats.get(key):
+            lines.append(i18n.t('rdftools.stats_%s' % key,
+                                size='%.1f' % (stats[key] / (1024 * 1024))))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,170 @@
+import contextlib
+import i18n
+import os
+import sys
+import threading
+from timeit import default_timer as timer
+
+from rdftools.compression import input_stream, open_input as open_compressed
+
+# Set by --progress, or the shell's progress command.
+ENABLED = False
+
+# The Progress reporting now; reads within it report through it, not their
+# own, such as each file rdf-validate checks within all of them.
+REPORTER = None
+
+# Seconds between updates of a live status line, or log lines otherwise.
+LIVE_INTERVAL = 0.5
+LOG_INTERVAL = 10
+
+MB = 1024 * 1024
+
+
+def enabled():
+    return ENABLED and REPORTER is None
+
+
+def disable():
+    """ Turn progress off, in worker processes, whose reports would only
+        garble those of the process that started them. """
+    global ENABLED
+    ENABLED = False
+
+
+def file_position(file):
+    """ A function returning how far the operating system has read the
+        file, ahead of any buffering; None for pipes. """
+    descriptor = file.fileno()
+
+    def position():
+        try:
+            return os.lseek(descriptor, 0, os.SEEK_CUR)
+        except OSError:
+            return None
+    return position
+
+
+def duration(seconds):
+    (minutes, seconds) = divmod(int(seconds), 60)
+    (hours, minutes) = divmod(minutes, 60)
+    return '%d:%02d:%02d' % (hours, minutes, seconds)
+
+
+class Progress(object):
+    """ Reports how far through its input a long read has got: bytes read,
+        of how many, the rate in MB and, where counted, statements per
+        second, and the time left. The bytes are polled by a thread, from
+        the position of the file rather than the parser, so the parse loop
+        itself does no extra work; a parser that reads the whole file
+        before parsing, as rdflib's Turtle parser does, shows only the time
+        it has taken once the file is read. On a terminal the status is
+        one line kept up to date, otherwise it is written every
+        LOG_INTERVAL seconds. """
+
+    def __init__(self, name, total=None, position=None, count=None,
+                 stream=None):
+        self.name = name or '-'
+        self.total = total
+        self.position = position
+        self.count = count
+        self.stream = sys.stderr if stream is None else stream
+        self.live = self.stream.isatty()
+        self.interval = LIVE_INTERVAL if self.live else LOG_INTERVAL
+        self.width = 0
+        self.started = timer()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        global REPORTER
+        REPORTER = self
+        self.started = timer()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        global REPORTER
+        REPORTER = None
+        self.stopped.set()
+        self.thread.join()
+        if self.live and self.width > 0:
+            self.report()
+            self.stream.write('\n')
+            self.stream.flush()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.report()
+
+    def status(self):
+        elapsed = timer() - self.started
+        done = self.position() if self.position is not None else None
+        parts = []
+        if done is not None:
+            if self.total:
+                parts.append(i18n.t('rdftools.progress_of', name=self.name,
+                                    done='%.1f' % (done / MB),
+                                    total='%.1f' % (self.total / MB),
+                                    percent=int(100 * done / self.total)))
+            else:
+                parts.append(i18n.t('rdftools.progress_read', name=self.name,
+                                    done='%.1f' % (done / MB)))
+            parts.append(i18n.t('rdftools.progress_rate',
+                                rate='%.1f' % (done / MB / elapsed)))
+        else:
+            parts.append(self.name)
+        if self.count is not None:
+            statements = self.count()
+            parts.append(i18n.t('rdftools.progress_statements',
+                                len=statements,
+                                rate=int(statements / elapsed)))
+        if done is not None and self.total and 0 < done < self.total:
+            parts.append(i18n.t('rdftools.progress_eta', time=duration(
+                elapsed * (self.total - done) / done)))
+        else:
+            parts.append(i18n.t('rdftools.progress_elapsed',
+                                time=duration(elapsed)))
+        return ', '.join(parts)
+
+    def report(self):
+        status = self.status()
+        if self.live:
+            # Spaces over whatever is left of a longer status before.
+            self.stream.write('\r' + status.ljust(self.width))
+            self.width = len(status)
+        else:
+            self.stream.write(status + '\n')
+        self.stream.flush()
+
+
+def monitor(name, file=None, count=None):
+    """ Report progress reading a file, opened as bytes, or the statements
+        counted reading stdin, if progress is enabled. """
+    if not enabled():
+        return contextlib.nullcontext()
+    if file is None:
+        return Progress(name, count=count)
+    return Progress(name, os.fstat(file.fileno()).st_size or None,
+                    file_position(file), count)
+
+
+def tally(name, total, position, count=None):
+    """ Report progress through more than one file, from functions giving
+        the bytes and statements done so far, if progress is enabled. """
+    if not enabled():
+        return contextlib.nullcontext()
+    return Progress(name, total or None, position, count)
+
+
+@contextlib.contextmanager
+def open_input(name, count=None):
+    """ Open a file for reading bytes, decompressed as it is read, as
+        compression.open_input does, reporting progress as it is read. """
+    if not enabled():
+        with open_compressed(name) as source:
+            yield source
+        return
+    with open(name, 'rb') as file:
+        with monitor(name, file, count):
+            yield input_stream(file)
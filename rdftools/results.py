@@ -0,0 +1,150 @@
+import csv
+import i18n
+from itertools import islice
+import json
+from rdflib import BNode, Literal, URIRef
+from rdflib.plugins.serializers.nt import _quoteLiteral
+from xml.sax.saxutils import escape, quoteattr
+
+import rdftools
+
+GRAPH_QUERIES = ('CONSTRUCT', 'DESCRIBE')
+
+XML_HEADER = '<?xml version="1.0"?>\n' + \
+    '<sparql xmlns="http://www.w3.org/2005/sparql-results#">\n'
+XML_FOOTER = '</sparql>\n'
+
+
+def write_results(results, format, stream, limit=None):
+    """ Write SPARQL results in one of the standard result formats as each
+        row is produced; returns the number of rows written. The results of
+        a CONSTRUCT or DESCRIBE query are a graph, not rows, and raise
+        ValueError. """
+    from rdftools import metrics
+    if results.type in GRAPH_QUERIES:
+        raise ValueError(i18n.t('rdftools.results_graph', type=results.type,
+                                format=format))
+    with metrics.phase('render'):
+        if results.type == 'ASK':
+            return WRITERS[format](None, [bool(results)], stream)
+        rows = rdftools.result_rows(results)
+        if limit is not None:
+            rows = islice(rows, limit)
+        count = WRITERS[format](results.vars, rows, stream)
+    metrics.count('rows', count)
+    return count
+
+
+def csv_value(value):
+    if value is None:
+        return ''
+    elif isinstance(value, BNode):
+        return value.n3()
+    return str(value)
+
+
+def tsv_value(value):
+    if value is None:
+        return ''
+    elif isinstance(value, Literal):
+        return _quoteLiteral(value)
+    return value.n3()
+
+
+def write_csv(columns, rows, stream, dialect='excel'):
+    writer = csv.writer(stream, dialect=dialect, lineterminator='\r\n')
+    if columns is None:
+        writer.writerow(['true' if rows[0] else 'false'])
+        return 1
+    writer.writerow([str(column) for column in columns])
+    count = 0
+    for row in rows:
+        writer.writerow([csv_value(row[column]) for column in columns])
+        count += 1
+    return count
+
+
+def write_tsv(columns, rows, stream):
+    if columns is None:
+        stream.write('true\n' if rows[0] else 'false\n')
+        return 1
+    stream.write('\t'.join([column.n3() for column in columns]) + '\n')
+    count = 0
+    for row in rows:
+        stream.write('\t'.join([tsv_value(row[column])
+                                for column in columns]) + '\n')
+        count += 1
+    return count
+
+
+def json_value(value):
+    if isinstance(value, URIRef):
+        return {'type': 'uri', 'value': str(value)}
+    elif isinstance(value, BNode):
+        return {'type': 'bnode', 'value': str(value)}
+    binding = {'type': 'literal', 'value': str(value)}
+    if value.language is not None:
+        binding['xml:lang'] = value.language
+    elif value.datatype is not None:
+        binding['datatype'] = str(value.datatype)
+    return binding
+
+
+def write_json(columns, rows, stream):
+    if columns is None:
+        json.dump({'head': {}, 'boolean': rows[0]}, stream)
+        stream.write('\n')
+        return 1
+    stream.write('{"head": %s, "results": {"bindings": [' % json.dumps(
+        {'vars': [str(column) for column in columns]}))
+    count = 0
+    for row in rows:
+        binding = dict([(str(column), json_value(row[column]))
+                        for column in columns if row[column] is not None])
+        stream.write((',\n' if count > 0 else '\n') + json.dumps(binding))
+        count += 1
+    stream.write('\n]}}\n')
+    return count
+
+
+def xml_value(value):
+    if isinstance(value, URIRef):
+        return '<uri>%s</uri>' % escape(value)
+    elif isinstance(value, BNode):
+        return '<bnode>%s</bnode>' % escape(value)
+    elif value.language is not None:
+        return '<literal xml:lang=%s>%s</literal>' % (
+            quoteattr(value.language), escape(value))
+    elif value.datatype is not None:
+        return '<literal datatype=%s>%s</literal>' % (
+            quoteattr(value.datatype), escape(value))
+    return '<literal>%s</literal>' % escape(value)
+
+
+def write_xml(columns, rows, stream):
+    stream.write(XML_HEADER)
+    if columns is None:
+        stream.write('<head/>\n<boolean>%s</boolean>\n' %
+                     ('true' if rows[0] else 'false'))
+        stream.write(XML_FOOTER)
+        return 1
+    stream.write('<head>\n%s</head>\n<results>\n' % ''.join(
+        ['  <variable name=%s/>\n' % quoteattr(column)
+         for column in columns]))
+    count = 0
+    for row in rows:
+        stream.write('  <result>%s</result>\n' % ''.join(
+            ['<binding name=%s>%s</binding>' % (quoteattr(column),
+                                                xml_value(row[column]))
+             for column in columns if row[column] is not None]))
+        count += 1
+    stream.write('</results>\n' + XML_FOOTER)
+    return count
+
+
+WRITERS = {
+    'csv': write_csv,
+    'tsv': write_tsv,
+    'json': write_json,
+    'xml': write_xml
+}
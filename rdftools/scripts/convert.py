@@ -1,20 +1,99 @@
 import argparse
 import i18n
+import os
+import sys
 
 import rdftools
 
 
 def add_args(parser):
+    from rdftools.shard import SHARD_KEYS, SHARD_KEY_DEFAULT
+    from rdftools.sort import BUFFER_DEFAULT
     parser.add_argument('-o', '--output', metavar='FILE', type=argparse.FileType('w'))
     parser.add_argument('-w', '--write', metavar='FORMAT', action='store',
                         choices=rdftools.FORMATS)
+    parser.add_argument('-m', '--in-memory', action='store_true')
+    parser.add_argument('--server', metavar='URL', action='store')
+    parser.add_argument('--sort', action='store_true')
+    parser.add_argument('-u', '--unique', action='store_true')
+    parser.add_argument('--buffer', metavar='MB', type=int,
+                        default=BUFFER_DEFAULT)
+    parser.add_argument('--temp-dir', metavar='DIR', action='store')
+    parser.add_argument('--compress-threads', metavar='N', type=int,
+                        default=1)
+    parser.add_argument('--shards', metavar='N', type=int)
+    parser.add_argument('--shard-by', metavar='TERM', choices=SHARD_KEYS,
+                        default=SHARD_KEY_DEFAULT)
     return parser
 
 
-def main():
-    (LOG, cmd) = rdftools.startup('scripts.convert_command', add_args)
+def remote_convert(server, output, format, threads):
+    from rdftools import client
+    data = client.remote_convert(server, rdftools.guess_format(output, format))
+    if output is None:
+        sys.stdout.buffer.write(data)
+        sys.stdout.flush()
+    else:
+        from rdftools.compression import open_output
+        with open_output(output.name, threads) as file:
+            file.write(data)
+
+
+def sort_all(LOG, cmd):
+    from rdftools import stream
+    format = rdftools.guess_format(cmd.output, cmd.write)
+    if format not in stream.WRITE_FORMATS:
+        LOG.error(i18n.t('scripts.convert_sort_format', format=format,
+                         formats=', '.join(stream.WRITE_FORMATS)))
+        sys.exit(2)
+    stream.sort_all(cmd.input, cmd.read, cmd.output, format, cmd.base,
+                    cmd.unique, cmd.buffer * 1024 * 1024, cmd.temp_dir,
+                    cmd.compress_threads)
+
+
+def shard_all(LOG, cmd):
+    from rdftools.shard import shard_all
+    # Usage errors, exiting as argparse does.
+    if cmd.output is None or cmd.output is sys.stdout:
+        LOG.error(i18n.t('scripts.convert_shard_output'))
+        sys.exit(2)
+    if cmd.shards < 1:
+        LOG.error(i18n.t('scripts.convert_shard_count'))
+        sys.exit(2)
+    # The output name is only the pattern for the shards' names.
+    cmd.output.close()
+    os.remove(cmd.output.name)
+    format = rdftools.guess_format(cmd.output, cmd.write)
+    shard_all(cmd.input, cmd.read, cmd.output.name, format, cmd.shards,
+              cmd.shard_by, cmd.base, cmd.jobs, cmd.temp_dir,
+              cmd.compress_threads)
+
+
+@rdftools.reported
+def main(argv=None, prog=None):
+    (LOG, cmd) = rdftools.startup('scripts.convert_command', add_args,
+                                  argv=argv, prog=prog)
+    from rdflib.exceptions import ParserError
+    from rdftools import stream
     try:
-        graph = rdftools.read_all(cmd.input, cmd.read)
-        rdftools.write(graph, cmd.output, cmd.write)
+        if cmd.server is not None:
+            remote_convert(cmd.server, cmd.output, cmd.write,
+                           cmd.compress_threads)
+        elif cmd.shards is not None:
+            shard_all(LOG, cmd)
+        elif cmd.sort or cmd.unique:
+            sort_all(LOG, cmd)
+        elif not cmd.in_memory and stream.can_stream(cmd.input, cmd.read,
+                                                     cmd.output, cmd.write):
+            LOG.info(i18n.t('scripts.convert_streaming'))
+            stream.stream_all(cmd.input, cmd.read, cmd.output, cmd.write,
+                              cmd.compress_threads)
+        else:
+            graph = rdftools.read_all(cmd.input, cmd.read,
+                                      jobs=cmd.jobs)
+            rdftools.write(graph, cmd.output, cmd.write,
+                           threads=cmd.compress_threads)
     except SyntaxError as ex:
         print(i18n.t('scripts.read_error', message=ex.message))
+    except ParserError as ex:
+        print(i18n.t('scripts.read_error', message=ex.msg))
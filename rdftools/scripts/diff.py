@@ -0,0 +1,76 @@
+import argparse
+import i18n
+import sys
+
+import rdftools
+
+
+def add_args(parser):
+    from rdftools.sort import BUFFER_DEFAULT
+    parser.add_argument('old', metavar='OLD', type=argparse.FileType('r'))
+    parser.add_argument('new', metavar='NEW', type=argparse.FileType('r'))
+    parser.add_argument('-r', '--read', action='store',
+                        choices=rdftools.FORMATS)
+    parser.add_argument('-o', '--output', metavar='FILE', action='store')
+    parser.add_argument('--added', metavar='FILE', action='store')
+    parser.add_argument('--removed', metavar='FILE', action='store')
+    parser.add_argument('-B', '--bnode-aware', action='store_true')
+    parser.add_argument('--buffer', metavar='MB', type=int,
+                        default=BUFFER_DEFAULT)
+    parser.add_argument('--temp-dir', metavar='DIR', action='store')
+    return parser
+
+
+def open_output(name):
+    if name is None:
+        return None
+    from rdftools.compression import open_text_output
+    return open_text_output(name)
+
+
+def write(changes, cmd):
+    from rdftools import diff
+    if cmd.added is not None or cmd.removed is not None:
+        (added, removed) = (open_output(cmd.added), open_output(cmd.removed))
+        try:
+            return diff.write_changes(changes, added, removed)
+        finally:
+            for output in (added, removed):
+                if output is not None:
+                    output.close()
+    elif cmd.output is not None:
+        with open_output(cmd.output) as output:
+            return diff.write_patch(changes, output)
+    else:
+        counts = diff.write_patch(changes, sys.stdout)
+        sys.stdout.flush()
+        return counts
+
+
+@rdftools.reported
+def main(argv=None, prog=None):
+    (LOG, cmd) = rdftools.startup('scripts.diff_command', add_args,
+                                  read_files=False, argv=argv, prog=prog)
+    from rdflib.exceptions import ParserError
+    from rdftools import diff
+
+    statements = []
+    try:
+        for input in [cmd.old, cmd.new]:
+            statements.append(diff.sorted_statements(
+                input, cmd.read, cmd.base, cmd.buffer * 1024 * 1024,
+                cmd.bnode_aware, cmd.temp_dir))
+        counts = write(diff.diff(*statements), cmd)
+    except SyntaxError as ex:
+        print(i18n.t('scripts.read_error', message=ex.message))
+        return 2
+    except ParserError as ex:
+        print(i18n.t('scripts.read_error', message=ex.msg))
+        return 2
+    finally:
+        for sorter in statements:
+            sorter.close()
+    LOG.info(i18n.t('scripts.diff_complete', added=counts[0],
+                    removed=counts[1]))
+    # Like diff(1): 0 if the graphs are the same, 1 if not.
+    return 1 if any(counts) else 0
@@ -1,29 +1,203 @@
+import argparse
 import i18n
+from io import StringIO
+from itertools import chain
+import os
+import os.path
+import sys
 from timeit import default_timer as timer
 
 import rdftools
 
+QUERY_SUFFIXES = ('.rq', '.sparql')
+REPORT_SUFFIX = 'txt'
+SUMMARY_COLUMNS = ['query', 'rows', 'seconds']
+
+BATCH = None
+
+EXECUTOR = None
+
 
 def add_args(parser):
-    parser.add_argument('-q', '--query', action='store')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('-q', '--query', action='store')
+    group.add_argument('--query-file', '--queries', dest='query_file',
+                       metavar='PATH', action='store')
+    parser.add_argument('-l', '--limit', metavar='ROWS', type=int)
+    parser.add_argument('--page-size', metavar='ROWS', type=int)
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        type=argparse.FileType('w'))
+    parser.add_argument('--results-format', metavar='FORMAT',
+                        choices=rdftools.RESULT_FORMATS)
+    parser.add_argument('--output-dir', metavar='DIR', action='store')
+    parser.add_argument('--batch-jobs', metavar='N', type=int, default=1)
+    parser.add_argument('--batch-processes', action='store_true')
+    parser.add_argument('--server', metavar='URL', action='store')
+    parser.add_argument('--timeout', metavar='SECONDS', type=float)
+    parser.add_argument('--store', metavar='DIR', action='store')
     return parser
 
 
-def main():
-    (LOG, cmd) = rdftools.startup('scripts.query_command', add_args)
+def load_queries(path):
+    from rdftools.sparql import read_queries
+    if os.path.isdir(path):
+        names = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                 if name.endswith(QUERY_SUFFIXES)]
+    else:
+        names = [path]
+    for name in names:
+        stem = os.path.splitext(os.path.basename(name))[0]
+        with open(name, 'r') as file:
+            queries = list(read_queries(file))
+        for (index, sparql) in enumerate(queries):
+            if len(queries) > 1:
+                yield ('%s-%d' % (stem, index + 1), sparql)
+            else:
+                yield (stem, sparql)
 
-    graph = rdftools.read_all(cmd.input, cmd.read)
 
+def execute(cmd, graph, sparql):
+    global EXECUTOR
+    if cmd.server is not None:
+        from rdftools.client import remote_query
+        return remote_query(cmd.server, sparql, cmd.timeout)
+    elif cmd.timeout is not None:
+        from rdftools.execution import QueryExecutor
+        if EXECUTOR is None:
+            EXECUTOR = QueryExecutor()
+        return EXECUTOR.run(graph, sparql, base=cmd.base, limit=cmd.limit,
+                            timeout=cmd.timeout)
+    from rdftools.sparql import query
+    return query(graph, sparql, base=cmd.base)
+
+
+def run_query(LOG, cmd, graph, sparql, stream=None):
+    from rdftools.client import ServerError
+    from rdftools.execution import QueryTimeout
     LOG.info(i18n.t('scripts.query_started'))
-    LOG.debug(cmd.query)
+    LOG.debug(sparql)
+    if stream is None:
+        stream = sys.stdout if cmd.output is None else cmd.output
+    from rdftools import metrics
     start = timer()
-    results = graph.query(cmd.query)
-    end = timer()
-    LOG.debug(i18n.t('scripts.query_rows', len=len(results)))
-    if len(results) > 0:
-        columns = results.bindings[0].keys()
+    # Rows are read as the query produces them, so it may time out while
+    # they are written.
+    try:
+        with metrics.phase('query'):
+            results = execute(cmd, graph, sparql)
+        return write_query(LOG, cmd, results, stream, start)
+    except (QueryTimeout, ServerError) as ex:
+        LOG.warning(str(ex))
+        stream.write(str(ex) + rdftools.NEW_LINE)
+        return 0
+
+
+def write_query(LOG, cmd, results, stream, start):
+    from rdftools import metrics
+    from rdftools.results import GRAPH_QUERIES, write_results
+    if cmd.results_format is not None:
+        try:
+            count = write_results(results, cmd.results_format, stream,
+                                  limit=cmd.limit)
+        except ValueError as ex:
+            LOG.error(str(ex))
+            return 0
+        stream.flush()
+        LOG.debug(i18n.t('scripts.query_rows', len=count))
+        return count
+    if results.type == 'ASK':
+        stream.write(i18n.t('scripts.query_ask', result=bool(results)) +
+                     rdftools.NEW_LINE)
+        return 1
+    elif results.type in GRAPH_QUERIES:
+        with metrics.phase('render'):
+            stream.write(results.graph.serialize(format='turtle'))
+        return len(results.graph)
+    rows = rdftools.result_rows(results)
+    first = next(rows, None)
+    if first is not None:
+        columns = results.vars
         LOG.debug(i18n.t('scripts.query_columns',
                   names=', '.join([str(c) for c in columns])))
-        rdftools.report(columns, results,  end - start)
+        count = rdftools.report(columns, chain([first], rows),
+                                limit=cmd.limit, page_size=cmd.page_size,
+                                started=start, stream=stream)
+        LOG.debug(i18n.t('scripts.query_rows', len=count))
+        return count
+    else:
+        stream.write(i18n.t('scripts.query_no_results') + rdftools.NEW_LINE)
+        return 0
+
+
+def run_batch_query(task):
+    (LOG, cmd, graph) = BATCH
+    (name, sparql) = task
+    start = timer()
+    if cmd.output_dir is None:
+        stream = StringIO()
+        count = run_query(LOG, cmd, graph, sparql, stream)
+        output = stream.getvalue()
+    else:
+        file_name = os.path.join(cmd.output_dir, '%s.%s' % (
+            name, cmd.results_format or REPORT_SUFFIX))
+        with open(file_name, 'w', encoding='utf-8') as stream:
+            count = run_query(LOG, cmd, graph, sparql, stream)
+        output = None
+    end = timer()
+    LOG.info(i18n.t('scripts.query_timed', name=name, len=count,
+                    time=end - start))
+    return (name, count, end - start, output)
+
+
+def collect_batch(cmd, results):
+    stream = sys.stdout if cmd.output is None else cmd.output
+    summary = []
+    for (name, count, time, output) in results:
+        if output is not None:
+            stream.write(output)
+        summary.append({'query': name, 'rows': count, 'seconds': time})
+    return summary
+
+
+def run_batch(LOG, cmd, graph, queries):
+    global BATCH
+    BATCH = (LOG, cmd, graph)
+    if cmd.output_dir is not None:
+        os.makedirs(cmd.output_dir, exist_ok=True)
+    jobs = cmd.batch_jobs if cmd.batch_jobs > 0 else None
+    if cmd.batch_jobs == 1:
+        summary = collect_batch(cmd, map(run_batch_query, queries))
+    elif cmd.batch_processes:
+        # Forked workers share the loaded graph, it is never pickled.
+        from multiprocessing import get_context
+        with get_context('fork').Pool(processes=jobs) as pool:
+            summary = collect_batch(cmd, pool.imap(run_batch_query, queries))
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            summary = collect_batch(cmd, pool.map(run_batch_query, queries))
+    # The timings of each query, apart from any results written to stdout.
+    results_stdout = cmd.output_dir is None and cmd.output is None
+    rdftools.report(SUMMARY_COLUMNS, summary,
+                    stream=sys.stderr if results_stdout else sys.stdout)
+    return summary
+
+
+@rdftools.reported
+def main(argv=None, prog=None):
+    (LOG, cmd) = rdftools.startup('scripts.query_command', add_args,
+                                  argv=argv, prog=prog)
+
+    if cmd.server is not None:
+        graph = None
+    elif cmd.store is not None:
+        from rdftools.store import load_mapped
+        graph = load_mapped(cmd.store, cmd.input, cmd.read, cmd.base,
+                            cmd.jobs)
+    else:
+        graph = rdftools.read_all(cmd.input, cmd.read, jobs=cmd.jobs)
+
+    if cmd.query_file is not None:
+        run_batch(LOG, cmd, graph, list(load_queries(cmd.query_file)))
     else:
-        print(i18n.t('scripts.query_no_results'))
+        run_query(LOG, cmd, graph, cmd.query)
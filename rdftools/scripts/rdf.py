@@ -1,29 +1,39 @@
 import i18n
-from subprocess import call
+import importlib
 
 import rdftools
 
-COMMANDS = ['validate', 'convert', 'select', 'shell', 'query']
+# Each command's module, imported only when that command is run.
+COMMANDS = {
+    'validate': 'rdftools.scripts.validate',
+    'convert': 'rdftools.scripts.convert',
+    'diff': 'rdftools.scripts.diff',
+    'select': 'rdftools.scripts.select',
+    'shell': 'rdftools.scripts.shell',
+    'query': 'rdftools.scripts.query',
+    'serve': 'rdftools.scripts.serve'
+}
 
 
-def commands():
+def commands(argv=None):
     import argparse
     parser = argparse.ArgumentParser(description=i18n.t('scripts.rdf_command'))
     parser.add_argument('-v', '--verbose', default=0, action='count')
     parser.add_argument('command', choices=COMMANDS)
     parser.add_argument('subargs', nargs=argparse.REMAINDER)
-    return (parser.prog, parser.parse_args())
+    return (parser.prog, parser.parse_args(argv))
 
 
-def main():
+def main(argv=None):
     rdftools.configure_translation()
-    (process, cmd) = commands()
+    (process, cmd) = commands(argv)
     LOG = rdftools.configure_logging(process, cmd.verbose)
     LOG.debug(cmd)
 
     LOG.info(i18n.t('scripts.rdf_call', name=cmd.command, params=cmd.subargs))
-    process = ['rdf-' + cmd.command]
+    subargs = cmd.subargs
     if cmd.verbose > 0:
-        process.append('-' + 'v' * cmd.verbose)
+        subargs = ['-' + 'v' * cmd.verbose] + subargs
 
-    call(process + cmd.subargs)
+    module = importlib.import_module(COMMANDS[cmd.command])
+    return module.main(argv=subargs, prog='rdf-' + cmd.command)
@@ -1,5 +1,4 @@
 import i18n
-from rdflib.namespace import RDF
 import rdftools
 
 
@@ -13,21 +12,83 @@ def add_args(parser):
                        const='objects', action='store_const')
     group.add_argument('-t', '--types', dest='select',
                        const='types', action='store_const')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--count', action='store_true')
+    output.add_argument('--approximate', action='store_true')
+    parser.add_argument('-m', '--in-memory', action='store_true')
+    parser.add_argument('--server', metavar='URL', action='store')
+    parser.add_argument('--store', metavar='DIR', action='store')
     return parser
 
 
-def selector(LOG, graph, primary, **kwargs):
+def print_terms(terms):
+    from rdftools import metrics
+    from rdftools.terms import format_term
+    with metrics.phase('render'):
+        for (term, count) in terms:
+            print(format_term(term, count))
+
+
+def selector(LOG, graph, primary, count=False, approximate=False):
+    from rdftools.terms import graph_terms
     LOG.info(i18n.t('scripts.select_%s' % primary))
-    for v in set(getattr(graph, primary)(**kwargs)):
-        print(v)
+    if approximate:
+        # The store's indexes give an exact count as cheaply.
+        print(sum(1 for _ in graph_terms(graph, primary)))
+    else:
+        print_terms(graph_terms(graph, primary, count))
+
+
+def stream_selector(LOG, cmd):
+    from rdftools import stream
+    from rdftools.sort import ExternalSort
+    from rdftools.terms import HyperLogLog, TermSink, sorted_terms, \
+        term_line
+    LOG.info(i18n.t('scripts.select_%s' % cmd.select))
+    LOG.info(i18n.t('scripts.select_streaming'))
+    if cmd.approximate:
+        estimator = HyperLogLog()
+
+        def estimate(term):
+            # By N3 form, as terms with the same text may differ.
+            estimator.add(term.n3())
+        stream.stream_inputs(cmd.input, cmd.read,
+                             TermSink(cmd.select, estimate))
+        print(len(estimator))
+    else:
+        # Terms are sorted externally, so memory does not grow with the
+        # number of distinct terms; equal ones are then adjacent.
+        with ExternalSort(unique=not cmd.count) as lines:
+
+            def emit(term):
+                lines.write(term_line(term))
+            stream.stream_inputs(cmd.input, cmd.read,
+                                 TermSink(cmd.select, emit))
+            print_terms(sorted_terms(lines, cmd.count))
 
 
-def main():
-    (LOG, cmd) = rdftools.startup('scripts.select_command', add_args)
+@rdftools.reported
+def main(argv=None, prog=None):
+    (LOG, cmd) = rdftools.startup('scripts.select_command', add_args,
+                                  argv=argv, prog=prog)
 
-    graph = rdftools.read_all(cmd.input, cmd.read)
+    if cmd.select is None:
+        return
+    if cmd.server is not None:
+        from rdftools.client import remote_select
+        print(remote_select(cmd.server, cmd.select, cmd.count,
+                            cmd.approximate), end='')
+        return
+    if cmd.store is not None:
+        from rdftools.store import load_mapped
+        graph = load_mapped(cmd.store, cmd.input, cmd.read, cmd.base,
+                            cmd.jobs)
+        selector(LOG, graph, cmd.select, cmd.count, cmd.approximate)
+        return
+    from rdftools import stream
+    if not cmd.in_memory and stream.can_stream_inputs(cmd.input, cmd.read):
+        stream_selector(LOG, cmd)
+        return
 
-    if cmd.select in ['subjects', 'predicates', 'objects']:
-        selector(LOG, graph, cmd.select)
-    elif cmd.select == 'types':
-        selector(LOG, graph, 'objects', predicate=RDF.type)
+    graph = rdftools.read_all(cmd.input, cmd.read, jobs=cmd.jobs)
+    selector(LOG, graph, cmd.select, cmd.count, cmd.approximate)
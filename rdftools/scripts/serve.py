@@ -0,0 +1,32 @@
+import i18n
+
+import rdftools
+
+
+def add_args(parser):
+    parser.add_argument('--host', action='store', default='localhost')
+    parser.add_argument('--port', metavar='PORT', type=int, default=8000)
+    parser.add_argument('--socket', metavar='PATH', action='store')
+    parser.add_argument('--timeout', metavar='SECONDS', type=float)
+    parser.add_argument('--workers', metavar='N', type=int)
+    return parser
+
+
+@rdftools.reported
+def main(argv=None, prog=None):
+    (LOG, cmd) = rdftools.startup('scripts.serve_command', add_args,
+                                  argv=argv, prog=prog)
+    from rdftools.server import make_server
+
+    graph = rdftools.read_all(cmd.input, cmd.read, base=cmd.base,
+                              jobs=cmd.jobs)
+    server = make_server(graph, cmd.host, cmd.port, cmd.socket,
+                         cmd.timeout, cmd.workers)
+    print(i18n.t('scripts.serve_listening', url=server.url, len=len(graph)))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        LOG.info(i18n.t('scripts.serve_stopped'))
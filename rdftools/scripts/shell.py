@@ -1,16 +1,28 @@
 import atexit
 from collections import namedtuple
+import hashlib
 import i18n
+from io import StringIO
+from itertools import chain
 import rdflib
+from rdflib.exceptions import ParserError
+from rdflib.store import NO_STORE
+from rdflib.util import from_n3
 import os
 import os.path
-import readline
+import pathlib
 import subprocess
 import sys
-from termcolor import colored, cprint
 from timeit import default_timer as timer
 
 import rdftools
+from rdftools import metrics, progress
+from rdftools.execution import QueryExecutor, QueryTimeout
+from rdftools.fetch import Download, HTTPCache, is_url
+from rdftools.sparql import prepare_query
+from rdftools.store import MAPPED_STORE, STORE_DEFAULT
+from rdftools.stream import QUAD_FORMATS
+from rdftools.terms import graph_terms
 
 SPACE = ' '
 BLANK_LINE = ''
@@ -18,17 +30,66 @@ QUERY_FORMS = ['SELECT', 'ASK', 'DESCRIBE', 'CONSTRUCT', 'UPDATE']
 
 LOG = None
 COMMANDS = {}
+EXECUTOR = None
+HTTP_CACHE = None
 
 
 SimpleFile = namedtuple('SimpleFile', ['name'])
 
+STORE_GRAPH = rdflib.URIRef('urn:x-rdftools:shell')
+
+LINE_FORMATS = ['nt', 'nt11', 'ntriples']
+
+
+def new_graph():
+    # Each parsed file is kept in a named graph of its own, see reload;
+    # queries and the other commands see the union of them all.
+    return rdflib.Dataset(default_union=True)
+
 
 class ShellContext(object):
 
     def __init__(self):
         self.prompt = '>>> '
         self.base = None
-        self.graph = rdflib.Graph()
+        self.graph = new_graph()
+        self.sources = {}
+        self.store = None
+        self.store_path = None
+        self.prepared = {}
+        self.timeout = None
+
+
+class Source(object):
+    """ A file parsed into its own graph, as reload needs it: for N-Triples
+        the statement read from each line, by a digest of the line, so a
+        changed file only has the lines that differ parsed. Blank node
+        labels are kept, prefixed for the file, so each is the same node
+        however often it is read. """
+
+    def __init__(self, name, format, version):
+        self.format = format
+        self.version = version
+        self.prefix = 'f%s' % hashlib.blake2b(
+            name.encode('utf-8'), digest_size=6).hexdigest()
+        self.lines = None
+
+
+class LineSink(object):
+    """ Passes each statement an N-Triples parser reads to add, keeping it
+        by the digest of the line it was read from. """
+
+    def __init__(self, add, lines):
+        self.add = add
+        self.lines = lines
+        self.parser = None
+        self.count = 0
+
+    def quad(self, subject, predicate, object, context):
+        triple = (subject, predicate, object)
+        self.lines[line_digest(self.parser.current)] = triple
+        self.add(triple)
+        self.count += 1
 
 
 def info(text):
@@ -39,6 +100,7 @@ def warning(text):
     if LOG is not None:
         LOG.warning(text)
     if rdftools.USE_COLOR:
+        from termcolor import cprint
         cprint(text, 'yellow')
     else:
         print(text)
@@ -48,6 +110,7 @@ def error(text):
     if LOG is not None:
         LOG.error(text)
     if rdftools.USE_COLOR:
+        from termcolor import cprint
         cprint(text, 'red')
     else:
         print(text)
@@ -106,7 +169,8 @@ def base(context, args):
     if len(args2) == 0:
         if context.base is not None:
             if rdftools.USE_COLOR:
-                info('BASE <%s>' % colored(context.base, attrs=['underline']))
+                info('BASE <%s>' %
+                     rdftools.colored(context.base, ['underline']))
             else:
                 info('BASE <%s>' % context.base)
     elif len(args2) >= 1:
@@ -137,8 +201,8 @@ def prefix(context, args):
         for (pre, uri) in context.graph.namespaces():
             if rdftools.USE_COLOR:
                 info('PREFIX %s: <%s>.' %
-                     (colored(pre, attrs=['bold']),
-                      colored(uri, attrs=['underline'])))
+                     (rdftools.colored(pre, ['bold']),
+                      rdftools.colored(uri, ['underline'])))
             else:
                 info('PREFIX %s: <%s>.' % (pre, uri))
     elif len(args2) == 2:
@@ -162,27 +226,206 @@ def get_format(args, place=2):
     return format
 
 
+def source_name(name):
+    """ The URL, or the absolute path, files are known by. """
+    return name if is_url(name) else os.path.abspath(name)
+
+
+def source_graph(context, name):
+    """ The named graph statements from a file go into, or None when the
+        graph is a connected store that cannot hold one per file. """
+    if not isinstance(context.graph, rdflib.Dataset):
+        return None
+    name = source_name(name)
+    if not is_url(name):
+        name = pathlib.Path(name).as_uri()
+    return context.graph.graph(rdflib.URIRef(name))
+
+
+def union_graph(context):
+    """ The graph serialize and show write: the statements from all files
+        once each, as if parsed into one graph, but in a Dataset with their
+        named graphs if a file had any. """
+    if not isinstance(context.graph, rdflib.Dataset):
+        return context.graph
+    sources = set(source_graph(context, name).identifier
+                  for name in context.sources)
+    sources.add(rdflib.graph.DATASET_DEFAULT_GRAPH_ID)
+    graph = rdflib.Graph()
+    named = []
+    for (s, p, o, name) in context.graph.quads((None, None, None, None)):
+        name = getattr(name, 'identifier', name)
+        if name in sources:
+            graph.add((s, p, o))
+        else:
+            named.append((s, p, o, name))
+    if named:
+        union = rdflib.Dataset()
+        union.default_graph += graph
+        union.addN((s, p, o, union.graph(name)) for (s, p, o, name) in named)
+        graph = union
+    for (prefix, namespace) in context.graph.namespaces():
+        graph.bind(prefix, namespace)
+    return graph
+
+
+def source_file(name):
+    """ The file to read, a local copy of it for a URL, which is only
+        downloaded again if it has changed. """
+    global HTTP_CACHE
+    if not is_url(name):
+        return SimpleFile(name)
+    if HTTP_CACHE is None:
+        HTTP_CACHE = HTTPCache()
+    return Download(HTTP_CACHE.fetch(name), name)
+
+
+def file_version(name):
+    stat = os.stat(name)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
 @command
 def parse(context, args):
-    """ parse filename [format=n3]
-        Read a file into the current context graph."""
+    """ parse filename|URL [format=n3]
+        Read a file, or a download, into the current context graph."""
     args2 = args.strip().split()
     format = get_format(args2)
     if len(args2) >= 1:
         try:
-            context.graph = rdftools.read_into(
-                SimpleFile(args2[0]), format,
-                context.graph, context.base)
+            input = source_file(args2[0])
+            graph = source_graph(context, args2[0])
+            if graph is None:
+                context.graph = rdftools.read_into(
+                    input, format, context.graph, context.base)
+            else:
+                format = rdftools.guess_format(input, format)
+                source = Source(source_name(args2[0]), format,
+                                file_version(input.name))
+                if format in LINE_FORMATS:
+                    read_lines(source, input, graph)
+                else:
+                    rdftools.read_into(input, format, graph, context.base)
+                context.sources[source_name(args2[0])] = source
             info(i18n.t('shell.graph_updated', len=len(context.graph)))
         except SyntaxError as ex:
             error(i18n.t('shell.file_read_err', err=ex))
-        except IOError as ex:
+        except (IOError, ParserError, TypeError) as ex:
+            # A read-only store raises TypeError, or ParserError for N3.
             error(i18n.t('shell.file_read_err', err=ex))
     else:
         warning(i18n.t('shell.invalid_params'))
     return context
 
 
+def line_digest(line):
+    return hashlib.blake2b(line.strip().encode('utf-8'),
+                           digest_size=16).digest()
+
+
+def read_lines(source, input, graph):
+    """ Read an N-Triples file into its graph, streamed a line at a time,
+        keeping the statement from each line. """
+    from rdftools.stream import QuadParser, read_lines
+    sink = LineSink(graph.add, {})
+    sink.parser = QuadParser(sink, source.prefix)
+    start = timer()
+    with metrics.phase('parse'):
+        read_lines(sink.parser, input, source.format, lambda: sink.count)
+    metrics.input(input.name, source.format, sink.count, timer() - start)
+    rdftools.__LOG__.info(i18n.t('rdftools.read_complete',
+                                 len=len(graph), time=timer() - start))
+    source.lines = sink.lines
+
+
+def apply_lines(graph, source, input):
+    """ Make graph hold the statements of the lines now in an N-Triples
+        file, parsing only those not in it when it was last read; returns
+        the numbers added and removed. """
+    from rdftools.stream import QuadParser
+    (lines, new) = ({}, [])
+    start = timer()
+    with progress.open_input(input.name, lambda: len(lines) + len(new)) \
+            as stream:
+        for line in stream:
+            line = line.decode('utf-8').strip()
+            if not line or line.startswith('#'):
+                continue
+            digest = line_digest(line)
+            if digest in source.lines:
+                lines[digest] = source.lines[digest]
+            else:
+                new.append(line + rdftools.NEW_LINE)
+    removed = [triple for (digest, triple) in source.lines.items()
+               if digest not in lines]
+    added = []
+    sink = LineSink(added.append, lines)
+    sink.parser = QuadParser(sink, source.prefix)
+    with metrics.phase('parse'):
+        sink.parser.parse(StringIO(''.join(new)))
+    metrics.input(input.name, source.format, len(lines), timer() - start)
+    for triple in removed:
+        graph.remove(triple)
+    graph.addN((s, p, o, graph) for (s, p, o) in added)
+    source.lines = lines
+    return (len(added), len(removed))
+
+
+def apply_changes(graph, fresh):
+    """ Make graph hold the same statements as fresh, touching only those
+        that differ; returns the numbers added and removed. Blank nodes are
+        new on every parse, so statements with them are always replaced. """
+    removed = [triple for triple in graph if triple not in fresh]
+    added = [triple for triple in fresh if triple not in graph]
+    for triple in removed:
+        graph.remove(triple)
+    graph.addN((s, p, o, graph) for (s, p, o) in added)
+    for (prefix, namespace) in fresh.namespaces():
+        graph.bind(prefix, namespace, override=False)
+    return (len(added), len(removed))
+
+
+@command
+def reload(context, args):
+    """ reload [filename ...]
+        Re-read parsed files that have changed, applying only the changes;
+        for N-Triples only the lines changed are parsed."""
+    names = args.strip().split() or sorted(context.sources)
+    for name in names:
+        path = source_name(name)
+        if path not in context.sources:
+            warning(i18n.t('shell.reload_not_parsed', name=name))
+            continue
+        source = context.sources[path]
+        if source.format in QUAD_FORMATS:
+            # Its statements are in graphs other files may add to as well.
+            warning(i18n.t('shell.reload_quads', name=name))
+            continue
+        graph = source_graph(context, path)
+        try:
+            input = source_file(path)
+            current = file_version(input.name)
+            if current == source.version:
+                info(i18n.t('shell.reload_unchanged', name=name))
+                continue
+            if source.lines is not None:
+                (added, removed) = apply_lines(graph, source, input)
+            else:
+                fresh = rdftools.read_into(input, source.format,
+                                           rdflib.Graph(), context.base)
+                (added, removed) = apply_changes(graph, fresh)
+        except SyntaxError as ex:
+            error(i18n.t('shell.file_read_err', err=ex))
+            continue
+        except (IOError, ParserError) as ex:
+            error(i18n.t('shell.file_read_err', err=ex))
+            continue
+        source.version = current
+        info(i18n.t('shell.graph_reloaded', name=name, added=added,
+                    removed=removed, len=len(context.graph)))
+    return context
+
+
 @command
 def serialize(context, args):
     """ serialize filename [format=n3]
@@ -191,7 +434,8 @@ def serialize(context, args):
     format = get_format(args2)
     if len(args2) >= 1:
         try:
-            rdftools.write(context.graph, SimpleFile(args2[0]), format)
+            rdftools.write(union_graph(context), SimpleFile(args2[0]),
+                           format)
         except IOError as ex:
             exception(i18n.t('shell.file_write_err', err=ex))
     else:
@@ -205,38 +449,139 @@ def show(context, args):
         Display current context graph in format."""
     args2 = args.strip().split()
     format = get_format(args2, place=1)
-    rdftools.write(context.graph, None, format)
+    rdftools.write(union_graph(context), None, format)
+    return context
+
+
+def parse_bindings(args):
+    bindings = {}
+    for binding in args:
+        (name, _, value) = binding.partition('=')
+        if name.startswith('?') and len(value) > 0:
+            bindings[rdflib.Variable(name[1:])] = from_n3(value)
+        else:
+            warning(i18n.t('shell.invalid_binding', binding=binding))
+    return bindings
+
+
+@command
+def prepare(context, args):
+    """ prepare name sparql
+        Parse a SPARQL query once, run it with: query name [?var=value]."""
+    args2 = args.strip().split(None, 1)
+    if len(args2) == 2:
+        try:
+            context.prepared[args2[0]] = prepare_query(
+                args2[1], context.graph.namespaces(), context.base)
+            info(i18n.t('shell.query_prepared', name=args2[0]))
+        except Exception as ex:
+            error(i18n.t('shell.query_err', err=ex))
+    else:
+        warning(i18n.t('shell.invalid_params'))
     return context
 
 
 @command
 def query(context, args):
-    """ query sparql
-        Run SPARQL query."""
+    """ query sparql | name [?var=value ...]
+        Run SPARQL query, or a prepared query with bindings."""
     sparql = args.strip()
-    if len(sparql) > 6:
-        start = timer()
-        results = context.graph.query(sparql)
-        end = timer()
-        if sparql[:6].upper() == 'SELECT':
-            if len(results) > 0:
-                columns = results.bindings[0].keys()
-                rdftools.report(columns, results,  end - start)
+    args2 = sparql.split()
+    bindings = None
+    if len(args2) > 0 and args2[0] in context.prepared:
+        bindings = parse_bindings(args2[1:])
+        sparql = context.prepared[args2[0]]
+    elif len(sparql) <= 6:
+        warning(i18n.t('shell.query_form_err', forms=', '.join(QUERY_FORMS)))
+        return context
+    start = timer()
+    # Rows are read as the query produces them, so it may time out, or be
+    # interrupted, while they are reported.
+    try:
+        with metrics.phase('query'):
+            results = executor().run(context.graph, sparql, bindings,
+                                     context.base, timeout=context.timeout)
+        if results.type == 'SELECT':
+            rows = rdftools.result_rows(results)
+            first = next(rows, None)
+            if first is not None:
+                rdftools.report(results.vars, chain([first], rows),
+                                started=start)
             else:
                 info(i18n.t('shell.query_no_results'))
-        elif sparql[:3].upper() == 'ASK':
-            info(i18n.t('shell.ask_results'), results=bool(results))
+        elif results.type == 'ASK':
+            info(i18n.t('shell.ask_results', result=bool(results)))
         # construct and describe return statements
         # update returns?
         else:
             info(results)
+    except QueryTimeout as ex:
+        warning(str(ex))
+    except KeyboardInterrupt:
+        warning(i18n.t('shell.query_cancelled'))
+    return context
+
+
+def executor():
+    global EXECUTOR
+    if EXECUTOR is None:
+        EXECUTOR = QueryExecutor()
+    return EXECUTOR
+
+
+@command
+def timeout(context, args):
+    """ timeout [seconds|off]
+        Set, or show, the time after which a query is cancelled."""
+    args2 = args.strip().split()
+    if len(args2) == 0:
+        if context.timeout is None:
+            info(i18n.t('shell.timeout_off'))
+        else:
+            info(i18n.t('shell.timeout', time=context.timeout))
+    elif args2[0] == 'off':
+        context.timeout = None
+    else:
+        try:
+            context.timeout = float(args2[0]) or None
+        except ValueError:
+            warning(i18n.t('shell.invalid_timeout', value=args2[0]))
+    return context
+
+
+@command('progress')
+def show_progress(context, args):
+    """ progress [on|off]
+        Set, or show, whether parse and reload report their progress."""
+    args2 = args.strip().split()
+    if len(args2) == 0:
+        info(i18n.t('shell.progress_on' if progress.ENABLED
+                    else 'shell.progress_off'))
+    elif args2[0] in ('on', 'off'):
+        progress.ENABLED = args2[0] == 'on'
     else:
-        warning(i18n.t('shell.query_form_err'), forms=', '.join(QUERY_FORMS))
+        warning(i18n.t('shell.invalid_params'))
+    return context
+
+
+@command
+def stats(context, args):
+    """ stats [text|json|reset]
+        Show the time spent reading, querying and writing, and memory used."""
+    args2 = args.strip().split()
+    format = args2[0] if len(args2) > 0 else 'text'
+    if format == 'reset':
+        metrics.reset(metrics.recorder().tool)
+        info(i18n.t('shell.stats_reset'))
+    elif format in metrics.STATS_FORMATS:
+        info(metrics.format_stats(metrics.stats(), format).rstrip())
+    else:
+        warning(i18n.t('shell.invalid_params'))
     return context
 
 
 def graph_select(context, component):
-    for s in set(getattr(context.graph, component)()):
+    for (s, _) in graph_terms(context.graph, component):
         info(s)
     return context
 
@@ -256,22 +601,49 @@ def predicates(context, ignored):
 
 
 @command
-def connect(context, uri):
-    """ connect URI
-        Connect to a store (TBD)."""
-    warning(i18n.t('shell.to_do'))
+def connect(context, args):
+    """ connect path [store=File]
+        Connect to a persistent store, replacing the current graph."""
+    args2 = args.strip().split()
+    if len(args2) >= 1:
+        store = args2[1] if len(args2) >= 2 else STORE_DEFAULT
+        if is_open(context):
+            context = close(context, BLANK_LINE)
+        try:
+            graph = rdflib.Graph(store=store, identifier=STORE_GRAPH)
+            if graph.open(args2[0], create=True) == NO_STORE:
+                raise IOError(args2[0])
+        except Exception as ex:
+            error(i18n.t('shell.store_open_err', err=ex))
+        else:
+            context.graph = graph
+            context.sources = {}
+            context.store = store
+            context.store_path = args2[0]
+            info(i18n.t('shell.store_connected', store=store,
+                        path=args2[0], len=len(graph)))
+    else:
+        warning(i18n.t('shell.invalid_params'))
     return context
 
 
 def is_open(context):
-    return False
+    return context is not None and context.store is not None
 
 
 @command
 def close(context, ignored):
     """ close
         Close the current store connection, if one exists."""
-    warning(i18n.t('shell.to_do'))
+    if is_open(context):
+        context.graph.close(commit_pending_transaction=True)
+        info(i18n.t('shell.store_closed', path=context.store_path))
+        context.graph = new_graph()
+        context.sources = {}
+        context.store = None
+        context.store_path = None
+    else:
+        warning(i18n.t('shell.store_not_open'))
     return context
 
 
@@ -290,6 +662,9 @@ def context(context, ignored):
     info('|context aware? %s' % context.graph.context_aware)
     info('|formula aware? %s' % context.graph.formula_aware)
     info('|default union? %s' % context.graph.default_union)
+    if is_open(context):
+        info('Store     type %s' % context.store)
+        info('|         path %s' % os.path.abspath(context.store_path))
     info(BLANK_LINE)
     return context
 
@@ -298,6 +673,8 @@ def context(context, ignored):
 def clear(context, args):
     """ clear [base | prefix pre:]
         Clear the current context."""
+    if is_open(context):
+        close(context, BLANK_LINE)
     return ShellContext()
 
 
@@ -352,6 +729,7 @@ def prompt(context, args):
 
 
 def configure_readline():
+    import readline
     histfile = os.path.join(os.path.expanduser("~"), ".rdfsh_hist")
     if not os.path.exists(histfile):
         with open(histfile, 'w'):
@@ -405,13 +783,22 @@ def run_loop(context):
             break
 
 
-def main():
+def add_args(parser):
+    parser.add_argument('--store', metavar='DIR', action='store')
+    return parser
+
+
+@rdftools.reported
+def main(argv=None, prog=None):
     global LOG
     (LOG, cmd) = rdftools.startup('shell.command',
-                                  add_args=None, read_files=False)
+                                  add_args=add_args, read_files=False,
+                                  argv=argv, prog=prog)
     info(i18n.t('shell.welcome', version=rdftools.__VERSION__))
     configure_readline()
     context = clear(None, None)
     context.base = cmd.base
+    if cmd.store is not None:
+        context = connect(context, '%s %s' % (cmd.store, MAPPED_STORE))
     parse_cmdfile(context, os.path.join(os.path.expanduser("~"), ".rdfshrc"))
     run_loop(context)
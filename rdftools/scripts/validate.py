@@ -1,17 +1,87 @@
+import contextlib
 import i18n
+import os.path
 import sys
 
 import rdftools
 
 
-def main():
-    (LOG, cmd) = rdftools.startup('RDF file validator.', add_args=None)
+def add_args(parser):
+    parser.add_argument('-d', '--directory', metavar='DIR',
+                        action='append', default=[])
+    parser.add_argument('--fail-fast', action='store_true')
+    # Validation keeps no statements, so use every core by default.
+    parser.set_defaults(jobs=0)
+    return parser
 
-    for input in cmd.input:
-        LOG.info(i18n.t('scripts.validate_started', name=input))
-        try:
-            rdftools.read(input, cmd.read)
-            LOG.info(i18n.t('scripts.validate_succeeded'))
-        except:  # noqa: E722
-            LOG.warning(i18n.t('scripts.validate_failed', exc_info=True))
-            sys.exit(1)
+
+def report(validation):
+    if validation.valid:
+        print(i18n.t('scripts.validate_passed', name=validation.name,
+                     len=validation.count, time=validation.time))
+    elif validation.line is not None:
+        print(i18n.t('scripts.validate_failed_at', name=validation.name,
+                     line=validation.line, column=validation.column,
+                     message=validation.message))
+    else:
+        print(i18n.t('scripts.validate_failed_in', name=validation.name,
+                     message=validation.message))
+
+
+def file_size(name):
+    try:
+        return os.path.getsize(name)
+    except OSError:
+        return 0
+
+
+def tally(tasks, jobs):
+    """ Progress through all the files, when they are checked in worker
+        processes; each file reports its own progress otherwise. """
+    from rdftools import progress
+    sizes = dict((task[0], file_size(task[0])) for task in tasks)
+    done = {'bytes': 0, 'statements': 0}
+
+    def add(validation):
+        done['bytes'] += sizes[validation.name]
+        done['statements'] += validation.count or 0
+    if jobs == 1 or len(tasks) < 2:
+        return (contextlib.nullcontext(), add)
+    return (progress.tally(i18n.t('scripts.validate_files', len=len(tasks)),
+                           sum(sizes.values()), lambda: done['bytes'],
+                           lambda: done['statements']), add)
+
+
+@rdftools.reported
+def main(argv=None, prog=None):
+    (LOG, cmd) = rdftools.startup('scripts.validate_command', add_args,
+                                  argv=argv, prog=prog)
+    from rdftools import metrics
+    from rdftools.validation import find_files, validate_all
+
+    names = [input.name for input in cmd.input or []]
+    for directory in cmd.directory:
+        names.extend(find_files(directory))
+    tasks = [(name, cmd.read, cmd.base) for name in names]
+
+    valid = total = 0
+    (reporter, add) = tally(tasks, cmd.jobs)
+    with reporter:
+        for validation in validate_all(tasks, cmd.jobs):
+            LOG.info(i18n.t('scripts.validate_started',
+                            name=validation.name))
+            report(validation)
+            add(validation)
+            total += 1
+            if validation.valid:
+                LOG.info(i18n.t('scripts.validate_succeeded'))
+                metrics.input(validation.name, validation.format,
+                              validation.count, validation.time)
+                valid += 1
+            else:
+                LOG.warning(i18n.t('scripts.validate_failed'))
+                if cmd.fail_fast:
+                    break
+    print(i18n.t('scripts.validate_summary', valid=valid, total=total))
+    if valid < total:
+        sys.exit(1)
@@ -0,0 +1,243 @@
+import i18n
+import os
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from urllib.parse import parse_qs, urlsplit
+
+import rdftools
+from rdftools import metrics
+from rdftools.results import GRAPH_QUERIES, write_results
+from rdftools.execution import QueryExecutor, QueryTimeout
+from rdftools.sparql import prepare_query
+from rdftools.terms import PATTERNS, format_term, graph_terms
+
+RESULT_TYPES = {
+    'json': 'application/sparql-results+json',
+    'xml': 'application/sparql-results+xml',
+    'csv': 'text/csv',
+    'tsv': 'text/tab-separated-values'
+}
+RESULT_DEFAULT = 'json'
+
+GRAPH_TYPES = {
+    'turtle': 'text/turtle',
+    'nt': 'application/n-triples',
+    'nquads': 'application/n-quads',
+    'trig': 'application/trig',
+    'n3': 'text/n3',
+    'json-ld': 'application/ld+json',
+    'xml': 'application/rdf+xml',
+    'snapshot': 'application/x-rdftools-snapshot'
+}
+GRAPH_DEFAULT = 'turtle'
+
+QUERY_TYPE = 'application/sparql-query'
+FORM_TYPE = 'application/x-www-form-urlencoded'
+TEXT_TYPE = 'text/plain'
+ANY_TYPE = '*/*'
+
+TRUE = 'true'
+
+
+class RequestError(Exception):
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def param(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def choose(params, name, choices, default):
+    value = param(params, name, default)
+    if value not in choices:
+        raise RequestError(i18n.t('rdftools.serve_bad_param',
+                                  name=name, value=value))
+    return value
+
+
+def negotiate(accept, types, default):
+    """ Return the first format whose media type the Accept header lists,
+        or the default if it lists none of them. """
+    formats = dict((type, format) for (format, type) in types.items())
+    for media_range in (accept or ANY_TYPE).split(','):
+        type = media_range.split(';')[0].strip()
+        if type in formats:
+            return formats[type]
+    return default
+
+
+def serialize(graph, format):
+    with metrics.phase('serialize'):
+        return graph.serialize(format=rdftools.plugin_format(format),
+                               encoding='utf-8')
+
+
+def query_timeout(server, params):
+    """ The timeout a client asks for, no longer than the server's own. """
+    try:
+        timeout = float(param(params, 'timeout', 0)) or None
+    except ValueError:
+        raise RequestError(i18n.t('rdftools.serve_bad_param',
+                                  name='timeout',
+                                  value=param(params, 'timeout')))
+    if server.query_timeout is None:
+        return timeout
+    return min(timeout or server.query_timeout, server.query_timeout)
+
+
+def sparql_endpoint(server, params, accept):
+    """ The SPARQL protocol query operation; SELECT and ASK results are
+        written in a SPARQL results format, CONSTRUCT and DESCRIBE results
+        in an RDF format. """
+    sparql = param(params, 'query')
+    if sparql is None:
+        raise RequestError(i18n.t('rdftools.serve_no_query'))
+    timeout = query_timeout(server, params)
+    try:
+        prepared = prepare_query(sparql, server.graph.namespaces())
+    except Exception as ex:
+        # A ParseException, or a query rdflib cannot translate, such as
+        # one using an unknown prefix, is the client's error.
+        raise RequestError(' '.join(str(ex).split()))
+    # Rows are read as the query produces them, so it may time out, or
+    # fail, while they are written.
+    try:
+        with metrics.phase('query'):
+            results = server.executor.run(server.graph, prepared,
+                                          timeout=timeout)
+        if results.type in GRAPH_QUERIES:
+            format = choose(params, 'format', GRAPH_TYPES,
+                            negotiate(accept, GRAPH_TYPES, GRAPH_DEFAULT))
+            return (GRAPH_TYPES[format], serialize(results.graph, format))
+        format = choose(params, 'format', RESULT_TYPES,
+                        negotiate(accept, RESULT_TYPES, RESULT_DEFAULT))
+        stream = StringIO()
+        write_results(results, format, stream)
+        return (RESULT_TYPES[format], stream.getvalue().encode('utf-8'))
+    except RequestError:
+        raise
+    except QueryTimeout as ex:
+        raise RequestError(str(ex), 503)
+    except Exception as ex:
+        raise RequestError(' '.join(str(ex).split()), 500)
+
+
+def select_endpoint(server, params, accept):
+    """ The terms rdf-select lists, one per line; 'count' adds the number
+        of statements for each and 'total' returns only the number of
+        distinct terms. """
+    select = choose(params, 'terms', PATTERNS, None)
+    graph = server.graph
+    if param(params, 'total') == TRUE:
+        text = '%d\n' % sum(1 for _ in graph_terms(graph, select))
+    else:
+        count = param(params, 'count') == TRUE
+        text = ''.join([format_term(term, frequency) + rdftools.NEW_LINE
+                        for (term, frequency)
+                        in graph_terms(graph, select, count)])
+    return (TEXT_TYPE, text.encode('utf-8'))
+
+
+def convert_endpoint(server, params, accept):
+    """ The whole graph, in any format rdflib can write. """
+    format = choose(params, 'format', rdftools.FORMATS,
+                    negotiate(accept, GRAPH_TYPES, GRAPH_DEFAULT))
+    return (GRAPH_TYPES.get(format, TEXT_TYPE),
+            serialize(server.graph, format))
+
+
+ENDPOINTS = {
+    '/sparql': sparql_endpoint,
+    '/select': select_endpoint,
+    '/convert': convert_endpoint
+}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self.respond(url.path, parse_qs(url.query))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length).decode('utf-8')
+        type = self.headers.get_content_type()
+        if type == QUERY_TYPE:
+            params['query'] = [body]
+        elif type == FORM_TYPE:
+            params.update(parse_qs(body))
+        self.respond(url.path, params)
+
+    def respond(self, path, params):
+        metrics.count('requests')
+        try:
+            endpoint = ENDPOINTS.get(path)
+            if endpoint is None:
+                raise RequestError(i18n.t('rdftools.serve_not_found',
+                                          path=path), 404)
+            (type, body) = endpoint(self.server, params,
+                                    self.headers.get('Accept'))
+            status = 200
+        except RequestError as ex:
+            (status, type, body) = (ex.status, TEXT_TYPE,
+                                    (str(ex) + '\n').encode('utf-8'))
+        self.send_response(status)
+        if type.startswith('text/'):
+            type += '; charset=utf-8'
+        self.send_header('Content-Type', type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix domain socket clients have no address.
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if rdftools.__LOG__ is not None:
+            rdftools.__LOG__.info('%s %s' % (self.address_string(),
+                                             format % args))
+
+
+class HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown()
+
+
+class UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def make_server(graph, host='localhost', port=8000, socket=None,
+                timeout=None, workers=None):
+    """ Create, but do not start, a server answering requests against the
+        graph, on a Unix domain socket if one is named else on TCP; queries
+        run in a pool of workers, each stopped after timeout seconds. """
+    if socket is not None:
+        server = UnixServer(socket, RequestHandler)
+        server.url = 'unix://%s' % os.path.abspath(socket)
+    else:
+        server = HTTPServer((host, port), RequestHandler)
+        server.url = 'http://%s:%d' % (host, server.server_address[1])
+    server.graph = graph
+    server.executor = QueryExecutor(workers)
+    # Not 'timeout', the socketserver attribute for handle_request.
+    server.query_timeout = timeout
+    return server
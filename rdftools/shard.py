@@ -0,0 +1,206 @@
+import i18n
+import os
+import os.path
+import shutil
+import tempfile
+import zlib
+from timeit import default_timer as timer
+
+import rdftools
+from rdftools import metrics, progress
+from rdftools.compression import open_output, strip_suffix, suffix_codec
+
+# The position in a quad of the term each kind of sharding hashes.
+SHARD_KEYS = {
+    'subject': 0,
+    'predicate': 1,
+    'graph': 3
+}
+SHARD_KEY_DEFAULT = 'subject'
+
+
+def shard_names(name, shards):
+    """ The name of each shard, numbered before the suffixes of name, so
+        'dump.ttl.gz' in 64 shards is 'dump-00.ttl.gz' to 'dump-63.ttl.gz'.
+        """
+    base = strip_suffix(name)
+    (stem, suffix) = os.path.splitext(base)
+    suffix += name[len(base):]
+    width = len(str(shards - 1))
+    return ['%s-%0*d%s' % (stem, width, index, suffix)
+            for index in range(shards)]
+
+
+def spool_format(format):
+    """ The line-oriented format, and suffix, statements are spooled in
+        for an output format; a shard in that format is its spool file. """
+    from rdftools.stream import QUAD_FORMATS
+    return ('nquads', '.nq') if format in QUAD_FORMATS else ('nt', '.nt')
+
+
+def shard_index(term, shards):
+    # Python's own str hash differs between processes, crc32 does not.
+    if term is None:
+        return 0
+    return zlib.crc32(str(term).encode('utf-8')) % shards
+
+
+class ShardSink(object):
+    """ Writes each statement to one of several streams, by the hash of its
+        subject, predicate or graph, so all the statements sharing that
+        term are in the same shard.
+
+        A blank node is only the same node within one file, so statements
+        keyed by one are put off, to the deferred stream, until every input
+        is read; they then go to the shard of the first statement referring
+        to the node, itself perhaps through other blank nodes. The shard,
+        or blank node, each node was first referred to from is kept. """
+
+    def __init__(self, streams, format, key=SHARD_KEY_DEFAULT,
+                 deferred=None):
+        from rdftools.stream import QuadWriter
+        self.writers = [QuadWriter(stream, format) for stream in streams]
+        self.position = SHARD_KEYS[key]
+        self.deferred = None if deferred is None \
+            else QuadWriter(deferred, 'nquads')
+        self.referrers = {}
+        self.namespaces = {}
+        self.count = 0
+
+    def bind(self, prefix, namespace):
+        self.namespaces.setdefault(prefix, str(namespace))
+
+    def quad(self, subject, predicate, object, context):
+        import rdflib
+        term = (subject, predicate, object, context)[self.position]
+        if not isinstance(term, rdflib.BNode):
+            shard = shard_index(term, len(self.writers))
+        elif self.deferred is not None:
+            shard = term
+        else:
+            shard = self.shard(term)
+        if shard is term:
+            self.deferred.quad(subject, predicate, object, context)
+        else:
+            self.writers[shard].quad(subject, predicate, object, context)
+        if isinstance(object, rdflib.BNode) and object != term:
+            self.referrers.setdefault(object, shard)
+        self.count += 1
+
+    def shard(self, node):
+        """ The shard of a blank node's statements, that of the first one
+            referring to it or, if none does, the hash of the node or of the
+            least of a cycle of nodes only referring to each other. """
+        import rdflib
+        path = []
+        shard = node
+        while isinstance(shard, rdflib.BNode):
+            if shard in path:
+                shard = shard_index(min(path[path.index(shard):]),
+                                    len(self.writers))
+            elif shard not in self.referrers:
+                shard = shard_index(shard, len(self.writers))
+            else:
+                path.append(shard)
+                shard = self.referrers[shard]
+        for referred in path:
+            self.referrers[referred] = shard
+        return shard
+
+    def place_deferred(self, name):
+        """ Write the statements put off to their shards, from the file the
+            deferred stream wrote. """
+        from rdftools.stream import QuadParser
+        self.deferred = None
+        with open(name, encoding='utf-8') as file:
+            QuadParser(self).parse(file)
+
+    def counts(self):
+        return [writer.count for writer in self.writers]
+
+
+def write_shard(task):
+    """ Turn one spool file into its shard, in a worker process; returns
+        the shard's name and the seconds it took. """
+    (spool, name, format, base, threads, namespaces) = task
+    start = timer()
+    (spooled, _) = spool_format(format)
+    if format == spooled:
+        if suffix_codec(name) is None:
+            shutil.move(spool, name)
+        else:
+            with open(spool, 'rb') as source, \
+                    open_output(name, threads) as target:
+                shutil.copyfileobj(source, target)
+    else:
+        import rdflib
+        graph = rdflib.Dataset() if spooled == 'nquads' else rdflib.Graph()
+        graph.parse(source=spool, format=spooled)
+        # The spools have none of the inputs' prefixes.
+        for (prefix, namespace) in namespaces:
+            graph.bind(prefix, namespace)
+        with open_output(name, threads) as stream:
+            graph.serialize(destination=stream,
+                            format=rdftools.plugin_format(format),
+                            base=base, encoding='utf-8')
+    # Freeing the space as soon as each shard is written.
+    if os.path.exists(spool):
+        os.remove(spool)
+    return (name, timer() - start)
+
+
+def write_shards(tasks, jobs=1):
+    """ Yield (name, seconds) for each shard written, in worker processes
+        if jobs is not 1, as each is done. """
+    if jobs == 1:
+        for task in tasks:
+            yield write_shard(task)
+    else:
+        from multiprocessing import Pool
+        with Pool(processes=jobs if jobs > 0 else None,
+                  initializer=progress.disable) as pool:
+            for result in pool.imap_unordered(write_shard, tasks):
+                yield result
+
+
+def shard_all(inputs, read, name, format, shards, key=SHARD_KEY_DEFAULT,
+              base=None, jobs=1, directory=None, threads=1):
+    """ Split the statements from all inputs into shards, named after name,
+        by the hash of key; statements are spooled to temporary files in
+        one pass over the inputs, and the shards then written from those.
+        Returns the number of statements in each shard. """
+    from rdftools.stream import read_statements
+    LOG = rdftools.__LOG__
+    (spooled, suffix) = spool_format(format)
+    # Spools are made as any file is, so one moved into place as a shard
+    # has the usual permissions.
+    spool_directory = tempfile.mkdtemp(dir=directory)
+    spools = [os.path.join(spool_directory, 'shard-%d%s' % (index, suffix))
+              for index in range(shards)]
+    deferred = os.path.join(spool_directory, 'deferred.nq')
+    try:
+        streams = []
+        try:
+            for spool in spools:
+                streams.append(open(spool, 'w', encoding='utf-8'))
+            with open(deferred, 'w', encoding='utf-8') as stream:
+                sink = ShardSink(streams, spooled, key, stream)
+                for (index, input) in enumerate(inputs or [None]):
+                    read_statements(input, read, sink, base,
+                                    bnode_prefix='f%d' % index)
+            sink.place_deferred(deferred)
+        finally:
+            for stream in streams:
+                stream.close()
+        counts = dict(zip(shard_names(name, shards), sink.counts()))
+        namespaces = sorted(sink.namespaces.items())
+        tasks = [(spool, shard, format, base, threads, namespaces)
+                 for (spool, shard) in zip(spools, counts)]
+        with metrics.phase('serialize'):
+            for (shard, seconds) in write_shards(tasks, jobs):
+                LOG.info(i18n.t('rdftools.shard_written', name=shard,
+                                len=counts[shard], time=seconds))
+                metrics.output(shard, format, counts[shard], seconds)
+    finally:
+        shutil.rmtree(spool_directory, ignore_errors=True)
+    return list(counts.values())
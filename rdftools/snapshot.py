@@ -0,0 +1,205 @@
+from io import TextIOBase
+from rdflib import Graph, URIRef, plugin
+from rdflib.parser import Parser
+from rdflib.serializer import Serializer
+from rdflib.util import SUFFIX_FORMAT_MAP
+
+from rdftools import SNAPSHOT_FORMAT, SNAPSHOT_SUFFIX
+from rdftools.store import decode_term, encode_term
+
+MAGIC = b'RDFSNAP1'
+
+# The varint for a statement's graph is 0 for the default graph, otherwise
+# the term ID of the graph name plus one.
+DEFAULT_GRAPH = 0
+
+
+def write_varint(buffer, value):
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def write_bytes(buffer, data):
+    write_varint(buffer, len(data))
+    buffer.extend(data)
+
+
+class Reader(object):
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def varint(self):
+        (value, shift) = (0, 0)
+        while True:
+            byte = self.data[self.position]
+            self.position += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def bytes(self):
+        length = self.varint()
+        start = self.position
+        self.position += length
+        return self.data[start:self.position]
+
+    def varints(self):
+        """ All remaining varints, in order. """
+        (value, shift) = (0, 0)
+        for byte in self.data[self.position:]:
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                yield value
+                (value, shift) = (0, 0)
+            else:
+                shift += 7
+
+
+def graph_quads(graph):
+    """ Yield (s, p, o, name) for each statement, the name None for those in
+        the default graph or a graph that is not context-aware. """
+    if getattr(graph, 'context_aware', False):
+        default = graph.default_context.identifier
+        for (s, p, o, context) in graph.quads((None, None, None, None)):
+            name = getattr(context, 'identifier', context)
+            yield (s, p, o, None if name == default else name)
+    else:
+        for (s, p, o) in graph:
+            yield (s, p, o, None)
+
+
+def dump(graph):
+    """ Return a graph as snapshot bytes. """
+    return dump_quads(graph_quads(graph), graph.namespaces())
+
+
+def dump_quads(quads, namespaces):
+    """ Return statements, as (s, p, o, name) with the name None for the
+        default graph, and namespace bindings as snapshot bytes: the
+        bindings, each term once, then every statement as varint term IDs,
+        sorted so the subject IDs can be written as differences. """
+    ids = {}
+
+    def term_id(term):
+        id = ids.get(term)
+        if id is None:
+            id = ids[term] = len(ids)
+        return id
+    quads = sorted(
+        (term_id(s), term_id(p), term_id(o),
+         DEFAULT_GRAPH if name is None else term_id(name) + 1)
+        for (s, p, o, name) in quads)
+    namespaces = list(namespaces)
+    buffer = bytearray(MAGIC)
+    write_varint(buffer, len(namespaces))
+    for (prefix, namespace) in namespaces:
+        write_bytes(buffer, prefix.encode('utf-8'))
+        write_bytes(buffer, namespace.encode('utf-8'))
+    write_varint(buffer, len(ids))
+    for term in ids:
+        write_bytes(buffer, encode_term(term))
+    write_varint(buffer, len(quads))
+    previous = 0
+    for (s, p, o, g) in quads:
+        write_varint(buffer, s - previous)
+        write_varint(buffer, p)
+        write_varint(buffer, o)
+        write_varint(buffer, g)
+        previous = s
+    return bytes(buffer)
+
+
+def write_snapshot(stream, data):
+    if isinstance(stream, TextIOBase):
+        # A snapshot is binary, written under any text stream.
+        stream.flush()
+        stream = stream.buffer
+    stream.write(data)
+
+
+def serialize(graph, destination=None):
+    """ Write a graph as a snapshot to a path or stream, or return the bytes
+        if destination is None; Graph.serialize instead decodes them as
+        UTF-8 unless given an encoding. """
+    data = dump(graph)
+    if destination is None:
+        return data
+    elif hasattr(destination, 'write'):
+        write_snapshot(destination, data)
+    else:
+        with open(destination, 'wb') as stream:
+            stream.write(data)
+
+
+def read_quads(data):
+    """ The namespace bindings in snapshot bytes, and an iterator of its
+        statements as (s, p, o, name), the name None in the default graph.
+        """
+    if not data.startswith(MAGIC):
+        raise ValueError(data[:len(MAGIC)])
+    reader = Reader(memoryview(data))
+    reader.position = len(MAGIC)
+    namespaces = [(bytes(reader.bytes()).decode('utf-8'),
+                   URIRef(bytes(reader.bytes()).decode('utf-8')))
+                  for _ in range(reader.varint())]
+    terms = [decode_term(bytes(reader.bytes()))
+             for _ in range(reader.varint())]
+    count = reader.varint()
+
+    def quads():
+        values = reader.varints()
+        subject = 0
+        for _ in range(count):
+            subject += next(values)
+            (p, o, g) = (next(values), next(values), next(values))
+            yield (terms[subject], terms[p], terms[o],
+                   None if g == DEFAULT_GRAPH else terms[g - 1])
+    return (namespaces, quads())
+
+
+def load(data, sink):
+    """ Add the statements in snapshot bytes to a graph; those in named
+        graphs go to that graph in the same store if it is context-aware,
+        or to the sink itself if not. Returns the number of statements. """
+    (namespaces, statements) = read_quads(data)
+    for (prefix, namespace) in namespaces:
+        sink.bind(prefix, namespace, override=False)
+    graphs = {None: getattr(sink, 'default_context', sink)}
+    quads = []
+    for (s, p, o, name) in statements:
+        context = graphs.get(name)
+        if context is None:
+            if sink.store.context_aware:
+                context = Graph(store=sink.store, identifier=name)
+            else:
+                context = sink
+            graphs[name] = context
+        quads.append((s, p, o, context))
+    sink.store.addN(quads)
+    return len(quads)
+
+
+class SnapshotParser(Parser):
+
+    def parse(self, source, sink, **kwargs):
+        stream = source.getByteStream()
+        load(stream.read(), sink)
+
+
+class SnapshotSerializer(Serializer):
+
+    def serialize(self, stream, base=None, encoding=None, **kwargs):
+        # Always bytes, the terms are UTF-8 whatever the encoding.
+        write_snapshot(stream, dump(self.store))
+
+
+plugin.register(SNAPSHOT_FORMAT, Parser, 'rdftools.snapshot',
+                'SnapshotParser')
+plugin.register(SNAPSHOT_FORMAT, Serializer, 'rdftools.snapshot',
+                'SnapshotSerializer')
+SUFFIX_FORMAT_MAP[SNAPSHOT_SUFFIX[1:]] = SNAPSHOT_FORMAT
@@ -0,0 +1,114 @@
+import heapq
+import os
+import tempfile
+
+# The default sort buffer, in MB.
+BUFFER_DEFAULT = 64
+
+# Roughly what a line costs in memory beyond its characters: the str object
+# itself and its slot in the buffer list.
+LINE_OVERHEAD = 57
+
+# The most runs merged at once, each an open file.
+MERGE_WIDTH = 64
+
+
+def unique_lines(lines):
+    """ Drop adjacent duplicates from sorted lines. """
+    previous = None
+    for line in lines:
+        if line != previous:
+            yield line
+            previous = line
+
+
+class ExternalSort(object):
+    """ Sorts lines of text, of any total size, in bounded memory. Lines are
+        written to it as to a stream; whenever those buffered reach the
+        buffer size they are sorted and spilled to a temporary file, a run,
+        and iterating merges the runs back into one sorted sequence. With
+        unique, duplicate lines are dropped. Lines must each end in a new
+        line, and are ordered by code point, the same as UTF-8 bytes. """
+
+    def __init__(self, buffer_size=BUFFER_DEFAULT * 1024 * 1024,
+                 unique=False, directory=None):
+        self.buffer_size = buffer_size
+        self.unique = unique
+        self.directory = directory
+        self.buffer = []
+        self.used = 0
+        self.runs = []
+        self.count = 0
+
+    def write(self, line):
+        self.buffer.append(line)
+        self.count += 1
+        self.used += len(line) + LINE_OVERHEAD
+        if self.used >= self.buffer_size:
+            self.spill()
+
+    def sorted_buffer(self):
+        self.buffer.sort()
+        lines = self.buffer
+        return unique_lines(lines) if self.unique else iter(lines)
+
+    def write_run(self, lines):
+        (handle, path) = tempfile.mkstemp(prefix='rdftools-', suffix='.run',
+                                          dir=self.directory)
+        with open(handle, 'w', encoding='utf-8', newline='') as run:
+            run.writelines(lines)
+        return path
+
+    def spill(self):
+        self.runs.append(self.write_run(self.sorted_buffer()))
+        self.buffer = []
+        self.used = 0
+
+    def merge(self, runs):
+        files = [open(run, 'r', encoding='utf-8', newline='')
+                 for run in runs]
+        try:
+            lines = heapq.merge(*files)
+            for line in (unique_lines(lines) if self.unique else lines):
+                yield line
+        finally:
+            for file in files:
+                file.close()
+
+    def __iter__(self):
+        try:
+            if not self.runs:
+                for line in self.sorted_buffer():
+                    yield line
+                return
+            if self.buffer:
+                self.spill()
+            # Merge in passes, so no more than MERGE_WIDTH files are open.
+            while len(self.runs) > MERGE_WIDTH:
+                (groups, self.runs) = (self.runs, [])
+                for start in range(0, len(groups), MERGE_WIDTH):
+                    group = groups[start:start + MERGE_WIDTH]
+                    self.runs.append(self.write_run(self.merge(group)))
+                    remove_runs(group)
+            for line in self.merge(self.runs):
+                yield line
+        finally:
+            self.close()
+
+    def close(self):
+        """ Remove any runs left on disk. """
+        remove_runs(self.runs)
+        self.runs = []
+        self.buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def remove_runs(runs):
+    for run in runs:
+        if os.path.exists(run):
+            os.remove(run)
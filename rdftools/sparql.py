@@ -0,0 +1,61 @@
+import functools
+import re
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.sparql import Query
+
+CACHE_SIZE = 128
+
+COMMENT = '#'
+
+SPACES = re.compile(r'\s+')
+
+COMMENTS = re.compile(r'#[^\n]*')
+
+# String literals and IRIs, in which white space and '#' are significant.
+PROTECTED = re.compile(r'("""(?:[^\\]|\\.)*?"""|\'\'\'(?:[^\\]|\\.)*?\'\'\'|'
+                       r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|'
+                       r'<[^<>"{}|^`\\\s]*>)',
+                       re.DOTALL)
+
+
+def normalize_query(sparql):
+    """ Remove comments and collapse runs of white space outside string
+        literals and IRIs, so that queries differing only in layout share
+        a cache entry. """
+    parts = PROTECTED.split(sparql)
+    return ''.join([SPACES.sub(' ', COMMENTS.sub(' ', part))
+                    if index % 2 == 0 else part
+                    for (index, part) in enumerate(parts)]).strip()
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def prepare_normalized(sparql, namespaces=(), base=None):
+    return prepareQuery(sparql, initNs=dict(namespaces), base=base)
+
+
+def prepare_query(sparql, namespaces=(), base=None):
+    """ Parse and translate a query, or return the already prepared form of
+        the same query with the same prefixes and base. """
+    return prepare_normalized(normalize_query(sparql),
+                              tuple(sorted(namespaces)), base)
+
+
+def query(graph, sparql, bindings=None, base=None):
+    if not isinstance(sparql, Query):
+        sparql = prepare_query(sparql, graph.namespaces(), base)
+    return graph.query(sparql, initBindings=bindings)
+
+
+def read_queries(stream):
+    """ Read queries from a file, each separated by one or more blank
+        lines; lines starting with '#' are comments. """
+    lines = []
+    for line in stream:
+        if line.strip() == '':
+            if len(lines) > 0:
+                yield ''.join(lines)
+            lines = []
+        elif not line.lstrip().startswith(COMMENT):
+            lines.append(line)
+    if len(lines) > 0:
+        yield ''.join(lines)
@@ -0,0 +1,659 @@
+import functools
+import i18n
+import json
+import mmap
+import os
+import os.path
+import sqlite3
+import sys
+from array import array
+from rdflib import BNode, Graph, Literal, URIRef, plugin
+from rdflib.graph import QuotedGraph
+from rdflib.namespace import RDF
+from rdflib.plugins.stores.memory import Memory
+from rdflib.store import Store, NO_STORE, VALID_STORE
+
+from rdftools.sort import BUFFER_DEFAULT, ExternalSort
+
+FILE_STORE = 'File'
+MAPPED_STORE = 'Mapped'
+STORE_DEFAULT = FILE_STORE
+
+MAPPED_META = 'meta.json'
+MAPPED_TERMS = 'terms.dat'
+MAPPED_OFFSETS = 'terms.idx'
+MAPPED_SUFFIX = '.idx'
+# Term IDs are 4 byte unsigned integers, offsets into the terms 8 bytes.
+ID_TYPE = 'I'
+OFFSET_TYPE = 'Q'
+TERM_CACHE = 65536
+# Rows of an index are sorted as lines of fixed width hexadecimal IDs, so
+# their text is in the same order as the IDs; and written in blocks of IDs.
+ROW_FORMAT = '%08x%08x%08x\n'
+INDEX_BLOCK = 3 * 65536
+
+# Each index holds every triple's term IDs, in the order of these positions,
+# sorted; the positions a pattern binds pick the index to search.
+PERMUTATIONS = {
+    'spo': (0, 1, 2),
+    'pos': (1, 2, 0),
+    'osp': (2, 0, 1)
+}
+PATTERN_INDEXES = {
+    (True, True, True): 'spo',
+    (True, True, False): 'spo',
+    (True, False, True): 'osp',
+    (True, False, False): 'spo',
+    (False, True, True): 'pos',
+    (False, True, False): 'pos',
+    (False, False, True): 'osp',
+    (False, False, False): 'spo'
+}
+# The index, and any leading term, whose runs are the terms rdf-select lists.
+SELECT_INDEXES = {
+    'subjects': ('spo', None),
+    'predicates': ('pos', None),
+    'objects': ('osp', None),
+    'types': ('pos', RDF.type)
+}
+
+URI_KIND = b'U'
+BNODE_KIND = b'B'
+LITERAL_KIND = b'L'
+FORMULA_KIND = b'F'
+SEPARATOR = b'\0'
+
+# Terms are kept in a File store as encode_term gives them, and statements as
+# the IDs of their terms and graph, with an index for each leading term; each
+# graph is listed, marked if it is a quoted N3 formula, left out of the union.
+FILE_COLUMNS = ('s', 'p', 'o', 'g')
+FILE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term BLOB NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS quads (
+    s INTEGER NOT NULL, p INTEGER NOT NULL, o INTEGER NOT NULL,
+    g INTEGER NOT NULL,
+    PRIMARY KEY (s, p, o, g)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS quads_pos ON quads (p, o, s);
+CREATE INDEX IF NOT EXISTS quads_osp ON quads (o, s, p);
+CREATE INDEX IF NOT EXISTS quads_g ON quads (g);
+CREATE TABLE IF NOT EXISTS graphs (
+    g INTEGER NOT NULL PRIMARY KEY,
+    quoted INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS namespaces (
+    prefix TEXT NOT NULL PRIMARY KEY,
+    namespace TEXT NOT NULL UNIQUE);
+"""
+
+
+class FileStore(Store):
+    """ A store kept in a single SQLite database file: each term once, in a
+        table of encoded terms, and each statement as a row of four term
+        IDs, indexed by subject, predicate, object and graph. Opening reads
+        nothing until the first lookup, and changes are written to the file
+        as they are made, kept on commit and undone on rollback. """
+
+    context_aware = True
+    formula_aware = True
+    transaction_aware = True
+    graph_aware = True
+
+    def __init__(self, configuration=None, identifier=None):
+        self.path = None
+        self.connection = None
+        super(FileStore, self).__init__(configuration, identifier)
+
+    def open(self, configuration, create=False):
+        path = os.path.abspath(configuration)
+        if not (create or os.path.exists(path)):
+            return NO_STORE
+        # Queries run in worker threads, see rdftools.execution.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(FILE_SCHEMA)
+        self.path = path
+        self.ids = {}
+        self.graphs = set()
+        self.term = functools.lru_cache(maxsize=TERM_CACHE)(self.read_term)
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        if self.connection is None:
+            return
+        if commit_pending_transaction:
+            self.commit()
+        self.connection.close()
+        self.connection = None
+        self.path = None
+
+    def read_term(self, id):
+        (data,) = self.connection.execute(
+            'SELECT term FROM terms WHERE id = ?', (id,)).fetchone()
+        if data[:1] == FORMULA_KIND:
+            return QuotedGraph(self, decode_term(data[1:]))
+        return decode_term(data)
+
+    def term_id(self, term, create=False):
+        """ The ID of a term, added if create is set, otherwise None if the
+            store does not contain it. """
+        if isinstance(term, QuotedGraph):
+            data = FORMULA_KIND + encode_term(term.identifier)
+        else:
+            data = encode_term(term)
+        id = self.ids.get(data)
+        if id is None:
+            row = self.connection.execute(
+                'SELECT id FROM terms WHERE term = ?', (data,)).fetchone()
+            if row is not None:
+                id = row[0]
+            elif create:
+                id = self.connection.execute(
+                    'INSERT INTO terms (term) VALUES (?)', (data,)).lastrowid
+            else:
+                return None
+            if len(self.ids) >= TERM_CACHE:
+                self.ids.clear()
+            self.ids[data] = id
+        return id
+
+    def graph_id(self, identifier, quoted=False):
+        """ The ID of a graph, listed among the graphs if it is new. """
+        id = self.term_id(identifier, create=True)
+        if id not in self.graphs:
+            self.connection.execute(
+                'INSERT OR IGNORE INTO graphs VALUES (?, ?)', (id, quoted))
+            self.graphs.add(id)
+        return id
+
+    def where(self, triple, context=None):
+        """ The SQL condition, and its values, matching a triple pattern in
+            a context, or in any graph but a quoted formula; None if a bound
+            term is not in the store. """
+        clauses = []
+        if context is not None:
+            context = context.identifier
+        else:
+            clauses.append('g NOT IN (SELECT g FROM graphs WHERE quoted)')
+        values = []
+        for (column, term) in zip(FILE_COLUMNS, tuple(triple) + (context,)):
+            if term is not None:
+                id = self.term_id(term)
+                if id is None:
+                    return None
+                clauses.append('%s = ?' % column)
+                values.append(id)
+        return (' WHERE ' + ' AND '.join(clauses), values)
+
+    def add(self, triple, context, quoted=False):
+        Store.add(self, triple, context, quoted)
+        self.graph_id(context.identifier, quoted)
+        self.addN([triple + (context,)])
+
+    def addN(self, quads):
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO quads VALUES (?, ?, ?, ?)',
+            [(self.term_id(s, create=True), self.term_id(p, create=True),
+              self.term_id(o, create=True), self.graph_id(context.identifier))
+             for (s, p, o, context) in quads])
+
+    def remove(self, triple, context=None):
+        Store.remove(self, triple, context)
+        condition = self.where(triple, context)
+        if condition is not None:
+            self.connection.execute('DELETE FROM quads' + condition[0],
+                                    condition[1])
+
+    def triples(self, triple_pattern, context=None):
+        condition = self.where(triple_pattern, context)
+        if condition is None:
+            return
+        if context is not None:
+            rows = self.connection.execute(
+                'SELECT s, p, o, g FROM quads' + condition[0], condition[1])
+            for (s, p, o, g) in rows:
+                yield ((self.term(s), self.term(p), self.term(o)),
+                       iter([context]))
+        else:
+            # Each triple once, with every graph it is in.
+            rows = self.connection.execute(
+                'SELECT s, p, o, group_concat(g) FROM quads' + condition[0] +
+                ' GROUP BY s, p, o', condition[1])
+            for (s, p, o, graphs) in rows:
+                yield ((self.term(s), self.term(p), self.term(o)),
+                       (Graph(store=self, identifier=self.term(int(g)))
+                        for g in graphs.split(',')))
+
+    def __len__(self, context=None):
+        condition = self.where((None, None, None), context)
+        if condition is None:
+            return 0
+        sql = 'SELECT count(*) FROM quads' + condition[0]
+        if context is None:
+            sql = 'SELECT count(*) FROM (SELECT DISTINCT s, p, o FROM ' \
+                'quads%s)' % condition[0]
+        return self.connection.execute(sql, condition[1]).fetchone()[0]
+
+    def contexts(self, triple=None):
+        if triple is None or triple == (None, None, None):
+            # Every graph, including those added empty.
+            rows = self.connection.execute(
+                'SELECT g FROM graphs WHERE NOT quoted')
+        else:
+            condition = self.where(triple)
+            if condition is None:
+                return
+            rows = self.connection.execute(
+                'SELECT DISTINCT g FROM quads' + condition[0], condition[1])
+        for (g,) in rows.fetchall():
+            yield Graph(store=self, identifier=self.term(g))
+
+    def add_graph(self, graph):
+        self.graph_id(graph.identifier)
+
+    def remove_graph(self, graph):
+        id = self.term_id(graph.identifier)
+        if id is not None:
+            self.connection.execute('DELETE FROM quads WHERE g = ?', (id,))
+            self.connection.execute('DELETE FROM graphs WHERE g = ?', (id,))
+            self.graphs.discard(id)
+
+    def bind(self, prefix, namespace, override=True):
+        if override:
+            self.connection.execute(
+                'DELETE FROM namespaces WHERE prefix = ? OR namespace = ?',
+                (prefix, str(namespace)))
+        self.connection.execute(
+            'INSERT OR IGNORE INTO namespaces VALUES (?, ?)',
+            (prefix, str(namespace)))
+
+    def namespace(self, prefix):
+        row = self.connection.execute(
+            'SELECT namespace FROM namespaces WHERE prefix = ?',
+            (prefix,)).fetchone()
+        return None if row is None else URIRef(row[0])
+
+    def prefix(self, namespace):
+        row = self.connection.execute(
+            'SELECT prefix FROM namespaces WHERE namespace = ?',
+            (str(namespace),)).fetchone()
+        return None if row is None else row[0]
+
+    def namespaces(self):
+        rows = self.connection.execute('SELECT prefix, namespace '
+                                       'FROM namespaces').fetchall()
+        for (prefix, namespace) in rows:
+            yield (prefix, URIRef(namespace))
+
+    def commit(self):
+        if self.connection is not None:
+            self.connection.commit()
+
+    def rollback(self):
+        if self.connection is not None:
+            self.connection.rollback()
+            # IDs of terms added since the last commit may be given again.
+            self.ids = {}
+            self.graphs = set()
+            self.term.cache_clear()
+
+
+class NullStore(Memory):
+    """ A store that counts, but does not keep, the statements added to it;
+        parsing into it checks the syntax of a source in fixed memory. """
+
+    def __init__(self, configuration=None, identifier=None):
+        super(NullStore, self).__init__(identifier=identifier)
+        self.count = 0
+
+    def add(self, triple, context, quoted=False):
+        self.count += 1
+
+    def addN(self, quads):
+        for _ in quads:
+            self.count += 1
+
+
+def encode_term(term):
+    """ The bytes a term is kept, and ordered, as in a mapped store. """
+    if isinstance(term, Literal):
+        return SEPARATOR.join([LITERAL_KIND + str(term).encode('utf-8'),
+                               (term.language or '').encode('utf-8'),
+                               (term.datatype or '').encode('utf-8')])
+    elif isinstance(term, BNode):
+        return BNODE_KIND + term.encode('utf-8')
+    return URI_KIND + term.encode('utf-8')
+
+
+def decode_term(data):
+    kind = data[:1]
+    if kind == LITERAL_KIND:
+        (value, language, datatype) = data[1:].rsplit(SEPARATOR, 2)
+        return Literal(value.decode('utf-8'),
+                       lang=language.decode('utf-8') or None,
+                       datatype=datatype.decode('utf-8') or None)
+    elif kind == BNODE_KIND:
+        return BNode(data[1:].decode('utf-8'))
+    return URIRef(data[1:].decode('utf-8'))
+
+
+class MappedBuilder(object):
+    """ Collects statements, as a parser sink for rdftools.stream or from a
+        graph, and writes them as the files of a MappedStore. Collecting
+        holds each distinct term once and 12 bytes per statement in memory;
+        writing sorts each index externally, within buffer_size bytes. """
+
+    def __init__(self):
+        self.ids = {}
+        self.triples = array(ID_TYPE)
+        self.count = 0
+
+    def term_id(self, term):
+        id = self.ids.get(term)
+        if id is None:
+            id = self.ids[term] = len(self.ids)
+        return id
+
+    def quad(self, subject, predicate, object, context=None):
+        self.count += 1
+        self.triples.extend((self.term_id(subject), self.term_id(predicate),
+                             self.term_id(object)))
+
+    def add_graph(self, graph):
+        for (s, p, o) in graph:
+            self.quad(s, p, o)
+
+    def write(self, path, namespaces=(), buffer_size=None, directory=None,
+              inputs=None):
+        """ Write the store files into the directory path; the meta data
+            file is written last, so a partly written store never opens. It
+            records the versions of the inputs, see input_versions. """
+        os.makedirs(path, exist_ok=True)
+        terms = sorted((encode_term(term), id)
+                       for (term, id) in self.ids.items())
+        self.ids = {}
+        remap = array(ID_TYPE, bytes(len(terms) * array(ID_TYPE).itemsize))
+        offsets = array(OFFSET_TYPE, [0])
+        with open(os.path.join(path, MAPPED_TERMS), 'wb') as file:
+            for (new, (data, old)) in enumerate(terms):
+                remap[old] = new
+                file.write(data)
+                offsets.append(offsets[-1] + len(data))
+        with open(os.path.join(path, MAPPED_OFFSETS), 'wb') as file:
+            offsets.tofile(file)
+        size = len(terms)
+        triples = self.triples
+        count = 0
+        for (name, order) in PERMUTATIONS.items():
+            with ExternalSort(buffer_size or BUFFER_DEFAULT * 1024 * 1024,
+                              unique=True, directory=directory) as rows:
+                for i in range(0, len(triples), 3):
+                    rows.write(ROW_FORMAT % (remap[triples[i + order[0]]],
+                                             remap[triples[i + order[1]]],
+                                             remap[triples[i + order[2]]]))
+                count = write_index(
+                    os.path.join(path, name + MAPPED_SUFFIX), rows)
+        with open(os.path.join(path, MAPPED_META), 'w') as file:
+            json.dump({'terms': size, 'triples': count,
+                       'id_size': array(ID_TYPE).itemsize,
+                       'byteorder': sys.byteorder,
+                       'namespaces': [[prefix, str(namespace)]
+                                      for (prefix, namespace)
+                                      in namespaces],
+                       'inputs': inputs}, file)
+        return count
+
+
+def write_index(name, rows):
+    """ Write the sorted rows of ROW_FORMAT as an index file of IDs, a block
+        at a time; returns the number of rows. """
+    width = array(ID_TYPE).itemsize * 2
+    index = array(ID_TYPE)
+    count = 0
+    with open(name, 'wb') as file:
+        for row in rows:
+            index.extend(int(row[start:start + width], 16)
+                         for start in range(0, width * 3, width))
+            count += 1
+            if len(index) >= INDEX_BLOCK:
+                index.tofile(file)
+                index = array(ID_TYPE)
+        index.tofile(file)
+    return count
+
+
+def map_file(path):
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class MappedStore(Store):
+    """ A read-only store over the files written by MappedBuilder: each
+        term is kept once, as an integer ID in sorted order, and the triples
+        as three sorted arrays of IDs, all memory-mapped, so opening reads
+        nothing until the first lookup. Statements are not in any named
+        graph; adding or removing them raises TypeError. """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        self.path = None
+        self.maps = []
+        self.bindings = {}
+        super(MappedStore, self).__init__(configuration, identifier)
+
+    def open(self, configuration, create=False):
+        path = os.path.abspath(configuration)
+        meta_path = os.path.join(path, MAPPED_META)
+        if not os.path.exists(meta_path):
+            return NO_STORE
+        with open(meta_path, 'r') as file:
+            meta = json.load(file)
+        if meta['id_size'] != array(ID_TYPE).itemsize or \
+                meta['byteorder'] != sys.byteorder:
+            raise ValueError(path)
+        self.path = path
+        self.size = meta['terms']
+        self.count = meta['triples']
+        self.data = map_file(os.path.join(path, MAPPED_TERMS))
+        self.offsets = memoryview(
+            map_file(os.path.join(path, MAPPED_OFFSETS))).cast(OFFSET_TYPE)
+        self.indexes = {}
+        for name in PERMUTATIONS:
+            mapped = map_file(os.path.join(path, name + MAPPED_SUFFIX))
+            self.maps.append(mapped)
+            self.indexes[name] = memoryview(mapped).cast(ID_TYPE)
+        self.maps.extend([self.data])
+        self.term = functools.lru_cache(maxsize=TERM_CACHE)(self.read_term)
+        for (prefix, namespace) in meta['namespaces']:
+            self.bindings[prefix] = URIRef(namespace)
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        if self.path is None:
+            return
+        self.offsets.release()
+        for index in self.indexes.values():
+            index.release()
+        for mapped in self.maps:
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self.maps = []
+        self.path = None
+
+    def read_term(self, id):
+        return decode_term(bytes(
+            self.data[self.offsets[id]:self.offsets[id + 1]]))
+
+    def term_id(self, term):
+        """ The ID of a term, by binary search of the sorted terms, or
+            None if the store does not contain it. """
+        if isinstance(term, (URIRef, BNode, Literal)):
+            data = encode_term(term)
+            (low, high) = (0, self.size)
+            while low < high:
+                middle = (low + high) // 2
+                found = self.data[self.offsets[middle]:
+                                  self.offsets[middle + 1]]
+                if found < data:
+                    low = middle + 1
+                elif found > data:
+                    high = middle
+                else:
+                    return middle
+        return None
+
+    def search(self, index, prefix):
+        """ The range of rows in an index that start with the prefix. """
+        width = len(prefix)
+
+        def bound(upper):
+            (low, high) = (0, self.count)
+            while low < high:
+                middle = (low + high) // 2
+                row = tuple(index[middle * 3:middle * 3 + width])
+                if row < prefix or (upper and row == prefix):
+                    low = middle + 1
+                else:
+                    high = middle
+            return low
+        if width == 0:
+            return (0, self.count)
+        return (bound(False), bound(True))
+
+    def triples(self, triple_pattern, context=None):
+        bound = tuple(term is not None for term in triple_pattern)
+        name = PATTERN_INDEXES[bound]
+        order = PERMUTATIONS[name]
+        prefix = []
+        for position in order:
+            if not bound[position]:
+                break
+            id = self.term_id(triple_pattern[position])
+            if id is None:
+                return
+            prefix.append(id)
+        index = self.indexes[name]
+        (start, end) = self.search(index, tuple(prefix))
+        for row in range(start, end):
+            ids = index[row * 3:row * 3 + 3]
+            triple = [None, None, None]
+            for (column, position) in enumerate(order):
+                triple[position] = self.term(ids[column])
+            yield (tuple(triple), iter(()))
+
+    def distinct(self, select, count=False):
+        """ Yield (term, count) for each distinct selected term, from the
+            runs of equal IDs in one index; count is None unless requested. """
+        (name, key) = SELECT_INDEXES[select]
+        index = self.indexes[name]
+        column = 0
+        (start, end) = (0, self.count)
+        if key is not None:
+            id = self.term_id(key)
+            if id is None:
+                return
+            (start, end) = self.search(index, (id,))
+            column = 1
+        row = start
+        while row < end:
+            id = index[row * 3 + column]
+            prefix = tuple(index[row * 3:row * 3 + column + 1])
+            next_row = self.search(index, prefix)[1]
+            yield (self.term(id), next_row - row if count else None)
+            row = next_row
+
+    def __len__(self, context=None):
+        return self.count
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def bind(self, prefix, namespace, override=True):
+        if override or prefix not in self.bindings:
+            self.bindings[prefix] = namespace
+
+    def namespace(self, prefix):
+        return self.bindings.get(prefix)
+
+    def prefix(self, namespace):
+        for (prefix, bound) in self.bindings.items():
+            if bound == namespace:
+                return prefix
+        return None
+
+    def namespaces(self):
+        for (prefix, namespace) in list(self.bindings.items()):
+            yield (prefix, namespace)
+
+    def add(self, triple, context, quoted=False):
+        raise TypeError(i18n.t('rdftools.store_read_only', path=self.path))
+
+    def addN(self, quads):
+        raise TypeError(i18n.t('rdftools.store_read_only', path=self.path))
+
+    def remove(self, triple, context=None):
+        raise TypeError(i18n.t('rdftools.store_read_only', path=self.path))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def input_versions(inputs):
+    """ The name, size and modification time of each input file, telling
+        whether a store built from them is out of date; None if any input
+        is not a file, as stdin is not. """
+    versions = []
+    for input in inputs:
+        name = getattr(input, 'name', None)
+        if name is None or not os.path.isfile(name):
+            return None
+        stat = os.stat(name)
+        versions.append([os.path.abspath(name), stat.st_size,
+                         stat.st_mtime_ns])
+    return versions
+
+
+def load_mapped(path, inputs, format, base=None, jobs=1):
+    """ Open a mapped store as a graph, first building it from the inputs
+        if it does not yet exist, or was built from other inputs or other
+        versions of them; line-oriented inputs are streamed into it
+        without first building an in-memory graph. """
+    import rdftools
+    from rdftools import stream
+    meta_path = os.path.join(path, MAPPED_META)
+    if inputs and os.path.exists(meta_path):
+        with open(meta_path, 'r') as file:
+            built = json.load(file).get('inputs')
+        versions = input_versions(inputs)
+        if versions is None or versions != built:
+            rdftools.__LOG__.warning(i18n.t('rdftools.store_rebuilt',
+                                            path=path))
+            # Removed first, so a store only partly rebuilt never opens.
+            os.remove(meta_path)
+    if not os.path.exists(meta_path):
+        builder = MappedBuilder()
+        if inputs and stream.can_stream_inputs(inputs, format):
+            stream.stream_inputs(inputs, format, builder)
+            # Line-oriented inputs have no prefixes, a graph binds these.
+            namespaces = list(Graph().namespaces())
+        else:
+            graph = rdftools.read_all(inputs or [None], format, base, jobs)
+            builder.add_graph(graph)
+            namespaces = list(graph.namespaces())
+        builder.write(path, namespaces, inputs=input_versions(inputs or []))
+    graph = Graph(store=MAPPED_STORE)
+    if graph.open(path) == NO_STORE:
+        raise IOError(path)
+    return graph
+
+
+plugin.register(FILE_STORE, Store, 'rdftools.store', 'FileStore')
+plugin.register(MAPPED_STORE, Store, 'rdftools.store', 'MappedStore')
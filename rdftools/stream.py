@@ -0,0 +1,214 @@
+import i18n
+import rdflib
+import sys
+from rdflib.exceptions import ParserError
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser, r_nodeid, \
+    r_tail, r_wspace
+from rdflib.plugins.serializers.nt import _nt_row
+from timeit import default_timer as timer
+
+import rdftools
+from rdftools import metrics, progress
+from rdftools.compression import input_stream, open_text_output
+
+READ_FORMATS = ['nt', 'nquads']
+WRITE_FORMATS = ['nt', 'nquads', 'turtle', 'trig']
+
+# Formats whose statements may be in named graphs, read into a Dataset.
+QUAD_FORMATS = ['nquads', 'trig', 'trix']
+
+
+class QuadParser(W3CNTriplesParser):
+    """ A line-at-a-time parser for N-Triples and N-Quads that hands each
+        statement to the sink as soon as it is read, rather than adding it
+        to a graph. Blank node labels are kept (with a per-input prefix)
+        instead of being mapped, so no state grows with the input. The
+        number and text of the current line are kept for error reports. """
+
+    def __init__(self, sink, bnode_prefix=''):
+        super(QuadParser, self).__init__(sink=sink)
+        self.bnode_prefix = bnode_prefix
+        self.line_number = 0
+        self.current = ''
+
+    def readline(self):
+        line = super(QuadParser, self).readline()
+        if line is not None:
+            self.line_number += 1
+            self.current = line
+        return line
+
+    def position(self):
+        return (self.line_number,
+                len(self.current) - len(self.line or '') + 1)
+
+    def nodeid(self, bnode_context=None):
+        if self.peek('_'):
+            return rdflib.BNode(self.bnode_prefix +
+                                self.eat(r_nodeid).group(1))
+        return False
+
+    def parseline(self, bnode_context=None):
+        self.eat(r_wspace)
+        if (not self.line) or self.line.startswith('#'):
+            return
+
+        subject = self.subject()
+        self.eat(r_wspace)
+        predicate = self.predicate()
+        self.eat(r_wspace)
+        obj = self.object()
+        self.eat(r_wspace)
+        context = self.uriref() or self.nodeid()
+        self.eat(r_tail)
+
+        if self.line:
+            raise ParserError(
+                'Trailing garbage: %s' % self.line)
+        self.sink.quad(subject, predicate, obj, context or None)
+
+
+class QuadWriter(object):
+    """ Writes each statement it is given straight to the output stream in
+        a line-oriented form that is valid for the chosen format. """
+
+    def __init__(self, stream, format):
+        self.stream = stream
+        self.format = format
+        self.count = 0
+
+    def quad(self, subject, predicate, object, context):
+        row = _nt_row((subject, predicate, object))
+        if context is not None:
+            if self.format == 'nquads':
+                row = '%s %s .\n' % (row[:-3], context.n3())
+            elif self.format == 'trig':
+                row = '%s { %s }\n' % (context.n3(), row[:-1])
+        self.stream.write(row)
+        self.count += 1
+
+
+def can_stream_inputs(inputs, read):
+    return all(rdftools.guess_format(input, read) in READ_FORMATS
+               for input in (inputs or [None]))
+
+
+def can_stream(inputs, read, output, write):
+    if rdftools.guess_format(output, write) not in WRITE_FORMATS:
+        return False
+    return can_stream_inputs(inputs, read)
+
+
+def stream_all(inputs, read, output, write, threads=1):
+    LOG = rdftools.__LOG__
+    write = rdftools.guess_format(output, write)
+    start = timer()
+    if output is None:
+        LOG.info(i18n.t('rdftools.write_stdout', format=write))
+        writer = QuadWriter(sys.stdout, write)
+        stream_inputs(inputs, read, writer)
+        sys.stdout.flush()
+    else:
+        LOG.info(i18n.t('rdftools.write_file',
+                 name=output.name, format=write))
+        with open_text_output(output.name, threads) as stream:
+            writer = QuadWriter(stream, write)
+            stream_inputs(inputs, read, writer)
+    metrics.output(getattr(output, 'name', None), write, writer.count,
+                   timer() - start)
+    return writer.count
+
+
+def sort_all(inputs, read, output, write, base=None, unique=False,
+             buffer_size=None, directory=None, threads=1):
+    """ Write the statements from all inputs in sorted order, and with
+        unique only once each, in an external sort that spills sorted runs
+        to temporary files once past the buffer size. """
+    from rdftools.sort import ExternalSort
+    LOG = rdftools.__LOG__
+    write = rdftools.guess_format(output, write)
+    with ExternalSort(unique=unique, directory=directory) as sorter:
+        if buffer_size is not None:
+            sorter.buffer_size = buffer_size
+        writer = QuadWriter(sorter, write)
+        for (index, input) in enumerate(inputs or [None]):
+            read_statements(input, read, writer, base,
+                            bnode_prefix='f%d' % index)
+        LOG.info(i18n.t('rdftools.sort_runs', len=sorter.count,
+                        runs=len(sorter.runs)))
+        start = timer()
+        with metrics.phase('serialize'):
+            if output is None:
+                LOG.info(i18n.t('rdftools.write_stdout', format=write))
+                sys.stdout.writelines(sorter)
+                sys.stdout.flush()
+            else:
+                LOG.info(i18n.t('rdftools.write_file',
+                         name=output.name, format=write))
+                with open_text_output(output.name, threads) as stream:
+                    stream.writelines(sorter)
+        metrics.output(getattr(output, 'name', None), write, sorter.count,
+                       timer() - start)
+    return writer.count
+
+
+def stream_inputs(inputs, read, writer):
+    LOG = rdftools.__LOG__
+    for (index, input) in enumerate(inputs or [None]):
+        format = rdftools.guess_format(input, read)
+        parser = QuadParser(writer, bnode_prefix='f%d' % index)
+        count = writer.count
+        start = timer()
+        with metrics.phase('stream'):
+            read_lines(parser, input, format,
+                       lambda: writer.count - count)
+        end = timer()
+        metrics.input(getattr(input, 'name', None), format,
+                      writer.count - count, end - start)
+        LOG.info(i18n.t('rdftools.stream_complete',
+                 len=writer.count - count, time=end - start))
+
+
+def read_lines(parser, input, format, count):
+    """ Parse a line-oriented input, a file or stdin, reporting progress
+        with the statements count gives. """
+    LOG = rdftools.__LOG__
+    if input is None:
+        LOG.info(i18n.t('rdftools.read_stdin', format=format))
+        with progress.monitor(None, count=count):
+            parser.parse(input_stream(sys.stdin.buffer))
+    else:
+        LOG.info(i18n.t('rdftools.read_file',
+                 name=input.name, format=format))
+        with progress.open_input(input.name, count) as source:
+            parser.parse(source)
+
+
+def read_statements(input, format, sink, base=None, bnode_prefix=''):
+    """ Send each statement in the input to the sink, streamed if the format
+        is line-oriented, otherwise by way of an in-memory graph, whose
+        prefixes are bound in the sink if it can bind them. Blank node
+        labels are kept as written in line-oriented files, with the prefix. """
+    LOG = rdftools.__LOG__
+    format = rdftools.guess_format(input, format)
+    start = timer()
+    count = sink.count
+    if format in READ_FORMATS:
+        parser = QuadParser(sink, bnode_prefix)
+        with metrics.phase('parse'):
+            read_lines(parser, input, format,
+                       lambda: sink.count - count)
+        metrics.input(getattr(input, 'name', None), format,
+                      sink.count - count, timer() - start)
+    else:
+        from rdftools.snapshot import graph_quads
+        graph = rdflib.Dataset() if format in QUAD_FORMATS \
+            else rdflib.Graph()
+        graph = rdftools.read_into(input, format, graph, base)
+        if hasattr(sink, 'bind'):
+            for (prefix, namespace) in graph.namespaces():
+                sink.bind(prefix, namespace)
+        for (s, p, o, name) in graph_quads(graph):
+            sink.quad(s, p, o, name)
+    LOG.info(i18n.t('rdftools.stream_complete',
+             len=sink.count - count, time=timer() - start))
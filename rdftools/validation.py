@@ -0,0 +1,98 @@
+import os
+import os.path
+import rdflib
+from collections import namedtuple
+from timeit import default_timer as timer
+
+# Registers the snapshot format, and its file suffix, with rdflib.
+from rdftools import snapshot  # noqa: F401
+from rdftools import parse_source, progress
+from rdftools.compression import strip_suffix
+from rdftools.store import NullStore
+from rdftools.stream import READ_FORMATS, QuadParser
+
+Validation = namedtuple('Validation', ['name', 'format', 'valid', 'count',
+                                       'line', 'column', 'message', 'time'])
+
+
+class CountSink(object):
+
+    def __init__(self):
+        self.count = 0
+
+    def quad(self, subject, predicate, object, context):
+        self.count += 1
+
+
+def error_position(ex):
+    """ Return the (line, column) of a parser exception, both from 1, where
+        the exception carries one. """
+    if hasattr(ex, 'getLineNumber'):
+        # xml.sax.SAXParseException, columns are from 0.
+        return (ex.getLineNumber(), ex.getColumnNumber() + 1)
+    elif hasattr(ex, 'lineno') and hasattr(ex, 'colno'):
+        # json.JSONDecodeError
+        return (ex.lineno, ex.colno)
+    elif hasattr(ex, 'lines') and hasattr(ex, '_str'):
+        # rdflib.plugins.parsers.notation3.BadSyntax
+        text = ex._str[:ex._i]
+        return (ex.lines + 1, len(text) - (text.rfind(b'\n') + 1) + 1)
+    return (None, None)
+
+
+def validate_file(task):
+    """ Check the syntax of one file without keeping any statements; the
+        N-Triples and N-Quads are read line by line, other formats are
+        parsed into a store that only counts statements. """
+    (name, format, base) = task
+    if format is None:
+        format = rdflib.util.guess_format(strip_suffix(name))
+    start = timer()
+    line = column = None
+    try:
+        if format in READ_FORMATS:
+            parser = QuadParser(CountSink())
+            try:
+                with progress.open_input(
+                        name, lambda: parser.sink.count) as source:
+                    parser.parse(source)
+            finally:
+                (line, column) = parser.position()
+            count = parser.sink.count
+        else:
+            store = NullStore()
+            graph = rdflib.Graph(store=store)
+            parse_source(graph, name, format, base)
+            count = store.count
+    except Exception as ex:
+        if line is None:
+            (line, column) = error_position(ex)
+        return Validation(name, format, False, None, line, column,
+                          ' '.join(str(ex).split()), timer() - start)
+    return Validation(name, format, True, count, None, None, None,
+                      timer() - start)
+
+
+def find_files(directory):
+    """ Walk a directory, in order, for files of a known RDF format. """
+    for (root, dirs, files) in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if rdflib.util.guess_format(strip_suffix(name)) is not None:
+                yield os.path.join(root, name)
+
+
+def validate_all(tasks, jobs=1):
+    """ Yield a Validation for each (name, format, base) task, in order,
+        checking files in a pool of worker processes if jobs is not 1 and
+        there is more than one. """
+    tasks = list(tasks)
+    if jobs == 1 or len(tasks) < 2:
+        for task in tasks:
+            yield validate_file(task)
+    else:
+        from multiprocessing import Pool
+        with Pool(processes=jobs if jobs > 0 else None,
+                  initializer=progress.disable) as pool:
+            for result in pool.imap(validate_file, tasks, chunksize=4):
+                yield result
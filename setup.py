@@ -15,7 +15,7 @@ def find_version(filename):
 
 def get_packages():
     """ Return a list of packages that represent the distributed source. """
-    packages = find_packages(exclude=['data', 'docs', 'test', 'examples', 'venv'])
+    packages = find_packages(exclude=['benchmark', 'benchmark.*', 'data', 'docs', 'test', 'examples', 'venv'])
     if environ.get('READTHEDOCS', None):
         # if building docs for RTD, include examples to get docstrings
         packages.append('examples')
@@ -73,7 +73,7 @@ setup(
     #      While we should maintain the minimum requried versions here,
     #      we might want to promote more recent versions in 'requirements.txt'.
     install_requires=[
-        'rdflib>=4.2',
+        'rdflib>=6.0',
         'python-i18n>=0.3',
         'pyyaml>=3.10',
         'termcolor>=1.1.0'
@@ -84,17 +84,28 @@ setup(
         'coverage>3.7',
         'coveralls>1.1'
         ],
+    extras_require={
+        'zstd': ['zstandard>=0.15']
+        },
     package_data={
-        '': ['*.yml']
+        '': ['*.yml', '*.json']
     },
     entry_points={ # Optional
         'console_scripts': [
             'rdf=rdftools.scripts.rdf:main',
             'rdf-convert=rdftools.scripts.convert:main',
+            'rdf-diff=rdftools.scripts.diff:main',
             'rdf-query=rdftools.scripts.query:main',
             'rdf-select=rdftools.scripts.select:main',
+            'rdf-serve=rdftools.scripts.serve:main',
             'rdf-shell=rdftools.scripts.shell:main',
             'rdf-validate=rdftools.scripts.validate:main',
         ],
+        'rdf.plugins.parser': [
+            'snapshot=rdftools.snapshot:SnapshotParser',
+        ],
+        'rdf.plugins.serializer': [
+            'snapshot=rdftools.snapshot:SnapshotSerializer',
+        ],
     }
 )
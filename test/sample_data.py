@@ -3,3 +3,11 @@ import os
 input_file = os.path.join(os.path.dirname(__file__), 'data/sample.ttl')
 
 input_file_count = 25
+
+nt_input_file = os.path.join(os.path.dirname(__file__), 'data/sample.nt')
+
+nt_input_file_count = 27
+
+nq_input_file = os.path.join(os.path.dirname(__file__), 'data/sample.nq')
+
+nq_input_file_count = 3
@@ -0,0 +1,65 @@
+import json
+
+from benchmark import cases, datasets
+from benchmark.__main__ import compare, main, run
+
+sizes = {'small': 300}
+
+
+def test_triples_repeatable():
+    first = list(datasets.triples(500))
+    assert len(first) == 500
+    assert first == list(datasets.triples(500))
+    assert first != list(datasets.triples(500, seed=1))
+
+
+def test_dataset_reused(tmpdir):
+    name = datasets.dataset(str(tmpdir), 100)
+    with open(name) as file:
+        assert len(file.readlines()) == 100
+    assert datasets.dataset(str(tmpdir), 100) == name
+
+
+def test_run(tmpdir):
+    report = run(['small'], ['nt', 'pretty-xml', 'snapshot'],
+                 cases.OPERATIONS, 2, str(tmpdir), sizes=sizes)
+    assert 'rdflib' in report
+    results = dict(((result['operation'], result['target']), result)
+                   for result in report['results'])
+    for format in ['nt', 'pretty-xml', 'snapshot']:
+        assert len(results[('write', format)]['times']) == 2
+        assert results[('read', format)]['statements'] == \
+            results[('write', format)]['statements']
+    assert ('select', 'types') in results
+    assert ('query', 'queries-1') in results
+    assert not any('error' in result for result in report['results'])
+    # Only the generated dataset is left behind.
+    assert [path.basename for path in tmpdir.listdir()] == ['social-300.nt']
+
+
+def test_compare():
+    before = {'results': [
+        {'scale': 'small', 'operation': 'read', 'target': 'nt', 'best': 2.0},
+        {'scale': 'small', 'operation': 'write', 'target': 'nt',
+         'error': 'failed'}]}
+    after = {'results': [
+        {'scale': 'small', 'operation': 'read', 'target': 'nt', 'best': 1.0},
+        {'scale': 'small', 'operation': 'write', 'target': 'nt', 'best': 1.0}]}
+    rows = list(compare(before, after))
+    assert len(rows) == 1
+    assert rows[0]['change'] == '-50.0%'
+
+
+def test_main_output(tmpdir, capsys):
+    output = str(tmpdir.join('results.json'))
+    main(['--formats', 'nt', '--operations', 'write', 'read', '--repeat', '1',
+          '--data-dir', str(tmpdir), '-o', output])
+    with open(output) as file:
+        report = json.load(file)
+    assert [result['operation'] for result in report['results']] == \
+        ['write', 'read']
+    main(['--formats', 'nt', '--operations', 'read', '--repeat', '1',
+          '--data-dir', str(tmpdir), '--compare', output])
+    (out, err) = capsys.readouterr()
+    assert 'change' in out
+    assert '1 rows returned.' in out
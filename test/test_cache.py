@@ -0,0 +1,95 @@
+import os
+import shutil
+from unittest.mock import patch
+
+import rdftools
+from rdftools.cache import GraphCache
+from rdftools.scripts import select
+from test.sample_data import input_file, input_file_count, nt_input_file
+
+rdftools.configure_translation(force_locale='en')
+rdftools.configure_logging('test', 0)
+
+
+def test_cache_round_trip(tmpdir):
+    cache = GraphCache(str(tmpdir.join('cache')))
+    assert not cache.contains(input_file, 'n3')
+    assert cache.get(input_file, 'n3') is None
+    (triples, namespaces, time) = rdftools.parse_file((input_file, 'n3',
+                                                       None))
+    cache.put(input_file, 'n3', None, triples, namespaces)
+    assert cache.contains(input_file, 'n3')
+    assert not cache.contains(input_file, 'turtle')
+    assert not cache.contains(input_file, 'n3', 'http://example.org/')
+    (cached_triples, cached_namespaces) = cache.get(input_file, 'n3')
+    assert len(cached_triples) == input_file_count
+    assert set(cached_triples) == set(triples)
+    assert cached_namespaces == namespaces
+
+
+def test_cache_entry_snapshot(tmpdir):
+    import rdflib
+    from rdftools.snapshot import MAGIC
+    cache = GraphCache(str(tmpdir.join('cache')))
+    (triples, namespaces, time) = rdftools.parse_file((input_file, 'n3',
+                                                       None))
+    cache.put(input_file, 'n3', None, triples, namespaces)
+    entry = cache.entry_name(input_file, 'n3')
+    # Data, not a pickle, so reading an entry runs no code.
+    with open(entry, 'rb') as file:
+        assert file.read().startswith(MAGIC)
+    with patch.object(rdflib, '__version__', '0.0.1'):
+        assert not cache.contains(input_file, 'n3')
+    with open(entry, 'r+b') as file:
+        file.truncate(len(MAGIC) + 20)
+    assert cache.get(input_file, 'n3') is None
+
+
+def test_cache_content_change(tmpdir):
+    cache = GraphCache(str(tmpdir.join('cache')))
+    copy = str(tmpdir.join('sample.ttl'))
+    shutil.copy(input_file, copy)
+    cache.put(copy, 'n3', None, [], [])
+    assert cache.contains(copy, 'n3')
+    # Touching the file alone keeps the same content hash.
+    os.utime(copy, (0, 0))
+    assert cache.contains(copy, 'n3')
+    with open(copy, 'a') as file:
+        file.write('\n# changed\n')
+    assert not cache.contains(copy, 'n3')
+
+
+def test_cache_eviction(tmpdir):
+    cache = GraphCache(str(tmpdir.join('cache')), max_size=1)
+    cache.put(input_file, 'n3', None, [], [])
+    cache.put(nt_input_file, 'nt', None, [], [])
+    # Every entry is larger than the cap, so nothing is kept.
+    assert not cache.contains(input_file, 'n3')
+    assert not cache.contains(nt_input_file, 'nt')
+
+
+def test_cache_eviction_lru(tmpdir):
+    cache = GraphCache(str(tmpdir.join('cache')))
+    cache.put(input_file, 'n3', None, [], [])
+    entry = cache.entry_name(input_file, 'n3')
+    cache.max_size = os.path.getsize(entry) + 1
+    os.utime(entry, (0, 0))
+    cache.put(nt_input_file, 'nt', None, [], [])
+    assert not cache.contains(input_file, 'n3')
+    assert cache.contains(nt_input_file, 'nt')
+
+
+def test_cache_script_skips_parse(capsys, monkeypatch, tmpdir):
+    # main sets the cache for the process, put back after the test.
+    monkeypatch.setattr(rdftools, 'CACHE', None)
+    argv = ['test_select', '-i', input_file, '-r', 'n3', '-s',
+            '--cache', str(tmpdir.join('cache'))]
+    with patch('sys.argv', argv):
+        select.main()
+        (first, err) = capsys.readouterr()
+    with patch('sys.argv', argv):
+        with patch('rdflib.Graph.parse') as parse:
+            select.main()
+            assert not parse.called
+        (second, err) = capsys.readouterr()
+    assert sorted(first.split('\n')) == sorted(second.split('\n'))
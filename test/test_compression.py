@@ -0,0 +1,134 @@
+import bz2
+import gzip
+import io
+import lzma
+import pytest
+from unittest.mock import patch
+
+import rdftools
+from rdftools import compression
+from rdftools.compression import ParallelWriter
+from rdftools.scripts import convert, shell, validate
+from test.sample_data import input_file, input_file_count, nt_input_file, \
+    nt_input_file_count
+
+rdftools.configure_translation(force_locale='en')
+rdftools.configure_logging('test', 0)
+
+codecs = [('.gz', gzip), ('.bz2', bz2), ('.xz', lzma)]
+
+
+def statements(out):
+    return [line for line in out.split('\n') if not line == '']
+
+
+def test_strip_suffix():
+    assert compression.strip_suffix('dump.nt.gz') == 'dump.nt'
+    assert compression.strip_suffix('dump.nt') == 'dump.nt'
+    assert compression.suffix_codec('dump.ttl.zst') == compression.ZSTD
+
+
+@pytest.mark.parametrize('suffix, module', codecs)
+def test_convert_compressed(capsys, tmpdir, suffix, module):
+    for (input, format, count) in [(input_file, 'ttl', input_file_count),
+                                   (nt_input_file, 'nt', nt_input_file_count)]:
+        path = str(tmpdir.join('out.' + format + suffix))
+        with patch('sys.argv', ['test_convert', '-i', input, '-o', path]):
+            convert.main()
+        with module.open(path, 'rt') as file:
+            assert file.read().startswith(
+                '@prefix' if format == 'ttl' else '<')
+        with patch('sys.argv', ['test_convert', '-i', path, '-w', 'nt']):
+            convert.main()
+            (out, err) = capsys.readouterr()
+            assert len(statements(out)) == count
+
+
+@pytest.mark.parametrize('suffix, module', codecs)
+def test_parallel_writer(tmpdir, suffix, module):
+    data = b''.join(b'line %d\n' % i for i in range(10000))
+    path = str(tmpdir.join('out' + suffix))
+    writer = ParallelWriter(open(path, 'wb'),
+                            compression.COMPRESSORS[
+                                compression.SUFFIXES[suffix]],
+                            threads=3, chunk_size=1000)
+    with writer:
+        for start in range(0, len(data), 777):
+            writer.write(data[start:start + 777])
+    with open(path, 'rb') as file:
+        # Many streams, each a whole one.
+        assert file.read().count(compression.MAGIC[
+            compression.SUFFIXES[suffix]]) > 10
+    with compression.open_input(path) as file:
+        assert file.read() == data
+
+
+def test_convert_compress_threads(capsys, tmpdir):
+    path = str(tmpdir.join('out.nt.gz'))
+    with patch('sys.argv', ['test_convert', '-i', nt_input_file, '-o', path,
+                            '--compress-threads', '2']):
+        convert.main()
+    with gzip.open(path, 'rt') as file:
+        assert len(statements(file.read())) == nt_input_file_count
+    # The thread count was only for that conversion.
+    with compression.open_output(path) as file:
+        assert not isinstance(file, compression.ParallelWriter)
+
+
+def test_magic_over_suffix(capsys, tmpdir):
+    path = tmpdir.join('compressed.nt')
+    with open(nt_input_file, 'rb') as input:
+        path.write_binary(gzip.compress(input.read()))
+    with patch('sys.argv', ['test_convert', '-i', str(path), '-w', 'nt']):
+        convert.main()
+        (out, err) = capsys.readouterr()
+        assert len(statements(out)) == nt_input_file_count
+
+
+@pytest.mark.parametrize('format, mode', [('turtle', []), ('nt', []),
+                                          ('nt', ['-m'])])
+def test_convert_compressed_stdin(capsys, format, mode):
+    with open(input_file if format == 'turtle' else nt_input_file,
+              'rb') as input:
+        data = bz2.compress(input.read())
+    stdin = io.TextIOWrapper(io.BufferedReader(io.BytesIO(data)))
+    with patch('sys.stdin', stdin), \
+            patch('sys.argv', ['test_convert', '-r', format, '-w', 'nt'] +
+                  mode):
+        convert.main()
+        (out, err) = capsys.readouterr()
+        assert len(statements(out)) == (input_file_count if format == 'turtle'
+                                        else nt_input_file_count)
+
+
+def test_validate_compressed(capsys, tmpdir):
+    path = tmpdir.join('sample.ttl.xz')
+    with open(input_file, 'rb') as input:
+        path.write_binary(lzma.compress(input.read()))
+    with patch('sys.argv', ['test_validate', '-d', str(tmpdir)]):
+        validate.main()
+        (out, err) = capsys.readouterr()
+        assert out.startswith('%s: valid, %d statements' %
+                              (path, input_file_count))
+
+
+def test_shell_compressed(capsys, tmpdir):
+    path = str(tmpdir.join('sample.ttl.gz'))
+    context = shell.clear(None, '')
+    context = shell.parse(context, input_file)
+    context = shell.serialize(context, path + ' turtle')
+    context = shell.clear(context, '')
+    context = shell.parse(context, path + ' turtle')
+    assert len(context.graph) == input_file_count
+
+
+def test_zstd(capsys, tmpdir):
+    pytest.importorskip('zstandard')
+    path = str(tmpdir.join('out.nt.zst'))
+    with patch('sys.argv', ['test_convert', '-i', nt_input_file, '-o', path,
+                            '--compress-threads', '2']):
+        convert.main()
+    with patch('sys.argv', ['test_convert', '-i', path, '-w', 'nt']):
+        convert.main()
+        (out, err) = capsys.readouterr()
+        assert len(statements(out)) == nt_input_file_count
@@ -2,7 +2,8 @@ import pytest
 from unittest.mock import patch
 
 from rdftools.scripts import convert
-from test.sample_data import input_file
+from test.sample_data import input_file, nt_input_file, \
+    nt_input_file_count, nq_input_file
 
 sample_triples = sorted([
     '<http://example.org/social/people/1.0/Bob> <http://example.org/social/relationship/1.0/parent> <http://example.org/social/people/1.0/Carol> .',  # noqa: 501
@@ -43,6 +44,91 @@ def test_convert_script(capsys):
         assert out_lines == sample_triples
 
 
+def test_convert_script_streaming(capsys):
+    with patch('sys.argv',
+               ['test_convert', '-i', nt_input_file, '-w', 'nt']):
+        convert.main()
+        (out, err) = capsys.readouterr()
+        # Blank node labels are kept, but prefixed by the input index.
+        out_lines = [line.replace('_:f0', '_:') for line in out.split('\n')
+                     if not line == '']
+        assert len(out_lines) == nt_input_file_count
+        with open(nt_input_file) as expected:
+            assert out_lines == [line.strip() for line in expected]
+
+
+def test_convert_script_streaming_matches_graph(capsys):
+    results = []
+    for mode in [[], ['-m']]:
+        with patch('sys.argv',
+                   ['test_convert', '-i', nt_input_file, '-w', 'nt'] + mode):
+            convert.main()
+            (out, err) = capsys.readouterr()
+            results.append(sorted([line for line in out.split('\n')
+                                   if not line.startswith('_:')]))
+    assert results[0] == results[1]
+
+
+def test_convert_script_streaming_quads(capsys):
+    import rdflib
+    with patch('sys.argv',
+               ['test_convert', '-i', nq_input_file, '-w', 'trig']):
+        convert.main()
+        (out, err) = capsys.readouterr()
+        graph = rdflib.ConjunctiveGraph()
+        graph.parse(data=out, format='trig')
+        assert len(graph) == 3
+        assert len(list(graph.contexts())) == 2
+
+
+def test_convert_script_sort(capsys, tmpdir):
+    for options in [['--sort'], ['--unique', '--buffer', '0',
+                                 '--temp-dir', str(tmpdir)]]:
+        with patch('sys.argv',
+                   ['test_convert', '-i', input_file, input_file, '-r', 'n3',
+                    '-w', 'nt'] + options):
+            convert.main()
+            (out, err) = capsys.readouterr()
+            lines = [line for line in out.split('\n') if not line == '']
+            if '--sort' in options:
+                assert lines == sorted(sample_triples * 2)
+            else:
+                assert lines == sample_triples
+    assert tmpdir.listdir() == []
+
+
+def test_convert_script_sort_logged(capsys, caplog):
+    with patch('sys.argv',
+               ['test_convert', '-i', input_file, input_file, '-r', 'n3',
+                '-w', 'nt', '--sort', '-vvv']):
+        convert.main()
+    # Each input's own count, not the total so far.
+    assert caplog.text.count('streamed %d statements' %
+                             len(sample_triples)) == 2
+
+
+def test_convert_script_sort_bad_format(capsys, caplog):
+    with patch('sys.argv',
+               ['test_convert', '-i', input_file, '-r', 'n3', '-w', 'xml',
+                '--sort']):
+        with pytest.raises(SystemExit) as info:
+            convert.main()
+        (out, err) = capsys.readouterr()
+    assert info.value.code == 2
+    assert out == ''
+    assert 'Cannot sort into xml' in caplog.text
+
+
+def test_convert_script_streaming_bad_line(capsys, tmpdir):
+    p = tmpdir.join('bad.nt')
+    p.write('<http://example.org/a> <http://example.org/b> .\n')
+    with patch('sys.argv',
+               ['test_convert', '-i', str(p), '-w', 'nt']):
+        convert.main()
+        (out, err) = capsys.readouterr()
+        assert out.index('Error parsing a file.') >= 0
+
+
 # Note that the following four files can be considered common across all
 # scripts as they exercise the command line validation and file parsing
 # used in all of them.
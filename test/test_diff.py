@@ -0,0 +1,72 @@
+import pytest
+from unittest.mock import patch
+
+import rdftools
+from rdftools import diff
+from rdftools.scripts import diff as diff_script
+from test.sample_data import input_file, nt_input_file
+
+rdftools.configure_translation(force_locale='en')
+rdftools.configure_logging('test', 0)
+
+added = '<http://example.org/a> <http://example.org/b> "new" .\n'
+
+
+@pytest.fixture
+def changed(tmpdir):
+    with open(nt_input_file) as input:
+        lines = input.readlines()
+    path = tmpdir.join('changed.nt')
+    path.write(''.join(lines[2:]) + added)
+    return (str(path), lines[:2])
+
+
+def test_diff():
+    changes = list(diff.diff(['a\n', 'b\n', 'd\n'], ['b\n', 'c\n', 'd\n']))
+    assert changes == [(diff.REMOVED, 'a\n'), (diff.ADDED, 'c\n')]
+
+
+def test_diff_script(capsys, changed):
+    (path, removed) = changed
+    assert diff_script.main([nt_input_file, path]) == 1
+    (out, err) = capsys.readouterr()
+    rows = out.split('\n')[:-1]
+    assert (rows[0], rows[-1]) == ('TX .', 'TC .')
+    # In statement order, however they changed.
+    assert rows[1:-1] == sorted(['D ' + line[:-1] for line in removed] +
+                                ['A ' + added[:-1]],
+                                key=lambda row: row[2:])
+
+
+def test_diff_script_same(capsys):
+    assert diff_script.main([nt_input_file, nt_input_file]) == 0
+    (out, err) = capsys.readouterr()
+    assert out == diff.PATCH_BEGIN + diff.PATCH_COMMIT
+
+
+def test_diff_script_files(capsys, changed, tmpdir):
+    (path, removed) = changed
+    (added_file, removed_file) = (tmpdir.join('a.nt'), tmpdir.join('r.nt'))
+    diff_script.main([nt_input_file, path, '--buffer', '0',
+                      '--added', str(added_file),
+                      '--removed', str(removed_file)])
+    assert added_file.read() == added
+    assert removed_file.read() == ''.join(sorted(removed))
+
+
+def test_diff_script_formats(capsys, tmpdir):
+    path = tmpdir.join('sample.nt')
+    with patch('sys.argv', ['test_convert', '-i', input_file, '-r', 'n3',
+                            '-w', 'nt', '-o', str(path)]):
+        from rdftools.scripts import convert
+        convert.main()
+    assert diff_script.main([input_file, str(path)]) == 0
+
+
+def test_diff_script_bnode_aware(capsys, tmpdir):
+    turtle = tmpdir.join('old.ttl')
+    turtle.write('@prefix x: <http://x/> .\nx:a x:b [ x:c "1" ] .\n')
+    triples = tmpdir.join('new.nt')
+    triples.write('<http://x/a> <http://x/b> _:q .\n_:q <http://x/c> "1" .\n')
+    assert diff_script.main([str(turtle), str(triples)]) == 1
+    assert diff_script.main([str(turtle), str(triples), '-B']) == 0
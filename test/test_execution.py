@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+import queue
+import threading
+
+import rdftools
+from rdftools.execution import END, QueryExecutor, QueryTimeout, evaluate
+from rdftools.sparql import query
+from test.sample_data import input_file
+
+TYPES_QUERY = 'SELECT DISTINCT ?type WHERE { ?s a ?type }'
+
+SLOW_QUERY = 'SELECT * WHERE { ?a ?b ?c . ?d ?e ?f . ?g ?h ?i . ?j ?k ?l }'
+
+# Answered, as ASK is, before the results are returned; in a couple of
+# seconds, as it cannot be cancelled once started.
+ASK_QUERY = 'ASK { ?a ?b ?c . ?d ?e ?f . ?g ?h ?i FILTER(str(?i) = "-") }'
+
+rdftools.configure_translation(force_locale='en')
+
+
+@pytest.fixture(scope='module')
+def graph():
+    rdftools.configure_logging('test', 0)
+    with open(input_file) as input:
+        return rdftools.read_all([input], 'n3')
+
+
+def drain(rows):
+    items = []
+    while not rows.empty():
+        items.append(rows.get())
+    return items
+
+
+def test_result_rows_streamed(graph):
+    from io import StringIO
+    results = query(graph, 'SELECT * WHERE { ?s ?p ?o }')
+    count = rdftools.report(results.vars, rdftools.result_rows(results),
+                            stream=StringIO())
+    assert count == len(graph)
+    # No row was kept in the result as it was read.
+    assert results._bindings == []
+
+
+def test_evaluate_limit(graph):
+    rows = queue.Queue()
+    evaluate(query(graph, 'SELECT * WHERE { ?s ?p ?o }'), rows, limit=5)
+    items = drain(rows)
+    assert len(items) == 6
+    assert items[-1] is END
+
+
+def test_evaluate_cancelled(graph):
+    cancelled = threading.Event()
+    cancelled.set()
+    rows = queue.Queue()
+    evaluate(query(graph, SLOW_QUERY), rows, cancelled=cancelled)
+    assert drain(rows) == []
+
+
+def test_evaluate_bounded(graph):
+    cancelled = threading.Event()
+    rows = queue.Queue(2)
+    worker = threading.Thread(target=evaluate, args=(
+        query(graph, SLOW_QUERY), rows, None, cancelled))
+    worker.start()
+    # The worker waits for the reader once two rows are queued.
+    assert rows.get(timeout=5) is not END
+    cancelled.set()
+    worker.join(5)
+    assert not worker.is_alive()
+    assert rows.qsize() <= 2
+
+
+def test_executor_timeout(graph):
+    executor = QueryExecutor()
+    try:
+        with pytest.raises(QueryTimeout) as info:
+            executor.run(graph, ASK_QUERY, timeout=0.05)
+        assert info.value.timeout == 0.05
+        # Timing out while the rows are being read.
+        results = executor.run(graph, SLOW_QUERY, timeout=0.05)
+        with pytest.raises(QueryTimeout):
+            list(rdftools.result_rows(results))
+        # The graph is untouched and the executor still usable.
+        results = executor.run(graph, TYPES_QUERY, timeout=10)
+        assert len(list(rdftools.result_rows(results))) == 3
+    finally:
+        executor.shutdown()
+
+
+def test_executor_streams(graph):
+    executor = QueryExecutor(workers=1)
+    try:
+        # The first rows of over 390,000, without waiting for the rest.
+        results = executor.run(graph, SLOW_QUERY, timeout=10)
+        rows = rdftools.result_rows(results)
+        assert len([next(rows) for _ in range(3)]) == 3
+        # Dropping the results cancels the query in the only worker.
+        del rows, results
+        results = executor.run(graph, TYPES_QUERY, timeout=10)
+        assert len(list(rdftools.result_rows(results))) == 3
+    finally:
+        executor.shutdown()
+
+
+def test_executor_concurrent(graph):
+    executor = QueryExecutor(workers=4)
+
+    async def run_all():
+        return await asyncio.gather(*[
+            executor.query(graph, 'SELECT * WHERE { ?s ?p ?o }', limit=limit)
+            for limit in range(1, 5)])
+    try:
+        counts = [len(list(rdftools.result_rows(results)))
+                  for results in asyncio.run(run_all())]
+        assert counts == [1, 2, 3, 4]
+    finally:
+        executor.shutdown()
@@ -0,0 +1,142 @@
+import hashlib
+import os.path
+import pytest
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import rdftools
+from rdftools.fetch import HTTPCache
+from rdftools.scripts import convert, shell
+from test.sample_data import input_file, input_file_count, nt_input_file, \
+    nt_input_file_count
+
+rdftools.configure_translation(force_locale='en')
+rdftools.configure_logging('test', 0)
+
+DATA = os.path.dirname(input_file)
+
+# Served without a file suffix, so the format comes from the content type.
+TYPES = {'.ttl': 'text/turtle', '.nt': 'application/n-triples'}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address[1]))
+        if self.path.startswith('/moved/'):
+            return self.respond(301, {'Location': self.path[6:]})
+        (name, suffix) = os.path.splitext(self.path)
+        path = os.path.join(DATA, os.path.basename(name) +
+                            ('.ttl' if suffix == '' else suffix))
+        if not os.path.exists(path):
+            return self.respond(404)
+        with open(path, 'rb') as file:
+            body = file.read()
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            return self.respond(304, {'ETag': etag})
+        self.respond(200, {'ETag': etag, 'Content-Type': TYPES.get(
+            os.path.splitext(path)[1], 'application/octet-stream')}, body)
+
+    def respond(self, status, headers={}, body=b''):
+        self.send_response(status)
+        for (name, value) in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('localhost', 0), Handler)
+    server.daemon_threads = True
+    server.requests = []
+    server.url = 'http://localhost:%d' % server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever,
+                              kwargs={'poll_interval': 0.05})
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def statements(out):
+    return [line for line in out.split('\n') if not line == '']
+
+
+def test_fetch_revalidates(server, tmpdir):
+    url = server.url + '/sample.ttl'
+    first = HTTPCache(str(tmpdir)).fetch(url)
+    assert first.endswith('.ttl')
+    with open(first, 'rb') as copy, open(input_file, 'rb') as original:
+        assert copy.read() == original.read()
+    mtime = os.path.getmtime(first)
+    # A new cache, as in another run, reading the same directory.
+    assert HTTPCache(str(tmpdir)).fetch(url) == first
+    assert os.path.getmtime(first) == mtime
+    assert len(server.requests) == 2
+
+
+def test_fetch_content_type(server, tmpdir):
+    assert HTTPCache(str(tmpdir)).fetch(
+        server.url + '/sample').endswith('.ttl')
+
+
+def test_fetch_redirect(server, tmpdir):
+    path = HTTPCache(str(tmpdir)).fetch(server.url + '/moved/sample.nt')
+    assert path.endswith('.nt')
+    assert [path for (path, port) in server.requests] == \
+        ['/moved/sample.nt', '/sample.nt']
+
+
+def test_fetch_reuses_connection(server, tmpdir):
+    cache = HTTPCache(str(tmpdir))
+    for name in ['sample.ttl', 'sample.nt', 'sample.nq']:
+        cache.fetch(server.url + '/' + name)
+    assert len(set(port for (path, port) in server.requests)) == 1
+
+
+def test_fetch_not_found(server, tmpdir):
+    with pytest.raises(IOError) as ex:
+        HTTPCache(str(tmpdir)).fetch(server.url + '/missing.ttl')
+    assert str(ex.value).endswith('404 Not Found.')
+
+
+def test_convert_url_inputs(capsys, server, tmpdir):
+    with patch('sys.argv', ['test_convert', '-w', 'nt',
+                            '--http-cache', str(tmpdir), '-i',
+                            server.url + '/sample.ttl',
+                            server.url + '/sample.nt', nt_input_file]):
+        convert.main()
+        (out, err) = capsys.readouterr()
+        # The N-Triples file has the Turtle's statements and two more, one
+        # with a blank node that is a different one in each copy.
+        assert len(statements(out)) == input_file_count + 3
+    assert len(server.requests) == 2
+
+
+def test_convert_url_not_found(capsys, server, tmpdir):
+    with patch('sys.argv', ['test_convert', '--http-cache', str(tmpdir),
+                            '-i', server.url + '/missing.ttl']):
+        with pytest.raises(SystemExit):
+            convert.main()
+        (out, err) = capsys.readouterr()
+        assert 'unable to download' in err
+
+
+def test_shell_parse_url(capsys, server, tmpdir):
+    url = server.url + '/sample.nt'
+    with patch.object(shell, 'HTTP_CACHE', HTTPCache(str(tmpdir))):
+        context = shell.clear(None, '')
+        context = shell.parse(context, url + ' nt')
+        assert len(context.graph) == nt_input_file_count
+        context = shell.reload(context, url)
+    (out, err) = capsys.readouterr()
+    assert out.split('\n')[1] == 'File %s has not changed.' % url
@@ -0,0 +1,130 @@
+import json
+import pstats
+import tracemalloc
+from io import StringIO
+from unittest.mock import patch
+
+import rdftools
+from rdftools import metrics
+from rdftools.scripts import convert, query, validate
+from test.sample_data import input_file, input_file_count, nt_input_file, \
+    nt_input_file_count
+
+rdftools.configure_translation(force_locale='en')
+
+
+def last_stats(err):
+    return json.loads(err.strip().splitlines()[-1])
+
+
+def test_phases_and_counts():
+    recorder = metrics.reset('test')
+    with recorder.phase('parse'):
+        pass
+    with recorder.phase('parse'):
+        pass
+    recorder.count('rows', 3)
+    recorder.input('a.nt', 'nt', 100, 0.5)
+    recorder.input(None, 'nt', 10, 0)
+    stats = recorder.stats()
+    assert stats['tool'] == 'test'
+    assert list(stats['phases']) == ['parse']
+    assert stats['counts'] == {'rows': 3}
+    assert stats['inputs'][0]['rate'] == 200
+    assert stats['inputs'][1]['name'] == '-'
+    assert stats['inputs'][1]['rate'] is None
+    assert stats['peak_rss'] > 0
+
+
+def test_format_text():
+    recorder = metrics.reset('test')
+    recorder.add_time('query', 0.25)
+    recorder.output('out.nt', 'nt', 20, 0.5)
+    text = metrics.format_stats(recorder.stats(), 'text')
+    assert 'query: 0.25 seconds.' in text
+    assert 'wrote out.nt (nt): 20 statements in 0.5 seconds, ' \
+        '40 statements/second.' in text
+    assert 'peak memory resident' in text
+
+
+def test_convert_stats(capsys):
+    with patch('sys.argv', ['test_convert', '-i', input_file, '-r', 'n3',
+                            '-w', 'nt', '--stats', 'json']):
+        convert.main()
+    (out, err) = capsys.readouterr()
+    stats = last_stats(err)
+    assert stats['tool'] == 'test_convert'
+    assert set(['parse', 'serialize']) <= set(stats['phases'])
+    assert [(input['name'], input['statements'])
+            for input in stats['inputs']] == [(input_file, input_file_count)]
+    assert stats['outputs'][0]['name'] == '-'
+    assert stats['outputs'][0]['statements'] == input_file_count
+
+
+def test_convert_streamed_stats(capsys):
+    with patch('sys.argv', ['test_convert', '-i', nt_input_file,
+                            '-w', 'nt', '--stats', 'json']):
+        convert.main()
+    (out, err) = capsys.readouterr()
+    stats = last_stats(err)
+    assert list(stats['phases']) == ['stream']
+    assert stats['inputs'][0]['statements'] == nt_input_file_count
+    assert stats['outputs'][0]['statements'] == nt_input_file_count
+
+
+def test_query_stats(capsys):
+    with patch('sys.argv', ['test_query', '-i', input_file, '-r', 'n3',
+                            '-q', 'SELECT ?s WHERE { ?s ?p ?o }',
+                            '--stats', 'json']):
+        query.main()
+    (out, err) = capsys.readouterr()
+    stats = last_stats(err)
+    assert set(['parse', 'query', 'render']) <= set(stats['phases'])
+    assert stats['counts'] == {'rows': input_file_count}
+
+
+def test_no_stats(capsys):
+    with patch('sys.argv', ['test_convert', '-i', nt_input_file,
+                            '-w', 'nt']):
+        convert.main()
+    (out, err) = capsys.readouterr()
+    assert err == ''
+    # Still recorded, for the shell's stats command.
+    assert metrics.stats()['inputs'][0]['statements'] == nt_input_file_count
+
+
+def test_stats_on_exit(capsys):
+    with patch('sys.argv', ['test_validate', '-i', nt_input_file,
+                            '--stats', 'text']):
+        try:
+            validate.main()
+        except SystemExit:
+            pass
+    (out, err) = capsys.readouterr()
+    assert 'test_validate ran for' in err
+    assert 'read %s (nt): %d statements' % (
+        nt_input_file, nt_input_file_count) in err
+
+
+def test_profile(capsys, tmpdir):
+    profile = str(tmpdir.join('convert.prof'))
+    trace = str(tmpdir.join('convert.trace'))
+    with patch('sys.argv', ['test_convert', '-i', input_file, '-r', 'n3',
+                            '-w', 'nt', '--profile', profile,
+                            '--trace-memory', trace, '--stats', 'json']):
+        convert.main()
+    (out, err) = capsys.readouterr()
+    assert last_stats(err)['peak_traced'] > 0
+    assert not tracemalloc.is_tracing()
+    output = StringIO()
+    pstats.Stats(profile, stream=output).print_stats('serialize')
+    assert 'serialize' in output.getvalue()
+    snapshot = tracemalloc.Snapshot.load(trace)
+    assert len(snapshot.statistics('filename')) > 0
+
+
+def test_finish_without_stats():
+    stream = StringIO()
+    metrics.configure('test')
+    metrics.finish(stream)
+    assert stream.getvalue() == ''
@@ -0,0 +1,98 @@
+import gzip
+import time
+from io import StringIO
+from unittest.mock import patch
+
+import rdftools
+from rdftools import progress
+from rdftools.progress import Progress, duration
+from rdftools.scripts import convert, validate
+from test.sample_data import input_file, input_file_count, nt_input_file, \
+    nt_input_file_count
+
+rdftools.configure_translation(force_locale='en')
+
+MB = 1024 * 1024
+
+
+def test_duration():
+    assert duration(5.5) == '0:00:05'
+    assert duration(3725) == '1:02:05'
+
+
+def test_status():
+    reporter = Progress('big.nt', total=100 * MB, position=lambda: 25 * MB,
+                        count=lambda: 1000, stream=StringIO())
+    reporter.started = 0
+    with patch.object(progress, 'timer', lambda: 10.0):
+        assert reporter.status() == \
+            'big.nt: 25.0 of 100.0 MB read (25%), 2.5 MB/s, ' \
+            '1000 statements, 100 per second, 0:00:30 left'
+
+
+def test_status_stdin():
+    reporter = Progress(None, count=lambda: 50, stream=StringIO())
+    reporter.started = 0
+    with patch.object(progress, 'timer', lambda: 5.0):
+        assert reporter.status() == \
+            '-, 50 statements, 10 per second, 0:00:05 elapsed'
+
+
+def test_logged():
+    stream = StringIO()
+    with patch.object(progress, 'LOG_INTERVAL', 0.01):
+        with Progress('big.nt', position=lambda: MB, stream=stream) as active:
+            assert progress.REPORTER is active
+            time.sleep(0.1)
+    assert progress.REPORTER is None
+    lines = stream.getvalue().splitlines()
+    assert len(lines) > 1
+    assert lines[0].startswith('big.nt: 1.0 MB read, ')
+
+
+def test_disabled():
+    assert not progress.enabled()
+    with progress.monitor('big.nt') as reporter:
+        assert reporter is None
+
+
+def test_open_input(tmpdir):
+    compressed = str(tmpdir.join('sample.nt.gz'))
+    with open(nt_input_file, 'rb') as file:
+        data = file.read()
+    with gzip.open(compressed, 'wb') as file:
+        file.write(data)
+    with patch.object(progress, 'ENABLED', True):
+        for name in [nt_input_file, compressed]:
+            with progress.open_input(name) as source:
+                assert isinstance(progress.REPORTER, Progress)
+                assert source.read() == data
+            assert progress.REPORTER is None
+
+
+def test_convert_progress(capsys):
+    with patch('sys.argv', ['test_convert', '-i', input_file, '-r', 'n3',
+                            '-w', 'nt']):
+        convert.main()
+    (expected, err) = capsys.readouterr()
+    try:
+        with patch('sys.argv', ['test_convert', '-i', input_file, '-r', 'n3',
+                                '-w', 'nt', '--progress']):
+            convert.main()
+    finally:
+        progress.ENABLED = False
+    (out, err) = capsys.readouterr()
+    assert len(out.splitlines()) == input_file_count
+    assert sorted(out.splitlines()) == sorted(expected.splitlines())
+
+
+def test_validate_progress(capsys):
+    try:
+        with patch('sys.argv', ['test_validate', '-i', nt_input_file,
+                                input_file, '-j', '2', '--progress']):
+            validate.main()
+    finally:
+        progress.ENABLED = False
+    (out, err) = capsys.readouterr()
+    assert '%d statements' % nt_input_file_count in out
+    assert '2 of 2 files valid.' in out
@@ -45,3 +45,197 @@ def test_query_script_bad_sparql(capsys):
             pytest.fail('expecting: %s' % expected_err)
         except pyparsing.ParseException as ex:
             assert str(ex).index(expected_err) >= 0
+
+
+def test_query_script_limit(capsys):
+    with patch('sys.argv',
+               ['test_query', '-i', input_file, '-r', 'n3', '-l', '2', '-q',
+                'SELECT DISTINCT ?type WHERE { ?s a ?type }']):
+        query.main()
+        (out, err) = capsys.readouterr()
+        out_lines = [line for line in out.split('\n')
+                     if line.startswith('http://')]
+        assert len(out_lines) == 2
+        assert out.index('2 rows returned') >= 0
+
+
+def test_query_script_page_size(capsys):
+    with patch('sys.argv',
+               ['test_query', '-i', input_file, '-r', 'n3',
+                '--page-size', '1', '-q',
+                'SELECT DISTINCT ?type WHERE { ?s a ?type }']):
+        query.main()
+        (out, err) = capsys.readouterr()
+        headers = [line for line in out.split('\n')
+                   if line.startswith('type ')]
+        assert len(headers) == len(expected_out)
+        assert out.index('3 rows returned') >= 0
+
+
+def test_query_script_unbound(capsys):
+    with patch('sys.argv',
+               ['test_query', '-i', input_file, '-r', 'n3', '-q',
+                'SELECT ?s ?topic WHERE { ?s a ?type OPTIONAL { '
+                '?s <http://example.org/social/relationship/1.0/likes> '
+                '?topic } }']):
+        query.main()
+        (out, err) = capsys.readouterr()
+        assert out.index('rows returned') >= 0
+
+
+results_formats = ['csv', 'tsv', 'json', 'xml']
+
+
+@pytest.mark.parametrize('format', results_formats)
+def test_query_script_results_format(capsys, format):
+    from io import StringIO
+    from rdflib.query import Result
+    with patch('sys.argv',
+               ['test_query', '-i', input_file, '-r', 'n3',
+                '--results-format', format, '-q',
+                'SELECT DISTINCT ?type WHERE { ?s a ?type }']):
+        query.main()
+        (out, err) = capsys.readouterr()
+        results = Result.parse(StringIO(out), format=format)
+        assert sorted([str(row[0]) for row in results]) == expected_out
+
+
+@pytest.mark.parametrize('format', ['json', 'xml'])
+def test_query_script_results_format_ask(capsys, format):
+    from io import StringIO
+    from rdflib.query import Result
+    with patch('sys.argv',
+               ['test_query', '-i', input_file, '-r', 'n3',
+                '--results-format', format, '-q',
+                'ASK { ?s a ?type }']):
+        query.main()
+        (out, err) = capsys.readouterr()
+        assert bool(Result.parse(StringIO(out), format=format))
+
+
+def test_query_script_results_format_construct(capsys):
+    with patch('sys.argv',
+               ['test_query', '-i', input_file, '-r', 'n3',
+                '--results-format', 'json', '-q',
+                'CONSTRUCT { ?s a ?type } WHERE { ?s a ?type }']):
+        query.main()
+        (out, err) = capsys.readouterr()
+        assert out == ''
+
+
+def test_query_script_results_format_file(tmpdir):
+    p = tmpdir.join('results.csv')
+    with patch('sys.argv',
+               ['test_query', '-i', input_file, '-r', 'n3',
+                '--results-format', 'csv', '-o', str(p), '-q',
+                'SELECT ?person ?topic WHERE { ?person '
+                '<http://example.org/social/relationship/1.0/likes> '
+                '?topic } ORDER BY ?person ?topic']):
+        query.main()
+    lines = p.read().split('\n')
+    assert lines[0] == 'person,topic'
+    assert lines[1].startswith('http://example.org/social/people/1.0/')
+
+
+def test_normalize_query():
+    from rdftools.sparql import normalize_query
+    assert normalize_query('  SELECT ?s\n  WHERE {\t?s ?p "a  b" }\n') == \
+        'SELECT ?s WHERE { ?s ?p "a  b" }'
+
+
+def test_prepare_query_cached():
+    from rdftools.sparql import prepare_query
+    first = prepare_query('SELECT ?s WHERE { ?s ?p ?o }')
+    second = prepare_query('SELECT ?s\n WHERE { ?s ?p ?o }')
+    other = prepare_query('SELECT ?s WHERE { ?s ?p ?o }',
+                          [('ex', 'http://example.org/')])
+    assert first is second
+    assert first is not other
+
+
+def test_query_script_query_file(capsys):
+    import os
+    queries = os.path.join(os.path.dirname(__file__),
+                           '../data/queries.sparql')
+    with patch('sys.argv',
+               ['test_query', '-i', input_file, '-r', 'n3',
+                '--query-file', queries]):
+        query.main()
+        (out, err) = capsys.readouterr()
+        footers = [line for line in out.split('\n')
+                   if line.find('rows returned') > 0]
+        assert len(footers) == 6
+        assert footers[0].startswith('3 rows returned')
+
+
+def test_query_script_batch_table(capsys, tmpdir):
+    queries = tmpdir.join('queries.sparql')
+    queries.write('ASK { ?s a ?type }\n\n'
+                  'CONSTRUCT { ?s a ?type } WHERE { ?s a ?type }\n\n'
+                  'SELECT DISTINCT ?type WHERE { ?s a ?type }\n')
+    with patch('sys.argv',
+               ['test_query', '-i', input_file, '-r', 'n3',
+                '--queries', str(queries)]):
+        query.main()
+        (out, err) = capsys.readouterr()
+    lines = out.split('\n')
+    assert lines[0] == 'query returned True.'
+    assert out.index('<http://example.org/social/people/1.0/Alice> a ') > 0
+    assert out.index('3 rows returned') > 0
+    # The timings go to stderr, apart from the results.
+    summary = [line.split('|')[0].strip() for line in err.split('\n')[2:-2]]
+    assert summary == ['queries-1', 'queries-2', 'queries-3']
+
+
+batch_modes = [[], ['--batch-jobs', '3'],
+               ['--batch-jobs', '2', '--batch-processes']]
+
+
+@pytest.mark.parametrize('mode', batch_modes)
+def test_query_script_batch_dir(capsys, tmpdir, mode):
+    queries = tmpdir.mkdir('queries')
+    queries.join('types.rq').write(
+        'SELECT DISTINCT ?type WHERE { ?s a ?type }')
+    queries.join('likes.sparql').write(
+        '# two queries\nSELECT ?p ?t WHERE { ?p '
+        '<http://example.org/social/relationship/1.0/likes> ?t }\n\n'
+        'ASK { ?s a ?type }\n')
+    queries.join('ignored.txt').write('SELECT * WHERE { ?s ?p ?o }')
+    output = tmpdir.join('results')
+    with patch('sys.argv',
+               ['test_query', '-i', input_file, '-r', 'n3',
+                '--queries', str(queries), '--output-dir', str(output),
+                '--results-format', 'json'] + mode):
+        query.main()
+        (out, err) = capsys.readouterr()
+    assert sorted(output.listdir()) == sorted([
+        output.join('likes-1.json'), output.join('likes-2.json'),
+        output.join('types.json')])
+    assert output.join('types.json').read().find('Person') > 0
+    summary = [line.split('|')[0].strip() for line in out.split('\n')[2:-2]]
+    assert summary == ['likes-1', 'likes-2', 'types']
+    assert out.index('3 rows returned') >= 0
+
+
+def test_query_script_timeout(capsys):
+    with patch('sys.argv',
+               ['test_query', '-i', input_file, '-r', 'n3', '--timeout',
+                '0.05', '-q', 'SELECT * WHERE { ?a ?b ?c . ?d ?e ?f . '
+                '?g ?h ?i . ?j ?k ?l }']):
+        query.main()
+        (out, err) = capsys.readouterr()
+        # Any rows read before the time ran out come first.
+        assert out.endswith('query cancelled after 0.05 seconds.\n')
+
+
+def test_query_script_store(capsys, tmpdir):
+    store = str(tmpdir.join('mapped'))
+    for inputs in (['-i', input_file, '-r', 'n3'], []):
+        with patch('sys.argv',
+                   ['test_query', '--store', store] + inputs +
+                   ['-q', 'SELECT DISTINCT ?type WHERE { ?s a ?type }']):
+            query.main()
+            (out, err) = capsys.readouterr()
+            out_lines = sorted([line for line in out.split('\n')
+                                if line.startswith('http://')])
+            assert [line.split()[0] for line in out_lines] == expected_out
@@ -3,20 +3,32 @@ from unittest.mock import patch
 
 from rdftools.scripts import rdf
 
+from test.sample_data import input_file
 
-def test_rdf_script(capfd):
-    # We use capfd, not capsys, because the output we want to capture comes
-    # from the subprocess spawned by rdf, not rdf itself.
-    expected_out = 'usage: rdf-query [-h] [-v] [-b BASE] [-i [INPUT [INPUT ...]]]'  # noqa: 501
+
+def test_rdf_script(capsys):
+    expected_out = 'usage: rdf-query [-h] [-v] [-b BASE]'
     with patch('sys.argv',
                ['test_rdf', '-v', 'query', '-h']):
+        try:
+            rdf.main()
+            pytest.fail('expecting: %s' % expected_out)
+        except SystemExit as ex:
+            assert ex.code == 0
+            (out, err) = capsys.readouterr()
+            assert out.startswith(expected_out)
+
+
+def test_rdf_script_runs_command(capsys):
+    with patch('sys.argv',
+               ['test_rdf', 'select', '-i', input_file, '-p']):
         rdf.main()
-        (out, err) = capfd.readouterr()
-        assert out.startswith(expected_out)
+        (out, err) = capsys.readouterr()
+        assert out.startswith('http://')
 
 
-expected_err = """usage: test_rdf [-h] [-v] {validate,convert,select,shell,query} ...
-test_rdf: error: argument command: invalid choice: 'foobar' (choose from 'validate', 'convert', 'select', 'shell', 'query')
+expected_err = """usage: test_rdf [-h] [-v] {validate,convert,diff,select,shell,query,serve} ...
+test_rdf: error: argument command: invalid choice: 'foobar' (choose from 'validate', 'convert', 'diff', 'select', 'shell', 'query', 'serve')
 """  # noqa: 501
 
 
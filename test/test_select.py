@@ -2,7 +2,7 @@ import pytest
 from unittest.mock import patch
 
 from rdftools.scripts import select
-from test.sample_data import input_file
+from test.sample_data import input_file, nt_input_file
 
 expected_subjects = sorted("""http://example.org/social/people/1.0/OurFamily
 http://example.org/social/people/1.0/Alice
@@ -62,3 +62,116 @@ def test_select_script_subjects(capsys, param, expected):
         out_lines = sorted([line for line in out.split('\n')
                             if not line == ''])
         assert out_lines == expected
+
+
+@pytest.mark.parametrize('param, expected', test_parameters)
+def test_select_script_store(capsys, tmpdir, param, expected):
+    store = str(tmpdir.join('mapped'))
+    for inputs in (['-i', input_file, '-r', 'n3'], []):
+        with patch('sys.argv', ['test_select', '--store', store] + inputs +
+                   [param]):
+            select.main()
+            (out, err) = capsys.readouterr()
+            out_lines = sorted([line for line in out.split('\n')
+                                if not line == ''])
+            assert out_lines == expected
+
+
+@pytest.mark.parametrize('param, expected', test_parameters)
+def test_select_script_streaming(capsys, param, expected):
+    results = []
+    for mode in [[], ['-m']]:
+        with patch('sys.argv',
+                   ['test_select', '-i', nt_input_file, param] + mode):
+            select.main()
+            (out, err) = capsys.readouterr()
+            results.append(sorted([line for line in out.split('\n')
+                                   if line.startswith('http://')]))
+    assert results[0] == results[1]
+    assert set(expected) <= set(results[0])
+
+
+count_parameters = [
+    (['-i', input_file, '-r', 'n3']),
+    (['-i', nt_input_file]),
+    (['-i', nt_input_file, '-m'])
+]
+
+
+@pytest.mark.parametrize('inputs', count_parameters)
+def test_select_script_count(capsys, inputs):
+    with patch('sys.argv', ['test_select', '-p', '--count'] + inputs):
+        select.main()
+        (out, err) = capsys.readouterr()
+        counts = dict([line.split('\t') for line in out.split('\n')
+                       if not line == ''])
+        assert counts['http://www.w3.org/1999/02/22-rdf-syntax-ns#type'] == \
+            '11'
+
+
+@pytest.mark.parametrize('inputs', count_parameters)
+def test_select_script_approximate(capsys, inputs):
+    with patch('sys.argv', ['test_select', '-s', '--approximate'] + inputs):
+        select.main()
+        (out, err) = capsys.readouterr()
+        # The N-Triples sample adds one blank node subject.
+        assert int(out.strip()) in [len(expected_subjects),
+                                    len(expected_subjects) + 1]
+
+
+def test_hyperloglog():
+    from rdflib import URIRef
+    from rdftools.terms import HyperLogLog
+    estimator = HyperLogLog()
+    for index in range(50000):
+        estimator.add(URIRef('http://example.org/%d' % (index % 20000)))
+    assert abs(len(estimator) - 20000) < 20000 * 0.05
+
+
+def test_hyperloglog_repeatable():
+    import subprocess
+    import sys
+    # Each process hashes str differently; the estimate must not change.
+    script = ('from rdftools.terms import HyperLogLog\n'
+              'estimator = HyperLogLog()\n'
+              'for index in range(5000):\n'
+              '    estimator.add("term-%d" % index)\n'
+              'print(len(estimator))\n')
+    estimates = set(subprocess.check_output([sys.executable, '-c', script])
+                    for _ in range(3))
+    assert len(estimates) == 1
+
+
+def test_sorted_terms():
+    from rdflib import Literal, URIRef
+    from rdftools.sort import ExternalSort
+    from rdftools.terms import sorted_terms, term_line
+    terms = [URIRef('http://example.org/b'), Literal('two\nlines'),
+             URIRef('http://example.org/b'), URIRef('http://example.org/a')]
+    # A tiny buffer, so the terms are spilled and merged.
+    with ExternalSort(buffer_size=1) as lines:
+        for term in terms:
+            lines.write(term_line(term))
+        assert list(sorted_terms(lines, count=True)) == [
+            (URIRef('http://example.org/a'), 1),
+            (URIRef('http://example.org/b'), 2), (Literal('two\nlines'), 1)]
+
+
+def test_select_script_same_text(capsys, tmpdir):
+    path = tmpdir.join('same.nt')
+    path.write('\n'.join(
+        '<http://example.org/s> <http://example.org/p> %s .' % object
+        for object in ['<http://example.org/o>', '"http://example.org/o"',
+                       '"1"', '"1"^^<http://www.w3.org/2001/XMLSchema#int>',
+                       '"chat"@en', '"chat"@fr']) + '\n')
+    # Streamed, the terms are sorted and hashed; each is still distinct.
+    for (option, expected) in [([], 6), (['--count'], 6),
+                               (['--approximate'], 1)]:
+        with patch('sys.argv', ['test_select', '-o', '-i', str(path)] +
+                   option):
+            select.main()
+            (out, err) = capsys.readouterr()
+        lines = out.splitlines()
+        assert len(lines) == expected
+        if option == ['--approximate']:
+            assert lines == ['6']
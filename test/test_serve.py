@@ -0,0 +1,134 @@
+import json
+import pytest
+import threading
+from rdflib.namespace import RDF
+from unittest.mock import patch
+
+import rdftools
+from rdftools.client import ServerError, remote_query, request
+from rdftools.scripts import convert, query, select
+from rdftools.server import make_server
+from test.sample_data import input_file
+
+TYPES_QUERY = 'SELECT DISTINCT ?type WHERE { ?s a ?type }'
+
+expected_types = sorted([
+    'http://example.org/social/profile/1.0/Family',
+    'http://example.org/social/profile/1.0/Person',
+    'http://example.org/social/topics/1.0/Topic',
+])
+
+
+def start(graph, **kwargs):
+    server = make_server(graph, port=0, **kwargs)
+    thread = threading.Thread(target=server.serve_forever,
+                              kwargs={'poll_interval': 0.05})
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+@pytest.fixture(scope='module')
+def graph():
+    rdftools.configure_logging('test', 0)
+    with open(input_file) as input:
+        return rdftools.read_all([input], 'n3')
+
+
+@pytest.fixture(params=['http', 'unix'])
+def server(request, graph, tmpdir):
+    if request.param == 'unix':
+        server = start(graph, socket=str(tmpdir.join('rdf.sock')))
+    else:
+        server = start(graph)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_serve_query(server):
+    results = remote_query(server.url, TYPES_QUERY)
+    assert sorted([str(row[0]) for row in results]) == expected_types
+
+
+def test_serve_sparql_protocol(server):
+    (type, data) = request(server.url, '/sparql', {'query': TYPES_QUERY},
+                           headers={'Accept': 'text/csv'})
+    assert type == 'text/csv'
+    lines = data.decode('utf-8').split('\r\n')
+    assert lines[0] == 'type'
+    assert sorted([line for line in lines[1:] if line]) == expected_types
+
+
+def test_serve_construct(server, graph):
+    results = remote_query(server.url,
+                           'CONSTRUCT { ?s a ?type } WHERE { ?s a ?type }')
+    types = list(graph.triples((None, RDF.type, None)))
+    assert len(results.graph) == len(types)
+
+
+def test_serve_bad_query(server):
+    with pytest.raises(ServerError) as info:
+        remote_query(server.url, 'WHAT IS SPARQL?')
+    assert info.value.status == 400
+
+
+def test_serve_unknown_prefix(server):
+    with pytest.raises(ServerError) as info:
+        remote_query(server.url, 'SELECT * WHERE { ?s x:y ?o }')
+    assert info.value.status == 400
+
+
+def test_serve_query_failed(server):
+    with patch.object(server.executor, 'run',
+                      side_effect=RuntimeError('evaluation failed')):
+        with pytest.raises(ServerError) as info:
+            remote_query(server.url, TYPES_QUERY)
+    assert info.value.status == 500
+
+
+def test_serve_timeout(server):
+    with pytest.raises(ServerError) as info:
+        remote_query(server.url, 'SELECT * WHERE { ?a ?b ?c . ?d ?e ?f . '
+                                 '?g ?h ?i . ?j ?k ?l }', timeout=0.05)
+    assert info.value.status == 503
+
+
+def test_serve_not_found(server):
+    with pytest.raises(ServerError) as info:
+        request(server.url, '/update')
+    assert info.value.status == 404
+
+
+def test_serve_query_script(capsys, server):
+    with patch('sys.argv',
+               ['test_query', '--server', server.url,
+                '--results-format', 'json', '-q', TYPES_QUERY]):
+        query.main()
+        (out, err) = capsys.readouterr()
+        bindings = json.loads(out)['results']['bindings']
+        assert sorted([binding['type']['value']
+                       for binding in bindings]) == expected_types
+
+
+def test_serve_select_script(capsys, server):
+    with patch('sys.argv', ['test_select', '--server', server.url, '-t']):
+        select.main()
+        (out, err) = capsys.readouterr()
+        assert sorted(out.splitlines()) == expected_types
+
+
+def test_serve_select_script_total(capsys, server):
+    with patch('sys.argv', ['test_select', '--server', server.url, '-t',
+                            '--approximate']):
+        select.main()
+        (out, err) = capsys.readouterr()
+        assert out == '3\n'
+
+
+def test_serve_convert_script(capsys, server, graph):
+    with patch('sys.argv', ['test_convert', '--server', server.url,
+                            '-w', 'nt']):
+        convert.main()
+        (out, err) = capsys.readouterr()
+        assert len(out.strip().splitlines()) == len(graph)
@@ -0,0 +1,115 @@
+import gzip
+import pytest
+from unittest.mock import patch
+
+import rdflib
+from rdflib.compare import isomorphic
+
+from rdftools.scripts import convert
+from rdftools.shard import shard_index, shard_names
+from test.sample_data import input_file, input_file_count, nt_input_file, \
+    nq_input_file
+
+
+def run_convert(capsys, *args):
+    with patch('sys.argv', ['test_convert'] + list(args)):
+        convert.main()
+    return capsys.readouterr()
+
+
+def read_lines(name):
+    opener = gzip.open if name.endswith('.gz') else open
+    with opener(name, 'rt', encoding='utf-8') as file:
+        return [line for line in file.read().split('\n') if line]
+
+
+def test_shard_names():
+    names = shard_names('dump.ttl.gz', 64)
+    assert (names[0], names[-1]) == ('dump-00.ttl.gz', 'dump-63.ttl.gz')
+    assert shard_names('out/dump.nt', 3) == \
+        ['out/dump-0.nt', 'out/dump-1.nt', 'out/dump-2.nt']
+
+
+def test_shard_index():
+    term = rdflib.URIRef('http://example.org/social/people/1.0/Alice')
+    # The same in every process, unlike hash().
+    assert shard_index(term, 64) == 3551569053 % 64
+    assert shard_index(None, 64) == 0
+
+
+def test_shards_by_subject(capsys, tmpdir):
+    output = str(tmpdir.join('sample.nt'))
+    run_convert(capsys, '-i', nt_input_file, '-o', output, '--shards', '3')
+    names = shard_names(output, 3)
+    assert sorted(path.strpath for path in tmpdir.listdir()) == names
+    shards = [read_lines(name) for name in names]
+    with open(nt_input_file) as file:
+        # Blank node labels are kept, prefixed for each input.
+        expected = [line.rstrip('\n').replace('_:', '_:f0')
+                    for line in file if line.strip()]
+    assert sorted(sum(shards, [])) == sorted(expected)
+    subjects = [set(line.split(' ')[0] for line in shard) for shard in shards]
+    assert sum(len(shard) for shard in subjects) == len(set.union(*subjects))
+
+
+def test_shards_turtle(capsys, tmpdir):
+    output = str(tmpdir.join('sample.ttl'))
+    run_convert(capsys, '-i', input_file, '-r', 'n3', '-o', output,
+                '--shards', '4', '--shard-by', 'predicate', '-j', '2')
+    predicates = []
+    total = 0
+    for name in shard_names(output, 4):
+        graph = rdflib.Graph().parse(name, format='turtle')
+        total += len(graph)
+        predicates.append(set(graph.predicates()))
+    assert total == input_file_count
+    assert sum(len(shard) for shard in predicates) == \
+        len(set.union(*predicates))
+
+
+def test_shards_by_graph(capsys, tmpdir):
+    output = str(tmpdir.join('sample.nq.gz'))
+    run_convert(capsys, '-i', nq_input_file, '-o', output, '--shards', '2',
+                '--shard-by', 'graph')
+    graphs = [set(line.split(' ')[3] for line in read_lines(name))
+              for name in shard_names(output, 2)]
+    assert len(set.intersection(*graphs)) == 0
+
+
+def test_shards_need_output(capsys, caplog, tmpdir):
+    for output in [[], ['-o', '-']]:
+        with pytest.raises(SystemExit) as info:
+            run_convert(capsys, '-i', nt_input_file, '-w', 'nt',
+                        '--shards', '2', *output)
+        assert info.value.code == 2
+    assert caplog.text.count('Sharding needs an output file') == 2
+    with pytest.raises(SystemExit):
+        run_convert(capsys, '-i', nt_input_file, '-o',
+                    str(tmpdir.join('sample.nt')), '--shards', '0')
+    assert 'The number of shards must be at least 1.' in caplog.text
+    assert capsys.readouterr().out == ''
+
+
+def test_shards_blank_nodes(capsys, tmpdir):
+    source = tmpdir.join('nested.ttl')
+    source.write("""
+        @prefix : <http://example.org/> .
+        :a :p [ :q [ :r "1" ; :s [ :t "2" ] ] ] .
+        :b :p [ :q [ :r "3" ] ] , [ :q "4" ] .
+        :c :p "5" .
+        [ :p [ :q "6" ] ] .
+        _:x :p _:y . _:y :p _:x .
+        """)
+    output = str(tmpdir.join('nested.ttl.out.ttl'))
+    run_convert(capsys, '-i', str(source), '-o', output, '--shards', '4')
+    graph = rdflib.Graph()
+    for name in shard_names(output, 4):
+        with open(name) as file:
+            text = file.read()
+        if text.strip():
+            # The input's prefixes, not the spools' full IRIs.
+            assert '@prefix : <http://example.org/> .' in text
+        graph.parse(data=text, format='turtle')
+    # Split from each other, statements about one blank node would be about
+    # a different one in each shard.
+    assert isomorphic(graph, rdflib.Graph().parse(str(source)))
@@ -1,13 +1,16 @@
+import json
 import pytest
 
 import rdftools
+from rdftools import progress
 from rdftools.scripts import shell
-from test.sample_data import input_file, input_file_count
+from test.sample_data import input_file, input_file_count, nq_input_file, \
+    nt_input_file
 
 expected_commands = ['!', 'base', 'clear', 'close', 'connect', 'context',
                      'echo', 'exit', 'help', 'parse', 'predicates',
-                     'prefix', 'prompt', 'query', 'serialize', 'show',
-                     'subjects']
+                     'prefix', 'progress', 'prompt', 'query', 'reload',
+                     'serialize', 'show', 'stats', 'subjects', 'timeout']
 
 rdftools.configure_translation(force_locale='en')
 
@@ -182,6 +185,78 @@ def test_parse(capsys):
     assert len(context.graph) == input_file_count
 
 
+def test_reload(capsys, tmpdir):
+    with open(nt_input_file) as input:
+        lines = input.readlines()
+    changed = tmpdir.join('changed.nt')
+    changed.write(''.join(lines[:10]))
+    context = new_context()
+    context = shell.parse(context, input_file)
+    context = shell.parse(context, str(changed) + ' nt')
+    size = len(context.graph)
+    changed.write(''.join(lines[2:12]))
+    context = shell.reload(context, '')
+    assert len(context.graph) == size
+    context = shell.reload(context, str(changed))
+    context = shell.reload(context, nt_input_file)
+    (out, err) = capsys.readouterr()
+    assert out.split('\n')[2:6] == [
+        'File %s has not changed.' % input_file,
+        'Reloaded %s, 2 statements added and 2 removed, graph has %d '
+        'statements.' % (changed, size),
+        'File %s has not changed.' % changed,
+        'Warning, file %s was not parsed into this graph.' % nt_input_file]
+
+
+def test_reload_blank_nodes(capsys, tmpdir):
+    from rdflib import Graph
+    from rdflib.compare import isomorphic
+    changed = tmpdir.join('blank.nt')
+    changed.write('_:a <http://example.org/p> _:b .\n'
+                  '_:b <http://example.org/p> "1" .\n')
+    context = new_context()
+    context = shell.parse(context, str(changed) + ' nt')
+    changed.write('_:a <http://example.org/p> _:b .\n'
+                  '_:b <http://example.org/p> "2" .\n'
+                  '# a comment\n')
+    context = shell.reload(context, str(changed))
+    (out, err) = capsys.readouterr()
+    # The unchanged line keeps its blank nodes, the new one refers to them.
+    assert out.split('\n')[1].startswith(
+        'Reloaded %s, 1 statements added and 1 removed' % changed)
+    assert isomorphic(shell.source_graph(context, str(changed)),
+                      Graph().parse(str(changed), format='nt'))
+
+
+def test_reload_progress(capsys, tmpdir):
+    from unittest.mock import patch
+    changed = tmpdir.join('changed.nt')
+    with open(nt_input_file) as input:
+        changed.write(input.read())
+    with patch.object(progress, 'open_input',
+                      wraps=progress.open_input) as opened:
+        context = new_context()
+        context = shell.parse(context, str(changed) + ' nt')
+        changed.write('\n', mode='a')
+        context = shell.reload(context, str(changed))
+    # Both read the file as any other input is, reporting progress.
+    assert [call.args[0] for call in opened.call_args_list] == \
+        [str(changed)] * 2
+
+
+def test_reload_quads(capsys, tmpdir):
+    changed = tmpdir.join('changed.nq')
+    with open(nq_input_file) as input:
+        changed.write(input.read())
+    context = new_context()
+    context = shell.parse(context, str(changed) + ' nquads')
+    context = shell.reload(context, str(changed))
+    (out, err) = capsys.readouterr()
+    assert out.split('\n')[1] == (
+        'Warning, file %s has named graphs other files may share, clear '
+        'and parse it again.' % changed)
+
+
 def test_parse_bad_format(capsys):
     context = new_context()
     context = shell.parse(context, input_file + ' text')
@@ -231,6 +306,24 @@ def test_show(capsys):
             assert line.endswith('> .')
 
 
+def test_show_union(capsys, tmpdir):
+    context = new_context()
+    context = shell.parse(context, input_file)
+    context = shell.parse(context, nt_input_file + ' nt')
+    context = shell.show(context, 'nt')
+    (out, err) = capsys.readouterr()
+    # Statements in both files are written once.
+    lines = [line for line in out.split('\n')[2:] if not line == '']
+    assert len(lines) == len(context.graph)
+    context = shell.parse(context, nq_input_file + ' nquads')
+    p = tmpdir.join('union.nq')
+    context = shell.serialize(context, str(p) + ' nquads')
+    written = p.read()
+    # Only the graphs named in the files, none for the files themselves.
+    assert 'file:' not in written
+    assert '<http://example.org/graphs/likes> .' in written
+
+
 queries = [
     ('SELECT DISTINCT ?type WHERE { ?s a ?type }',
      'type', 3),
@@ -276,3 +369,152 @@ def test_predicates(capsys):
     for predicate in predicates[:-1]:
         assert (predicate.startswith('http://example.org/social/') or
                 predicate == 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type')
+
+
+def test_connect_close(capsys, tmpdir):
+    path = str(tmpdir.join('shell.store'))
+    context = new_context()
+    context = shell.connect(context, path)
+    assert shell.is_open(context)
+    context = shell.parse(context, input_file)
+    context = shell.prefix(context, 'c: <http://example.org/concepts#>')
+    context = shell.close(context, '')
+    assert not shell.is_open(context)
+    assert len(context.graph) == 0
+    context = shell.connect(context, path)
+    assert len(context.graph) == input_file_count
+    assert 'c' in dict(context.graph.namespaces())
+    context = shell.context(context, '')
+    (out, err) = capsys.readouterr()
+    assert out.index('Connected to File store %s, 25 statements.' % path) >= 0
+    assert out.index('Store     type File') >= 0
+    context = shell.clear(context, '')
+    assert not shell.is_open(context)
+
+
+def test_connect_bad_store(capsys, tmpdir):
+    context = new_context()
+    context = shell.connect(context, str(tmpdir.join('x')) + ' NoSuchStore')
+    (out, err) = capsys.readouterr()
+    assert not shell.is_open(context)
+    assert out.index('Error, unable to open store.') == 0
+
+
+def test_connect_mapped(capsys, tmpdir):
+    from rdftools.store import load_mapped
+    path = str(tmpdir.join('mapped'))
+    with open(input_file) as input:
+        load_mapped(path, [input], 'n3').close()
+    context = new_context()
+    context = shell.connect(context, path + ' Mapped')
+    assert shell.is_open(context)
+    assert len(context.graph) == input_file_count
+    context = shell.parse(context, input_file)
+    context = shell.parse(context, nt_input_file + ' nt')
+    context = shell.close(context, '')
+    (out, err) = capsys.readouterr()
+    lines = out.split('\n')
+    assert lines[0] == 'Connected to Mapped store %s, 25 statements.' % path
+    assert lines[1].startswith('Error, unexpected problem reading file.')
+    assert lines[2].startswith('Error, unexpected problem reading file.')
+    assert lines[2].endswith('is read-only.')
+
+
+def test_close_not_open(capsys):
+    context = new_context()
+    context = shell.close(context, '')
+    (out, err) = capsys.readouterr()
+    assert out.index('Warning') == 0
+
+
+def test_prepare(capsys):
+    context = new_context()
+    context = shell.parse(context, input_file)
+    context = shell.prepare(
+        context, 'likes SELECT ?topic WHERE { ?person '
+        '<http://example.org/social/relationship/1.0/likes> ?topic }')
+    assert 'likes' in context.prepared
+    for person in ['Alice', 'Bob']:
+        context = shell.query(
+            context,
+            'likes ?person=<http://example.org/social/people/1.0/%s>' %
+            person)
+    (out, err) = capsys.readouterr()
+    lines = [line for line in out.split('\n') if line.find('rows') > 0]
+    assert len(lines) == 2
+    assert lines[0].startswith('2 rows returned')
+    assert lines[1].startswith('1 rows returned')
+
+
+def test_prepare_bad_query(capsys):
+    context = new_context()
+    context = shell.prepare(context, 'bad WHAT IS SPARQL?')
+    (out, err) = capsys.readouterr()
+    assert 'bad' not in context.prepared
+    assert out.index('Error, unable to parse query.') == 0
+
+
+def test_timeout(capsys):
+    context = new_context()
+    context = shell.timeout(context, '')
+    context = shell.timeout(context, '2.5')
+    assert context.timeout == 2.5
+    context = shell.timeout(context, '')
+    context = shell.timeout(context, 'soon')
+    context = shell.timeout(context, 'off')
+    assert context.timeout is None
+    (out, err) = capsys.readouterr()
+    assert out.split('\n')[:3] == [
+        'Queries run until complete.',
+        'Queries are cancelled after 2.5 seconds.',
+        'Invalid timeout soon, expecting seconds or off.']
+
+
+def test_query_timeout(capsys):
+    context = new_context()
+    context = shell.parse(context, input_file)
+    context = shell.timeout(context, '0.05')
+    context = shell.query(context, 'SELECT * WHERE { ?a ?b ?c . ?d ?e ?f . '
+                                   '?g ?h ?i . ?j ?k ?l }')
+    (out, err) = capsys.readouterr()
+    assert out.strip().endswith('query cancelled after 0.05 seconds.')
+    context = shell.timeout(context, 'off')
+    context = shell.query(context, 'ASK { ?s ?p ?o }')
+    (out, err) = capsys.readouterr()
+    assert out.strip() == 'Ask returned True.'
+
+
+def test_stats(capsys):
+    context = new_context()
+    context = shell.stats(context, 'reset')
+    context = shell.parse(context, input_file)
+    context = shell.query(context, 'SELECT ?s WHERE { ?s ?p ?o }')
+    capsys.readouterr()
+    context = shell.stats(context, '')
+    (out, err) = capsys.readouterr()
+    assert 'parse:' in out
+    assert 'query:' in out
+    assert 'read %s (n3): 25 statements' % input_file in out
+    context = shell.stats(context, 'json')
+    (out, err) = capsys.readouterr()
+    assert json.loads(out)['counts'] == {'rows': 25}
+    context = shell.stats(context, 'xml')
+    (out, err) = capsys.readouterr()
+    assert out.index('Warning') == 0
+
+
+def test_progress(capsys):
+    context = new_context()
+    context = shell.show_progress(context, '')
+    context = shell.show_progress(context, 'on')
+    assert progress.ENABLED
+    context = shell.parse(context, input_file)
+    context = shell.show_progress(context, '')
+    context = shell.show_progress(context, 'off')
+    context = shell.show_progress(context, 'maybe')
+    (out, err) = capsys.readouterr()
+    assert out.splitlines() == [
+        'Parsing does not report its progress.',
+        'Graph updated with %d statements.' % input_file_count,
+        'Parsing reports its progress.',
+        'Warning, invalid parameters for command.']
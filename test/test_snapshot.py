@@ -0,0 +1,108 @@
+import pytest
+from unittest.mock import patch
+from rdflib import ConjunctiveGraph, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+
+import rdftools
+from rdftools import snapshot
+from rdftools.scripts import convert, validate
+from test.sample_data import input_file, input_file_count, nq_input_file, \
+    nq_input_file_count
+
+rdftools.configure_translation(force_locale='en')
+rdftools.configure_logging('test', 0)
+
+
+graph_name = URIRef('http://example.org/graphs/likes')
+
+
+class NamedFile(object):
+
+    def __init__(self, name):
+        self.name = name
+
+
+@pytest.fixture(scope='module')
+def source():
+    with open(input_file) as input:
+        return rdftools.read_all([input], 'n3')
+
+
+def test_round_trip(source):
+    data = snapshot.dump(source)
+    assert data.startswith(snapshot.MAGIC)
+    graph = Graph()
+    assert snapshot.load(data, graph) == input_file_count
+    assert isomorphic(graph, source)
+    assert dict(graph.namespaces())['cr'] == \
+        dict(source.namespaces())['cr']
+
+
+def test_round_trip_many_terms():
+    # Term IDs above 127 take more than one byte.
+    source = Graph()
+    for i in range(1000):
+        source.add((URIRef('http://example.org/s/%d' % (i % 37)),
+                    URIRef('http://example.org/p'),
+                    Literal(i)))
+    graph = Graph()
+    graph.parse(data=snapshot.dump(source), format='snapshot')
+    assert isomorphic(graph, source)
+
+
+def test_round_trip_named_graphs():
+    source = ConjunctiveGraph()
+    source.parse(nq_input_file, format='nquads')
+    graph = ConjunctiveGraph()
+    snapshot.load(snapshot.dump(source), graph)
+    assert len(graph) == nq_input_file_count
+    assert len(graph.get_context(graph_name)) == 2
+    assert len(graph.default_context) == 1
+
+
+def test_bad_snapshot():
+    with pytest.raises(ValueError):
+        snapshot.load(b'@prefix : <http://example.org/> .', Graph())
+
+
+def test_guess_format():
+    for (name, format) in [('graph.rdfsnap', 'snapshot'),
+                           ('graph.ttl', 'turtle')]:
+        assert rdftools.guess_format(NamedFile(name), None) == format
+
+
+def test_convert_script_snapshot(capsys, tmpdir):
+    path = str(tmpdir.join('sample.rdfsnap'))
+    with patch('sys.argv',
+               ['test_convert', '-i', input_file, '-r', 'n3',
+                '-w', 'snapshot', '-o', path]):
+        convert.main()
+    with patch('sys.argv', ['test_convert', '-i', path, '-w', 'nt']):
+        convert.main()
+        (out, err) = capsys.readouterr()
+        assert len([line for line in out.split('\n')
+                    if not line == '']) == input_file_count
+
+
+def test_validate_script_snapshot(capsys, tmpdir):
+    path = tmpdir.join('sample.rdfsnap')
+    with open(input_file) as input:
+        path.write_binary(snapshot.dump(rdftools.read_all([input], 'n3')))
+    with patch('sys.argv', ['test_validate', '-i', str(path)]):
+        validate.main()
+        (out, err) = capsys.readouterr()
+        assert 'Error' not in out
+
+
+def test_serialize(source, tmpdir):
+    from io import BytesIO, TextIOWrapper
+    data = snapshot.serialize(source)
+    assert data == source.serialize(format='snapshot', encoding='latin-1')
+    # Written as bytes, under a text stream too.
+    buffer = BytesIO()
+    with TextIOWrapper(buffer, encoding='utf-8') as stream:
+        source.serialize(destination=stream, format='snapshot')
+        assert buffer.getvalue() == data
+    path = tmpdir.join('sample.rdfsnap')
+    snapshot.serialize(source, str(path))
+    assert path.read_binary() == data
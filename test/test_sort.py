@@ -0,0 +1,61 @@
+import os
+import random
+from unittest.mock import patch
+
+from rdftools import sort
+from rdftools.sort import ExternalSort
+
+lines = ['line %04d\n' % i for i in range(500)]
+
+
+def shuffled(lines):
+    lines = list(lines)
+    random.Random(42).shuffle(lines)
+    return lines
+
+
+def sort_lines(lines, **kwargs):
+    sorter = ExternalSort(**kwargs)
+    for line in lines:
+        sorter.write(line)
+    return sorter
+
+
+def test_sort_in_memory():
+    sorter = sort_lines(shuffled(lines))
+    assert sorter.runs == []
+    assert list(sorter) == lines
+
+
+def test_sort_spilled(tmpdir):
+    sorter = sort_lines(shuffled(lines), buffer_size=1000,
+                        directory=str(tmpdir))
+    assert len(sorter.runs) > 1
+    assert len(tmpdir.listdir()) == len(sorter.runs)
+    assert list(sorter) == lines
+    assert tmpdir.listdir() == []
+
+
+def test_sort_merge_passes(tmpdir):
+    with patch.object(sort, 'MERGE_WIDTH', 4):
+        sorter = sort_lines(shuffled(lines), buffer_size=1,
+                            directory=str(tmpdir))
+        assert len(sorter.runs) == len(lines)
+        assert list(sorter) == lines
+    assert tmpdir.listdir() == []
+
+
+def test_sort_unique(tmpdir):
+    for buffer_size in [sort.BUFFER_DEFAULT, 1000]:
+        sorter = sort_lines(shuffled(lines * 3), unique=True,
+                            buffer_size=buffer_size, directory=str(tmpdir))
+        assert sorter.count == len(lines) * 3
+        assert list(sorter) == lines
+
+
+def test_sort_close(tmpdir):
+    with sort_lines(lines, buffer_size=1000,
+                    directory=str(tmpdir)) as sorter:
+        runs = list(sorter.runs)
+        assert all(os.path.exists(run) for run in runs)
+    assert not any(os.path.exists(run) for run in runs)
@@ -0,0 +1,78 @@
+import json
+import os
+import pytest
+import subprocess
+import sys
+from timeit import default_timer as timer
+
+from rdftools.catalog import CATALOG, compile_catalog
+
+TOOLS = ['convert', 'query', 'select', 'validate']
+
+DEFERRED = ['rdflib', 'termcolor', 'readline']
+
+# Generous, as shared test machines vary; override to tighten locally.
+STARTUP_LIMIT = float(os.environ.get('RDFTOOLS_STARTUP_LIMIT', '1.5'))
+
+HELP_SCRIPT = """
+import json, sys
+import i18n.resource_loader
+loaded = []
+load_resource = i18n.resource_loader.load_resource
+def record(filename, root_data):
+    loaded.append(filename)
+    return load_resource(filename, root_data)
+i18n.resource_loader.load_resource = record
+from rdftools.scripts import %s as tool
+try:
+    tool.main(argv=['--help'])
+except SystemExit:
+    pass
+print(json.dumps({'modules': [m for m in %r if m in sys.modules],
+                  'loaded': loaded}))
+"""
+
+STARTUP_SCRIPT = """
+from rdftools.scripts import rdf
+try:
+    rdf.main(['validate', '--help'])
+except SystemExit:
+    pass
+"""
+
+
+def run_help(tool, deferred=DEFERRED):
+    output = subprocess.check_output(
+        [sys.executable, '-c', HELP_SCRIPT % (tool, deferred)])
+    return json.loads(output.decode('utf-8').splitlines()[-1])
+
+
+def test_catalog_is_current(tmp_path):
+    compiled = compile_catalog(target=str(tmp_path / 'catalog.json'))
+    with open(CATALOG, 'r', encoding='utf-8') as file:
+        assert json.load(file) == compiled
+
+
+@pytest.mark.parametrize('tool', TOOLS)
+def test_help_defers_imports(tool):
+    result = run_help(tool)
+    assert result['modules'] == []
+    assert result['loaded'] == []
+
+
+def test_shell_help_defers_imports():
+    # The shell works on a graph throughout, so only rdflib is loaded.
+    result = run_help('shell', [name for name in DEFERRED
+                                if name != 'rdflib'])
+    assert result['modules'] == []
+    assert result['loaded'] == []
+
+
+def test_startup_time():
+    times = []
+    for _ in range(3):
+        start = timer()
+        subprocess.check_call(
+            [sys.executable, '-c', STARTUP_SCRIPT], stdout=subprocess.DEVNULL)
+        times.append(timer() - start)
+    assert min(times) < STARTUP_LIMIT
@@ -0,0 +1,221 @@
+import itertools
+import os
+import pytest
+from rdflib import Dataset, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, XSD
+from rdflib.store import NO_STORE, VALID_STORE
+
+import rdftools
+from rdftools.store import MAPPED_META, MappedBuilder, decode_term, \
+    encode_term, load_mapped
+from test.sample_data import input_file, input_file_count, nt_input_file, \
+    nt_input_file_count
+
+rdftools.configure_translation(force_locale='en')
+rdftools.configure_logging('test', 0)
+
+
+@pytest.fixture(scope='module')
+def source():
+    with open(input_file) as input:
+        return rdftools.read_all([input], 'n3')
+
+
+@pytest.fixture
+def mapped(source, tmpdir):
+    path = str(tmpdir.join('mapped'))
+    builder = MappedBuilder()
+    builder.add_graph(source)
+    builder.write(path, source.namespaces())
+    graph = Graph(store='Mapped')
+    graph.open(path)
+    yield graph
+    graph.close()
+
+
+@pytest.fixture
+def stored(source, tmpdir):
+    graph = Graph(store='File', identifier=URIRef('urn:x-test:graph'))
+    graph.open(str(tmpdir.join('file.store')), create=True)
+    graph += source
+    for (prefix, namespace) in source.namespaces():
+        graph.bind(prefix, namespace)
+    yield graph
+    graph.close()
+
+
+@pytest.mark.parametrize('term', [
+    URIRef('http://example.org/a'),
+    Literal('plain'),
+    Literal('with\nnew line\x00and nul'),
+    Literal('chat', lang='fr'),
+    Literal('1', datatype=XSD.integer)])
+def test_encode_term(term):
+    decoded = decode_term(encode_term(term))
+    assert decoded == term
+    assert type(decoded) is type(term)
+
+
+def test_mapped_store(source, mapped):
+    assert len(mapped) == input_file_count
+    assert isomorphic(mapped, source)
+    assert dict(mapped.namespaces()) == dict(source.namespaces())
+
+
+def test_mapped_store_patterns(source, mapped):
+    # Every combination of bound terms, from every statement.
+    for triple in source:
+        for mask in itertools.product([False, True], repeat=3):
+            pattern = tuple(term if bound else None
+                            for (term, bound) in zip(triple, mask))
+            assert sorted(mapped.triples(pattern)) == \
+                sorted(source.triples(pattern))
+    missing = URIRef('http://example.org/missing')
+    assert list(mapped.triples((missing, None, None))) == []
+
+
+def test_mapped_store_query(source, mapped):
+    sparql = 'SELECT ?s ?type WHERE { ?s a ?type } ORDER BY ?s ?type'
+    assert list(mapped.query(sparql)) == list(source.query(sparql))
+
+
+@pytest.mark.parametrize('select', ['subjects', 'predicates', 'objects',
+                                    'types'])
+def test_mapped_store_distinct(source, mapped, select):
+    from rdftools.terms import graph_terms
+    assert sorted(graph_terms(mapped, select, count=True)) == \
+        sorted(graph_terms(source, select, count=True))
+
+
+def test_mapped_store_read_only(mapped):
+    term = URIRef('http://example.org/a')
+    with pytest.raises(TypeError):
+        mapped.add((term, term, term))
+
+
+def test_mapped_builder_spills(source, tmpdir):
+    path = str(tmpdir.join('mapped'))
+    builder = MappedBuilder()
+    builder.add_graph(source)
+    builder.add_graph(source)
+    # A buffer this small sorts every index in runs on disk.
+    assert builder.write(path, buffer_size=1,
+                         directory=str(tmpdir)) == input_file_count
+    graph = Graph(store='Mapped')
+    graph.open(path)
+    assert isomorphic(graph, source)
+    graph.close()
+    assert not tmpdir.listdir(lambda entry: entry.ext == '.run')
+
+
+def test_load_mapped_streaming(tmpdir):
+    path = str(tmpdir.join('mapped'))
+    with open(nt_input_file) as input:
+        graph = load_mapped(path, [input], None)
+    assert len(graph) == nt_input_file_count
+    graph.close()
+    # Reopened, without reading the inputs again.
+    assert os.path.exists(os.path.join(path, MAPPED_META))
+    graph = load_mapped(path, None, None)
+    assert len(graph) == nt_input_file_count
+    graph.close()
+
+
+def test_load_mapped_changed_inputs(tmpdir):
+    path = str(tmpdir.join('mapped'))
+    changed = tmpdir.join('changed.nt')
+    with open(nt_input_file) as input:
+        lines = input.readlines()
+
+    def load(*names):
+        inputs = [open(str(name)) for name in names]
+        graph = load_mapped(path, inputs or None, None)
+        for input in inputs:
+            input.close()
+        size = len(graph)
+        # Streamed, the store still has the bindings a graph has.
+        assert dict(graph.namespaces())['rdf'] == URIRef(str(RDF))
+        graph.close()
+        return size
+    changed.write(''.join(lines[:10]))
+    assert load(changed) == 10
+    assert load() == 10
+    assert load(changed) == 10
+    # Changed since the store was built, or other inputs, it is rebuilt.
+    changed.write(''.join(lines[:12]))
+    assert load(changed) == 12
+    assert load(nt_input_file) == nt_input_file_count
+
+
+def test_file_store(source, stored, tmpdir):
+    assert len(stored) == input_file_count
+    assert isomorphic(stored, source)
+    stored.close(commit_pending_transaction=True)
+    # Reopened from the file, as it was committed.
+    graph = Graph(store='File', identifier=URIRef('urn:x-test:graph'))
+    assert graph.open(str(tmpdir.join('file.store'))) == VALID_STORE
+    assert len(graph) == input_file_count
+    assert isomorphic(graph, source)
+    assert dict(graph.namespaces()) == dict(source.namespaces())
+    graph.close()
+
+
+def test_file_store_missing(tmpdir):
+    graph = Graph(store='File')
+    assert graph.open(str(tmpdir.join('missing'))) == NO_STORE
+
+
+def test_file_store_patterns(source, stored):
+    for triple in source:
+        for mask in itertools.product([False, True], repeat=3):
+            pattern = tuple(term if bound else None
+                            for (term, bound) in zip(triple, mask))
+            assert sorted(stored.triples(pattern)) == \
+                sorted(source.triples(pattern))
+    missing = URIRef('http://example.org/missing')
+    assert list(stored.triples((missing, None, None))) == []
+
+
+def test_file_store_changes(stored):
+    (subject, predicate, object) = next(iter(stored))
+    stored.commit()
+    stored.remove((subject, None, None))
+    assert len(list(stored.triples((subject, None, None)))) == 0
+    added = (subject, predicate, Literal('added'))
+    stored.add(added)
+    assert added in stored
+    stored.rollback()
+    assert len(stored) == input_file_count
+    assert added not in stored
+    assert (subject, predicate, object) in stored
+
+
+def test_file_store_graphs(tmpdir):
+    dataset = Dataset(store='File')
+    dataset.open(str(tmpdir.join('file.store')), create=True)
+    (a, b) = (URIRef('http://example.org/a'), URIRef('http://example.org/b'))
+    dataset.graph(a).add((a, a, Literal(1)))
+    dataset.graph(b).add((a, a, Literal(1)))
+    dataset.graph(b).add((b, b, Literal(2)))
+    assert len(dataset.graph(a)) == 1
+    assert len(dataset.graph(b)) == 2
+    assert sorted(g.identifier for g in dataset.store.contexts(
+        (a, a, Literal(1)))) == [a, b]
+    dataset.remove_graph(dataset.graph(b))
+    assert len(dataset.graph(b)) == 0
+    assert (a, a, Literal(1)) in dataset.graph(a)
+    dataset.close()
+
+
+def test_file_store_formula(tmpdir):
+    graph = Graph(store='File', identifier=URIRef('urn:x-test:graph'))
+    graph.open(str(tmpdir.join('file.store')), create=True)
+    graph.parse(format='n3', data="""
+        @prefix : <http://example.org/> .
+        :a :says { :b :c :d } .
+        """)
+    # The quoted statement is only in its formula.
+    assert len(graph) == 1
+    assert len(graph.store) == 1
+    graph.close()
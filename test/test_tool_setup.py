@@ -1,6 +1,7 @@
 import pytest
 
 import rdftools
+from rdftools.scripts.shell import SimpleFile
 
 
 @pytest.fixture
@@ -79,3 +80,15 @@ def test_startup(translator):
                                         '-q', 'select'])
     assert log is not None
     assert cmd is not None
+
+
+def test_read_all_parallel():
+    from rdflib.compare import isomorphic
+    from test.sample_data import input_file, nt_input_file
+    rdftools.configure_logging(name='test', level=0)
+    inputs = [SimpleFile(input_file), SimpleFile(nt_input_file)]
+    serial = rdftools.read_all(inputs, 'n3')
+    parallel = rdftools.read_all(inputs, None, jobs=2)
+    assert len(parallel) == len(serial)
+    assert isomorphic(parallel, serial)
+    assert 'cp' in dict(parallel.namespaces())
@@ -2,7 +2,7 @@ import pytest
 from unittest.mock import patch
 
 from rdftools.scripts import validate
-from test.sample_data import input_file
+from test.sample_data import input_file, nt_input_file
 
 
 def test_validate_success(capsys):
@@ -19,3 +19,103 @@ def test_validate_fail(capsys):
             pytest.fail('expecting to sys.exit with failure')
         except SystemExit as ex:
             assert ex.code == 1
+
+
+def test_validate_parallel_success(capsys):
+    with patch('sys.argv',
+               ['test_validate', '-i', input_file, nt_input_file, '-j', '2']):
+        validate.main()
+
+
+def test_validate_parallel_fail(capsys):
+    with patch('sys.argv',
+               ['test_validate', '-i', input_file, __file__, '-r', 'n3',
+                '-j', '2']):
+        try:
+            validate.main()
+            pytest.fail('expecting to sys.exit with failure')
+        except SystemExit as ex:
+            assert ex.code == 1
+
+
+def test_validate_report(capsys):
+    with patch('sys.argv',
+               ['test_validate', '-i', input_file, nt_input_file]):
+        validate.main()
+        (out, err) = capsys.readouterr()
+        lines = out.split('\n')
+        assert lines[0].startswith('%s: valid, 25 statements' % input_file)
+        assert lines[1].startswith('%s: valid, 27 statements' % nt_input_file)
+        assert lines[2] == '2 of 2 files valid.'
+
+
+invalid_files = [
+    ('bad.nt', '<http://a/> <http://b/> <http://c/> .\n'
+               '<http://a/> <http://b/> .\n', 2),
+    ('bad.ttl', '@prefix : <http://a/> .\n:a :b :c .\n:a :b\n :c :d .\n', 4),
+    ('bad.rdf', '<rdf:RDF xmlns:rdf='
+                '"http://www.w3.org/1999/02/22-rdf-syntax-ns#">\n'
+                '<rdf:Description>\n</rdf:RDF>\n', 3)
+]
+
+
+@pytest.mark.parametrize('name, content, line', invalid_files)
+def test_validate_position(capsys, tmpdir, name, content, line):
+    p = tmpdir.join(name)
+    p.write(content)
+    with patch('sys.argv', ['test_validate', '-i', str(p), '-j', '1']):
+        try:
+            validate.main()
+            pytest.fail('expecting to sys.exit with failure')
+        except SystemExit as ex:
+            assert ex.code == 1
+        (out, err) = capsys.readouterr()
+        assert out.startswith('%s:%d:' % (str(p), line))
+        assert out.index('0 of 1 files valid.') > 0
+
+
+@pytest.mark.parametrize('format', ['json-ld', 'n3', 'nquads', 'trig', 'trix',
+                                    'xml'])
+def test_validate_formats(tmpdir, format):
+    import rdflib
+    from rdftools.validation import validate_file
+    p = tmpdir.join('sample.out')
+    graph = rdflib.ConjunctiveGraph()
+    graph.parse(input_file, format='n3')
+    graph.serialize(destination=str(p), format=format)
+    validation = validate_file((str(p), format, None))
+    assert validation.valid
+    assert validation.count == 25
+
+
+def test_validate_directory(capsys, tmpdir):
+    import shutil
+    data = tmpdir.mkdir('data')
+    shutil.copy(input_file, str(data))
+    shutil.copy(nt_input_file, str(data.mkdir('more')))
+    data.join('notes.txt').write('not RDF')
+    data.join('more').join('bad.nt').write('<http://a/> .\n')
+    with patch('sys.argv', ['test_validate', '-d', str(data)]):
+        try:
+            validate.main()
+            pytest.fail('expecting to sys.exit with failure')
+        except SystemExit as ex:
+            assert ex.code == 1
+        (out, err) = capsys.readouterr()
+        lines = out.split('\n')
+        assert lines[1].startswith(str(data.join('more', 'bad.nt')) + ':1:')
+        assert lines[3] == '2 of 3 files valid.'
+
+
+def test_validate_fail_fast(capsys, tmpdir):
+    p = tmpdir.join('bad.nt')
+    p.write('<http://a/> .\n')
+    with patch('sys.argv', ['test_validate', '-i', str(p), input_file,
+                            '--fail-fast', '-j', '1']):
+        try:
+            validate.main()
+            pytest.fail('expecting to sys.exit with failure')
+        except SystemExit as ex:
+            assert ex.code == 1
+        (out, err) = capsys.readouterr()
+        assert out.index('0 of 1 files valid.') > 0